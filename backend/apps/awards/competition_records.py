@@ -0,0 +1,103 @@
+"""
+按年份分区的比赛获奖记录
+
+分页单位是年份：先取出该比赛有获奖记录的年份（一条 DISTINCT 查询），当前页的
+年份再用一条按 (年份, 奖项顺序, 创建时间) 排序的查询取出全部记录，关联对象通过
+select_related 一并带出。记录按顺序逐条写出 JSON，遇到年份/奖项变化时开闭分组，
+响应以流的形式返回，不在内存中拼出完整结果。
+
+奖项顺序与排行榜一致，使用比赛的 award_display_order，未配置的奖项按名称排在后面。
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Case, IntegerField, Value, When
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .leaderboard import ordered_award_ids
+from .models import AwardRecord
+from .serializers import AwardRecordSerializer
+
+DEFAULT_YEARS_PER_PAGE = 3
+MAX_YEARS_PER_PAGE = 20
+RECORD_CHUNK_SIZE = 500
+
+
+def competition_record_years(competition, year=None):
+    """该比赛有获奖记录的年份，从新到旧"""
+    records = AwardRecord.objects.filter(award__competition=competition)
+    if year is not None:
+        records = records.filter(competition_year__year=year)
+    return list(
+        records.order_by('-competition_year__year')
+        .values_list('competition_year__year', flat=True)
+        .distinct()
+    )
+
+
+def _award_order(competition):
+    ordered = ordered_award_ids(competition)
+    if not ordered:
+        return Value(0, output_field=IntegerField())
+    return Case(
+        *[When(award_id=award_id, then=Value(index)) for index, award_id in enumerate(ordered)],
+        default=Value(len(ordered)),
+        output_field=IntegerField(),
+    )
+
+
+def grouped_records(competition, years):
+    """当前页年份的全部记录，按年份、奖项顺序、创建时间排好，分组只需顺序扫描"""
+    return (
+        AwardRecord.objects
+        .filter(award__competition=competition, competition_year__year__in=years)
+        .select_related('award__competition', 'competition_year', 'video', 'group')
+        .annotate(award_order=_award_order(competition))
+        .order_by('-competition_year__year', 'award_order', 'award__name', 'award_id', '-created_at', 'id')
+    )
+
+
+def page_links(request, page, page_count):
+    url = request.build_absolute_uri()
+    next_url = replace_query_param(url, 'page', page + 1) if page < page_count else None
+    if page <= 1:
+        previous_url = None
+    elif page == 2:
+        previous_url = remove_query_param(url, 'page')
+    else:
+        previous_url = replace_query_param(url, 'page', page - 1)
+    return next_url, previous_url
+
+
+def _dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def stream_grouped_records(meta, records):
+    """
+    逐条输出 {..meta, "results": [{"year", "awards": [{"award", "award_name", "records": [...]}]}]}
+    """
+    serializer = AwardRecordSerializer()
+    yield _dumps(meta)[:-1] + ', "results": ['
+
+    current_year = current_award = None
+    for record in records.iterator(chunk_size=RECORD_CHUNK_SIZE):
+        year = record.competition_year.year
+        if year != current_year:
+            if current_year is not None:
+                yield ']}]}, '
+            yield f'{{"year": {year}, "awards": ['
+            current_year, current_award = year, None
+        if record.award_id != current_award:
+            if current_award is not None:
+                yield ']}, '
+            yield _dumps({'award': record.award_id, 'award_name': record.award.name})[:-1] + ', "records": ['
+            current_award = record.award_id
+            separator = ''
+        yield separator + _dumps(serializer.to_representation(record))
+        separator = ', '
+
+    if current_year is not None:
+        yield ']}]}'
+    yield ']}'
@@ -0,0 +1,162 @@
+"""
+获奖排行榜
+
+按比赛（所有年份 / 单个年份）和全部比赛三种范围维护社团排名，结果存放在汇总表
+awards_leaderboard（AwardLeaderboardEntry）中。奖项档次来自比赛的
+award_display_order：配置中排在前面的奖项依次为第 1、2、3…档，其余奖项归入最后
+一档；每行的 tier_counts 是各档获奖数，按数组降序排列即"金奖多者优先"的排名。
+
+获奖记录、奖项、比赛年份或比赛的奖项顺序变化时由信号调用
+schedule_leaderboard_refresh，在事务提交后用 refresh_competition_leaderboard 重算
+涉及比赛的行，再汇总受影响社团的全部比赛行；同一事务内的多次变化合并为一次重算。
+rebuild_award_leaderboard 整体重建。
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import Rank
+
+from apps.competitions.models import Competition
+
+from .models import Award, AwardLeaderboardEntry, AwardRecord
+
+LEADERBOARD_TIERS = 5
+ALL_YEARS = AwardLeaderboardEntry.ALL_YEARS
+
+
+def ordered_award_ids(competition):
+    """award_display_order 中配置的奖项顺序，兼容 {priorityAwards: [...]} 和列表两种格式"""
+    order = competition.award_display_order or []
+    if isinstance(order, dict):
+        order = order.get('priorityAwards') or []
+    return [str(award_id) for award_id in order if award_id]
+
+
+def award_tiers(competition):
+    """{award_id: 档次}，未配置顺序的奖项归入最后一档"""
+    last = LEADERBOARD_TIERS - 1
+    return {award_id: min(index, last) for index, award_id in enumerate(ordered_award_ids(competition))}
+
+
+def tier_labels(competition=None):
+    if competition is None:
+        return [f'第{index + 1}档' for index in range(LEADERBOARD_TIERS)]
+    awards = Award.objects.filter(competition=competition).values_list('id', 'name')
+    names = {str(award_id): name for award_id, name in awards}
+    labels = [names.get(award_id) for award_id in ordered_award_ids(competition)[:LEADERBOARD_TIERS - 1]]
+    labels = [label for label in labels if label]
+    labels += [f'第{index + 1}档' for index in range(len(labels), LEADERBOARD_TIERS - 1)]
+    return labels + ['其他奖项']
+
+
+def _competition_rows(competition):
+    tiers = award_tiers(competition)
+    counts = defaultdict(lambda: [0] * LEADERBOARD_TIERS)
+    records = (
+        AwardRecord.objects
+        .filter(award__competition=competition, group__isnull=False)
+        .values_list('award_id', 'competition_year__year', 'group_id')
+    )
+    for award_id, year, group_id in records:
+        tier = tiers.get(str(award_id), LEADERBOARD_TIERS - 1)
+        counts[(year, group_id)][tier] += 1
+        counts[(ALL_YEARS, group_id)][tier] += 1
+    return [
+        AwardLeaderboardEntry(
+            competition=competition, year=year, group_id=group_id,
+            tier_counts=tier_counts, award_count=sum(tier_counts),
+        )
+        for (year, group_id), tier_counts in counts.items()
+    ]
+
+
+def refresh_all_time_leaderboard(group_ids=None):
+    """由各比赛"所有年份"行汇总全部比赛的行；group_ids 为空表示全部社团"""
+    overall = AwardLeaderboardEntry.objects.filter(competition__isnull=True)
+    per_competition = AwardLeaderboardEntry.objects.filter(competition__isnull=False, year=ALL_YEARS)
+    if group_ids is not None:
+        overall = overall.filter(group_id__in=group_ids)
+        per_competition = per_competition.filter(group_id__in=group_ids)
+    overall.delete()
+
+    totals = defaultdict(lambda: [0] * LEADERBOARD_TIERS)
+    for group_id, tier_counts in per_competition.values_list('group_id', 'tier_counts'):
+        for tier, count in enumerate(tier_counts):
+            totals[group_id][tier] += count
+    AwardLeaderboardEntry.objects.bulk_create([
+        AwardLeaderboardEntry(
+            competition=None, year=ALL_YEARS, group_id=group_id,
+            tier_counts=tier_counts, award_count=sum(tier_counts),
+        )
+        for group_id, tier_counts in totals.items()
+    ])
+
+
+@transaction.atomic
+def refresh_competition_leaderboard(competition_ids):
+    competition_ids = {competition_id for competition_id in competition_ids if competition_id}
+    if not competition_ids:
+        return
+    stale = AwardLeaderboardEntry.objects.filter(competition_id__in=competition_ids)
+    group_ids = set(stale.values_list('group_id', flat=True))
+    stale.delete()
+
+    rows = []
+    for competition in Competition.objects.filter(id__in=competition_ids).only('id', 'award_display_order'):
+        rows.extend(_competition_rows(competition))
+    AwardLeaderboardEntry.objects.bulk_create(rows)
+
+    group_ids.update(row.group_id for row in rows)
+    if group_ids:
+        refresh_all_time_leaderboard(group_ids)
+
+
+def schedule_leaderboard_refresh(competition_ids):
+    """
+    事务提交后重算这些比赛的排行榜
+
+    待重算的比赛记在当前连接上，同一事务里每条获奖记录都会调用一次，提交后由第一个
+    回调一次性取走并重算，其余回调为空操作。事务回滚时残留的 id 会在下次提交时多算
+    一次，重算是幂等的。
+    """
+    competition_ids = {competition_id for competition_id in competition_ids if competition_id}
+    if not competition_ids:
+        return
+    connection = transaction.get_connection()
+    pending = getattr(connection, '_leaderboard_pending', None)
+    if pending is None:
+        pending = connection._leaderboard_pending = set()
+    pending.update(competition_ids)
+
+    def refresh():
+        if pending:
+            ids = set(pending)
+            pending.clear()
+            refresh_competition_leaderboard(ids)
+
+    transaction.on_commit(refresh)
+
+
+@transaction.atomic
+def rebuild_award_leaderboard():
+    """整体重建排行榜，返回写入的行数"""
+    AwardLeaderboardEntry.objects.all().delete()
+    rows = []
+    for competition in Competition.objects.only('id', 'award_display_order'):
+        rows.extend(_competition_rows(competition))
+    AwardLeaderboardEntry.objects.bulk_create(rows)
+    refresh_all_time_leaderboard()
+    return AwardLeaderboardEntry.objects.count()
+
+
+def leaderboard_queryset(competition_id=None, year=None):
+    """指定范围内的排名，rank 为并列同名次的排名"""
+    return (
+        AwardLeaderboardEntry.objects
+        .filter(competition_id=competition_id, year=year or ALL_YEARS)
+        .select_related('group')
+        .annotate(rank=Window(Rank(), order_by=[F('tier_counts').desc(), F('award_count').desc()]))
+        .order_by('rank', 'group__name')
+    )
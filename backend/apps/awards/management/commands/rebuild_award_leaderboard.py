@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.awards.leaderboard import rebuild_award_leaderboard
+
+
+class Command(BaseCommand):
+    help = '重建获奖排行榜汇总表（批量导入等绕过信号的写入后使用）'
+
+    def handle(self, *args, **options):
+        count = rebuild_award_leaderboard()
+        self.stdout.write(self.style.SUCCESS(f'已重建获奖排行榜，共 {count} 行'))
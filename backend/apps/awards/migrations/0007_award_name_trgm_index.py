@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+# 智能检索对奖项名称做 ILIKE '%关键词%' 匹配，B-tree 索引无法使用，
+# 改用 pg_trgm 的 GIN 索引。数据库未提供 pg_trgm 扩展时跳过，不影响迁移。
+CREATE_TRGM_INDEX = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS awards_award_name_trgm
+            ON awards_award USING gin (name gin_trgm_ops);
+    END IF;
+END
+$$;
+"""
+
+DROP_TRGM_INDEX = "DROP INDEX IF EXISTS awards_award_name_trgm;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('awards', '0006_awardrecord_drama_name'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRGM_INDEX, DROP_TRGM_INDEX),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:21
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_leaderboard(apps, schema_editor):
+    # 档次规则只在 apps.awards.leaderboard 中维护一份，这里直接复用；之后可用
+    # rebuild_award_leaderboard 命令重建
+    from apps.awards.leaderboard import rebuild_award_leaderboard
+    rebuild_award_leaderboard()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0005_alter_group_logo'),
+        ('competitions', '0011_competition_entry'),
+        ('awards', '0007_award_name_trgm_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AwardLeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(default=0, verbose_name='年份')),
+                ('tier_counts', django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), size=None, verbose_name='各档获奖数')),
+                ('award_count', models.PositiveIntegerField(default=0, verbose_name='获奖总数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('competition', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='competitions.competition', verbose_name='比赛')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='groups.group', verbose_name='社团')),
+            ],
+            options={
+                'verbose_name': '获奖排行榜',
+                'verbose_name_plural': '获奖排行榜',
+                'db_table': 'awards_leaderboard',
+                'indexes': [models.Index(fields=['competition', 'year', '-tier_counts', '-award_count'], name='awards_leaderboard_rank_idx')],
+            },
+        ),
+        migrations.RunPython(build_leaderboard, migrations.RunPython.noop),
+    ]
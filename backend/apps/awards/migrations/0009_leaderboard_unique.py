@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:56
+
+from django.db import migrations, models
+
+
+def rebuild_leaderboard(apps, schema_editor):
+    # 并发重算可能留下重复行，加约束前整体重建一次
+    from apps.awards.leaderboard import rebuild_award_leaderboard
+    rebuild_award_leaderboard()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('awards', '0008_award_leaderboard'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_leaderboard, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='awardleaderboardentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('competition__isnull', False)), fields=('competition', 'year', 'group'), name='awards_leaderboard_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='awardleaderboardentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('competition__isnull', True)), fields=('year', 'group'), name='awards_leaderboard_all_time_unique'),
+        ),
+    ]
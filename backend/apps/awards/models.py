@@ -1,6 +1,7 @@
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 import uuid
 
@@ -67,6 +68,54 @@ class AwardRecord(models.Model):
         return f"{self.award.name} ({self.competition_year.year})"
 
 
+
+class AwardLeaderboardEntry(models.Model):
+    """
+    获奖排行榜汇总表
+
+    competition 为空表示全部比赛，year 为 0 表示该比赛所有年份。tier_counts 按奖项档次
+    （Competition.award_display_order 中的顺序）统计获奖数，数组比较即档次优先的排名。
+    由获奖记录等变化的信号维护，见 apps.awards.leaderboard。
+    """
+    ALL_YEARS = 0
+
+    # 删除比赛时获奖记录和比赛的信号会在提交后重算该比赛，所以不用级联删除，由重算清理
+    competition = models.ForeignKey('competitions.Competition', on_delete=models.DO_NOTHING, null=True,
+                                    db_index=False, db_constraint=False, related_name='+', verbose_name='比赛')
+    year = models.IntegerField(default=ALL_YEARS, verbose_name='年份')
+    group = models.ForeignKey('groups.Group', on_delete=models.CASCADE,
+                              related_name='+', verbose_name='社团')
+    tier_counts = ArrayField(models.PositiveIntegerField(), verbose_name='各档获奖数')
+    award_count = models.PositiveIntegerField(default=0, verbose_name='获奖总数')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        db_table = 'awards_leaderboard'
+        verbose_name = '获奖排行榜'
+        verbose_name_plural = '获奖排行榜'
+        indexes = [
+            models.Index(
+                fields=['competition', 'year', '-tier_counts', '-award_count'],
+                name='awards_leaderboard_rank_idx',
+            ),
+        ]
+        # 每个范围内一个社团只有一行；competition 为空的全部比赛行单独约束，NULL 不参与唯一比较
+        constraints = [
+            models.UniqueConstraint(
+                fields=['competition', 'year', 'group'],
+                condition=models.Q(competition__isnull=False),
+                name='awards_leaderboard_unique',
+            ),
+            models.UniqueConstraint(
+                fields=['year', 'group'],
+                condition=models.Q(competition__isnull=True),
+                name='awards_leaderboard_all_time_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.competition_id or '全部比赛'} {self.year or '所有年份'} {self.group_id}"
+
 def update_group_award_count(group):
     """更新社团的获奖数量"""
     if group:
@@ -117,4 +166,76 @@ def award_record_deleted(sender, instance, **kwargs):
     """获奖记录删除时的信号处理"""
     # 更新社团的获奖数量
     if instance.group:
-        update_group_award_count(instance.group)
\ No newline at end of file
+        update_group_award_count(instance.group)
+
+def _award_competition_id(award_id):
+    return Award.objects.filter(id=award_id).values_list('competition_id', flat=True).first()
+
+
+@receiver(pre_save, sender=AwardRecord)
+def award_record_leaderboard_saving(sender, instance, **kwargs):
+    # 记录改挂到其他比赛的奖项时，原比赛的排行榜也需要重算
+    if not instance._state.adding:
+        instance._leaderboard_competition_id = (
+            AwardRecord.objects.filter(pk=instance.pk).values_list('award__competition_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=AwardRecord)
+@receiver(post_delete, sender=AwardRecord)
+def award_record_leaderboard_changed(sender, instance, **kwargs):
+    from .leaderboard import schedule_leaderboard_refresh
+    schedule_leaderboard_refresh({
+        _award_competition_id(instance.award_id),
+        getattr(instance, '_leaderboard_competition_id', None),
+    })
+
+
+@receiver(pre_save, sender=Award)
+def award_leaderboard_saving(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance._leaderboard_competition_id = _award_competition_id(instance.pk)
+
+
+@receiver(post_save, sender=Award)
+def award_leaderboard_changed(sender, instance, created, **kwargs):
+    """奖项改挂到其他比赛时重算新旧比赛的排行榜"""
+    previous = getattr(instance, '_leaderboard_competition_id', None)
+    if not created and previous != instance.competition_id:
+        from .leaderboard import schedule_leaderboard_refresh
+        schedule_leaderboard_refresh({previous, instance.competition_id})
+
+
+@receiver(post_save, sender='competitions.CompetitionYear')
+def competition_year_leaderboard_changed(sender, instance, created, **kwargs):
+    """年份修改后按年份的排名随之变化"""
+    if not created:
+        from .leaderboard import schedule_leaderboard_refresh
+        schedule_leaderboard_refresh({instance.competition_id})
+
+
+@receiver(pre_save, sender='competitions.Competition')
+def competition_leaderboard_saving(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or (update_fields is not None and 'award_display_order' not in update_fields):
+        return
+    instance._leaderboard_award_order = (
+        type(instance).objects.filter(pk=instance.pk).values_list('award_display_order', flat=True).first()
+    )
+
+
+@receiver(post_save, sender='competitions.Competition')
+def competition_leaderboard_changed(sender, instance, created, **kwargs):
+    """award_display_order 决定奖项档次，只有它变化时才重算"""
+    if created or not hasattr(instance, '_leaderboard_award_order'):
+        return
+    if instance._leaderboard_award_order != instance.award_display_order:
+        from .leaderboard import schedule_leaderboard_refresh
+        schedule_leaderboard_refresh({instance.id})
+    del instance._leaderboard_award_order
+
+
+@receiver(post_delete, sender='competitions.Competition')
+def competition_leaderboard_deleted(sender, instance, **kwargs):
+    """比赛已不存在，重算时只会删除它的行并重新汇总涉及社团的全部比赛行"""
+    from .leaderboard import schedule_leaderboard_refresh
+    schedule_leaderboard_refresh({instance.id})
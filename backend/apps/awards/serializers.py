@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Award, AwardRecord
+from .models import Award, AwardLeaderboardEntry, AwardRecord
 
 
 class AwardSerializer(serializers.ModelSerializer):
@@ -45,4 +45,17 @@ class AwardRecordDetailSerializer(AwardRecordSerializer):
         return CompetitionYearSerializer(obj.competition_year).data
     
     class Meta(AwardRecordSerializer.Meta):
-        fields = AwardRecordSerializer.Meta.fields + ['competition_year_detail']
\ No newline at end of file
+        fields = AwardRecordSerializer.Meta.fields + ['competition_year_detail']
+
+
+class AwardLeaderboardEntrySerializer(serializers.ModelSerializer):
+    """
+    获奖排行榜序列化器
+    """
+    rank = serializers.IntegerField(read_only=True)
+    group_name = serializers.CharField(source='group.name', read_only=True)
+    group_logo = serializers.ImageField(source='group.logo', read_only=True)
+
+    class Meta:
+        model = AwardLeaderboardEntry
+        fields = ['rank', 'group', 'group_name', 'group_logo', 'tier_counts', 'award_count']
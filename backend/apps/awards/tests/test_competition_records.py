@@ -0,0 +1,70 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from apps.awards.models import Award, AwardRecord
+from apps.competitions.models import Competition, CompetitionYear
+from apps.groups.models import Group
+from apps.videos.models import Video
+
+
+class CompetitionRecordsTests(APITestCase):
+    grouped_url = '/api/awards/records/by_competition/grouped/'
+
+    def setUp(self):
+        self.competition = Competition.objects.create(name='测试比赛')
+        self.gold = Award.objects.create(competition=self.competition, name='金奖')
+        self.silver = Award.objects.create(competition=self.competition, name='银奖')
+        self.competition.award_display_order = {'priorityAwards': [str(self.silver.id)], 'sortRule': 'custom'}
+        self.competition.save()
+        self.group = Group.objects.create(name='测试社团')
+        self.serial = 0
+
+    def add_year(self, year, per_award=2):
+        competition_year = CompetitionYear.objects.create(competition=self.competition, year=year)
+        for award in (self.gold, self.silver):
+            for _ in range(per_award):
+                self.serial += 1
+                video = Video.objects.create(
+                    bv_number=f'BV1REC{self.serial}', title=f'视频{self.serial}',
+                    url=f'https://www.bilibili.com/video/BV1REC{self.serial}', group=self.group,
+                )
+                AwardRecord.objects.create(award=award, group=self.group, video=video, competition_year=competition_year)
+
+    def get_grouped(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.grouped_url, {'competition': self.competition.id, **params})
+            body = b''.join(response.streaming_content)
+        return len(queries.captured_queries), json.loads(body)
+
+    def test_grouped_pages_by_year_in_constant_queries(self):
+        for year in (2023, 2024, 2025):
+            self.add_year(year)
+        small, data = self.get_grouped({'page_size': 2})
+        self.assertEqual((data['count'], data['years']), (3, [2025, 2024]))
+        self.assertIsNotNone(data['next'])
+        first = data['results'][0]
+        self.assertEqual(first['year'], 2025)
+        self.assertEqual([group['award_name'] for group in first['awards']], ['银奖', '金奖'])
+        self.assertEqual(len(first['awards'][0]['records']), 2)
+        self.assertEqual(first['awards'][0]['records'][0]['group_name'], '测试社团')
+
+        self.add_year(2022, per_award=10)
+        large, data = self.get_grouped({'page': 2, 'page_size': 2})
+        self.assertEqual(data['years'], [2023, 2022])
+        self.assertEqual(len(data['results'][1]['awards'][0]['records']), 10)
+        self.assertEqual(small, large)
+
+    def test_empty_competition(self):
+        _, data = self.get_grouped({})
+        self.assertEqual(data, {'count': 0, 'next': None, 'previous': None, 'years': [], 'results': []})
+
+    def test_flat_list_does_not_query_per_record(self):
+        self.add_year(2024)
+        self.client.get('/api/awards/records/by_competition/', {'competition': self.competition.id})
+        self.add_year(2025, per_award=5)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/awards/records/by_competition/', {'competition': self.competition.id})
+        self.assertEqual(len(response.data), 14)
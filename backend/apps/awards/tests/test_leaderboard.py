@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from rest_framework.test import APITestCase
+
+from apps.awards.leaderboard import rebuild_award_leaderboard
+from apps.awards.models import Award, AwardLeaderboardEntry, AwardRecord
+from apps.competitions.models import Competition, CompetitionYear
+from apps.groups.models import Group
+
+
+class AwardLeaderboardTests(APITestCase):
+    url = '/api/awards/records/leaderboard/'
+
+    def setUp(self):
+        self.competition = Competition.objects.create(name='测试比赛')
+        self.gold = Award.objects.create(competition=self.competition, name='金奖')
+        self.silver = Award.objects.create(competition=self.competition, name='银奖')
+        self.competition.award_display_order = {
+            'priorityAwards': [str(self.gold.id), str(self.silver.id)], 'sortRule': 'custom',
+        }
+        self.competition.save()
+        self.y2024 = CompetitionYear.objects.create(competition=self.competition, year=2024)
+        self.y2025 = CompetitionYear.objects.create(competition=self.competition, year=2025)
+        self.alpha = Group.objects.create(name='甲社团')
+        self.beta = Group.objects.create(name='乙社团')
+
+    def record(self, award, group, year):
+        with self.captureOnCommitCallbacks(execute=True):
+            return AwardRecord.objects.create(award=award, group=group, competition_year=year)
+
+    def ranking(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [(item['rank'], item['group_name'], item['award_count']) for item in response.data['results']]
+
+    def test_gold_ranks_above_more_silver(self):
+        self.record(self.gold, self.alpha, self.y2024)
+        for _ in range(3):
+            self.record(self.silver, self.beta, self.y2025)
+
+        self.assertEqual(self.ranking(competition=self.competition.id), [(1, '甲社团', 1), (2, '乙社团', 3)])
+        self.assertEqual(self.ranking(competition=self.competition.id, year=2024), [(1, '甲社团', 1)])
+        self.assertEqual(self.ranking(), [(1, '甲社团', 1), (2, '乙社团', 3)])
+        response = self.client.get(self.url, {'competition': self.competition.id})
+        self.assertEqual(response.data['tiers'][:2], ['金奖', '银奖'])
+
+        # 调整奖项顺序后重新排名
+        self.competition.award_display_order = {'priorityAwards': [str(self.silver.id)], 'sortRule': 'custom'}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.competition.save()
+        self.assertEqual(self.ranking(), [(1, '乙社团', 3), (2, '甲社团', 1)])
+
+    def test_record_changes_keep_table_in_sync(self):
+        record = self.record(self.gold, self.alpha, self.y2024)
+        record.group = self.beta
+        with self.captureOnCommitCallbacks(execute=True):
+            record.save()
+        self.assertEqual(self.ranking(), [(1, '乙社团', 1)])
+        with self.captureOnCommitCallbacks(execute=True):
+            record.delete()
+        self.assertEqual(self.ranking(), [])
+
+        self.record(self.gold, self.alpha, self.y2025)
+        rows = AwardLeaderboardEntry.objects.count()
+        self.assertEqual(rebuild_award_leaderboard(), rows)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.competition.delete()
+        self.assertFalse(AwardLeaderboardEntry.objects.exists())
+
+    def test_refresh_runs_once_per_transaction(self):
+        with mock.patch('apps.awards.leaderboard.refresh_competition_leaderboard') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(5):
+                    AwardRecord.objects.create(award=self.gold, group=self.alpha, competition_year=self.y2024)
+                self.assertFalse(refresh.called)
+            refresh.assert_called_once_with({self.competition.id})
+
+            # 与奖项顺序无关的修改不重算
+            refresh.reset_mock()
+            self.competition.name = '改名后的比赛'
+            with self.captureOnCommitCallbacks(execute=True):
+                self.competition.save()
+                self.competition.save(update_fields=['name'])
+            self.assertFalse(refresh.called)
+
+    def test_one_row_per_scope(self):
+        self.record(self.gold, self.alpha, self.y2024)
+        for competition in (self.competition, None):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                AwardLeaderboardEntry.objects.create(
+                    competition=competition, group=self.alpha, tier_counts=[1, 0, 0, 0, 0], award_count=1,
+                )
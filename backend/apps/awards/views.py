@@ -4,10 +4,27 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Q
+from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.http import StreamingHttpResponse
 from .models import Award, AwardRecord
-from .serializers import AwardSerializer, AwardRecordSerializer, AwardRecordDetailSerializer
+from .serializers import (
+    AwardLeaderboardEntrySerializer,
+    AwardRecordDetailSerializer,
+    AwardRecordSerializer,
+    AwardSerializer,
+)
+from .leaderboard import leaderboard_queryset, tier_labels
+from .competition_records import (
+    DEFAULT_YEARS_PER_PAGE,
+    MAX_YEARS_PER_PAGE,
+    competition_record_years,
+    grouped_records,
+    page_links,
+    stream_grouped_records,
+)
 from .filters import AwardRecordFilter
+from apps.competitions.models import Competition
 from apps.groups.models import Group
 from apps.videos.models import Video
 from apps.videos.serializers import VideoSerializer
@@ -76,11 +93,9 @@ class AwardRecordViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # 获取该比赛的所有奖项ID
-        award_ids = Award.objects.filter(competition_id=competition_id).values_list('id', flat=True)
-
-        # 获取这些奖项的所有获奖记录
-        records = AwardRecord.objects.filter(award_id__in=award_ids)
+        records = AwardRecord.objects.filter(award__competition_id=competition_id).select_related(
+            'award__competition', 'video', 'group', 'competition_year__competition'
+        )
 
         # 支持按年份过滤
         year = request.query_params.get('year')
@@ -97,6 +112,74 @@ class AwardRecordViewSet(viewsets.ModelViewSet):
         serializer = AwardRecordDetailSerializer(records, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'], url_path='by_competition/grouped')
+    def by_competition_grouped(self, request):
+        """
+        按年份分页、按年份和奖项分组的比赛获奖记录（流式 JSON）
+        page 为年份页码，page_size 为每页年份数，year 只返回指定年份
+        """
+        competition_id = request.query_params.get('competition')
+        try:
+            competition = Competition.objects.only('id', 'award_display_order').get(id=competition_id)
+        except (Competition.DoesNotExist, ValidationError, ValueError):
+            return Response({'error': '比赛不存在'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            year = int(request.query_params['year']) if request.query_params.get('year') else None
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = int(request.query_params.get('page_size', DEFAULT_YEARS_PER_PAGE))
+        except ValueError:
+            return Response(
+                {'error': 'year, page and page_size must be valid integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        page_size = min(max(page_size, 1), MAX_YEARS_PER_PAGE)
+
+        years = competition_record_years(competition, year)
+        page_count = (len(years) + page_size - 1) // page_size
+        page_years = years[(page - 1) * page_size:page * page_size]
+        next_url, previous_url = page_links(request, page, page_count)
+        meta = {'count': len(years), 'next': next_url, 'previous': previous_url, 'years': page_years}
+        records = grouped_records(competition, page_years)
+        return StreamingHttpResponse(
+            stream_grouped_records(meta, records),
+            content_type='application/json; charset=utf-8',
+        )
+
+    @action(detail=False, methods=['get'])
+    def leaderboard(self, request):
+        """
+        社团获奖排行榜（按奖项档次排名，分页）
+        competition 为空时是全部比赛的排名，year 需与 competition 一起使用
+        """
+        competition_id = request.query_params.get('competition')
+        year = request.query_params.get('year')
+        competition = None
+        if competition_id:
+            try:
+                competition = Competition.objects.only('id', 'award_display_order').get(id=competition_id)
+            except (Competition.DoesNotExist, ValidationError):
+                return Response({'error': '比赛不存在'}, status=status.HTTP_404_NOT_FOUND)
+        if year:
+            if competition is None:
+                return Response(
+                    {'error': 'year parameter requires competition'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                year = int(year)
+            except ValueError:
+                return Response(
+                    {'error': 'year parameter must be a valid integer'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        queryset = leaderboard_queryset(competition.id if competition else None, year)
+        page = self.paginate_queryset(queryset)
+        response = self.get_paginated_response(AwardLeaderboardEntrySerializer(page, many=True).data)
+        response.data['tiers'] = tier_labels(competition)
+        return response
+
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def update_group_award_counts(self, request):
         """
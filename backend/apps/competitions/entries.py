@@ -1,129 +1,275 @@
+"""
+比赛作品条目
+
+条目存放在预计算表 competition_entry（CompetitionEntry）中：每条获奖记录一行，
+没有获奖记录的比赛视频一行。获奖记录/视频写入时由信号调用 refresh_* 增量维护，
+每次刷新是 DELETE + INSERT ... SELECT 两条语句；rebuild_competition_entries
+用同样的 SQL 整体重建。
+
+列表接口按 (competition, sort_year, sort_kind, sort_created) 复合索引做一次范围扫描，
+分页结果通过 select_related 在同一条查询中带出获奖记录和视频。分页使用排序键游标
+（keyset），不再 OFFSET；总数只在第一页计算并随游标带到后续页。page 参数只接受 1，
+其他页码返回 400，客户端需沿 next 链接翻页。
+
+筛选项（年份/奖项计数）按比赛缓存在 Redis 中，条目刷新或比赛年份/奖项变化时
+只失效对应比赛的缓存。
+"""
+
+import base64
+import json
 from collections import defaultdict
+from datetime import datetime
 
-from django.db.models import Case, CharField, Count, F, IntegerField, Value, When
-from django.db.models.functions import Cast, Coalesce, Concat
-from rest_framework.pagination import PageNumberPagination
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 from apps.awards.models import Award, AwardRecord
 from apps.videos.models import Video
 from apps.videos.serializers import VideoListSerializer
 
+from .models import CompetitionEntry, CompetitionYear
+
 
-ENTRY_VALUE_FIELDS = (
-    'entry_id',
-    'kind',
-    'entry_year',
-    'sort_year',
-    'sort_kind',
-    'sort_created',
-    'record_key',
-    'video_key',
-    'award_key',
+ENTRY_COLUMNS = (
+    'entry_id, competition_id, kind, year, sort_year, sort_kind, sort_created, '
+    'award_record_id, award_id, video_id'
 )
 
+RECORD_ENTRY_SQL = f"""
+INSERT INTO {CompetitionEntry._meta.db_table} ({ENTRY_COLUMNS})
+SELECT
+    'award-record:' || r.id::text,
+    a.competition_id,
+    CASE WHEN r.video_id IS NULL THEN '{CompetitionEntry.KIND_AWARD_WITHOUT_VIDEO}'
+         ELSE '{CompetitionEntry.KIND_AWARDED_VIDEO}' END,
+    cy.year,
+    cy.year,
+    CASE WHEN r.video_id IS NULL THEN 1 ELSE 0 END,
+    r.created_at,
+    r.id,
+    r.award_id,
+    r.video_id
+FROM {AwardRecord._meta.db_table} r
+JOIN {Award._meta.db_table} a ON a.id = r.award_id
+JOIN {CompetitionYear._meta.db_table} cy ON cy.id = r.competition_year_id
+WHERE {{where}}
+RETURNING video_id, competition_id
+"""
+
+VIDEO_ENTRY_SQL = f"""
+INSERT INTO {CompetitionEntry._meta.db_table} ({ENTRY_COLUMNS})
+SELECT
+    'video:' || v.id::text,
+    v.competition_id,
+    '{CompetitionEntry.KIND_UNAWARDED_VIDEO}',
+    v.year,
+    COALESCE(v.year, 0),
+    2,
+    v.created_at,
+    NULL,
+    NULL,
+    v.id
+FROM {Video._meta.db_table} v
+WHERE v.competition_id IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM {AwardRecord._meta.db_table} r WHERE r.video_id = v.id)
+  AND {{where}}
+RETURNING competition_id
+"""
+
+ENTRY_ORDERING = ('-sort_year', 'sort_kind', '-sort_created', '-entry_id')
+AWARD_ENTRY_ORDERING = ('-sort_year', '-sort_created', '-entry_id')
+
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 200
+
+FILTER_OPTIONS_KEY = 'competitions:filter_options:{}'
+FILTER_OPTIONS_TIMEOUT = 60 * 60
+
+
+class InvalidEntryCursor(ValueError):
+    pass
+
+
+def _ids(values):
+    return sorted({str(value) for value in values if value})
+
+
+def invalidate_filter_options(competition_ids):
+    """事务提交后清除这些比赛的筛选项缓存，避免提交前被并发请求重新写入旧数据"""
+    keys = [FILTER_OPTIONS_KEY.format(competition_id) for competition_id in _ids(competition_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def refresh_video_entries(video_ids):
+    """重建一批视频的"未获奖视频"条目"""
+    video_ids = _ids(video_ids)
+    if not video_ids:
+        return
+    table = CompetitionEntry._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE award_record_id IS NULL AND video_id = ANY(%s::uuid[]) '
+            f'RETURNING competition_id',
+            [video_ids],
+        )
+        competition_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute(VIDEO_ENTRY_SQL.format(where='v.id = ANY(%s::uuid[])'), [video_ids])
+        competition_ids.extend(row[0] for row in cursor.fetchall())
+    invalidate_filter_options(competition_ids)
+
+
+def refresh_record_entries(record_ids):
+    """重建一批获奖记录的条目，并刷新记录新旧视频的未获奖条目"""
+    record_ids = _ids(record_ids)
+    if not record_ids:
+        return
+    table = CompetitionEntry._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE award_record_id = ANY(%s::uuid[]) RETURNING video_id, competition_id',
+            [record_ids],
+        )
+        rows = cursor.fetchall()
+        cursor.execute(RECORD_ENTRY_SQL.format(where='r.id = ANY(%s::uuid[])'), [record_ids])
+        rows.extend(cursor.fetchall())
+    invalidate_filter_options(competition_id for _, competition_id in rows)
+    refresh_video_entries(video_id for video_id, _ in rows)
+
 
-class CompetitionEntriesPagination(PageNumberPagination):
-    page_size = 24
-    page_size_query_param = 'page_size'
-    max_page_size = 200
+def rebuild_competition_entries(competition_id=None):
+    """整体重建条目表（或单个比赛的条目），返回写入的条目数"""
+    table = CompetitionEntry._meta.db_table
+    with connection.cursor() as cursor:
+        if competition_id is None:
+            cursor.execute(f'DELETE FROM {table}')
+            cursor.execute(RECORD_ENTRY_SQL.format(where='TRUE'))
+            created = cursor.rowcount
+            cursor.execute(VIDEO_ENTRY_SQL.format(where='TRUE'))
+        else:
+            params = [str(competition_id)]
+            cursor.execute(f'DELETE FROM {table} WHERE competition_id = %s', params)
+            cursor.execute(RECORD_ENTRY_SQL.format(where='a.competition_id = %s'), params)
+            created = cursor.rowcount
+            cursor.execute(VIDEO_ENTRY_SQL.format(where='v.competition_id = %s'), params)
+        created += cursor.rowcount
+    if competition_id is None:
+        transaction.on_commit(lambda: cache.delete_pattern(FILTER_OPTIONS_KEY.format('*')))
+    else:
+        invalidate_filter_options([competition_id])
+    return created
 
 
 def build_competition_entries(competition, *, year=None, award=None):
-    award_records = AwardRecord.objects.filter(award__competition=competition)
+    entries = CompetitionEntry.objects.filter(competition=competition)
     if year is not None:
-        award_records = award_records.filter(competition_year__year=year)
-    if award is not None:
-        award_records = award_records.filter(award=award)
-
-    award_rows = award_records.annotate(
-        entry_id=Concat(
-            Value('award-record:'),
-            Cast('id', output_field=CharField()),
-            output_field=CharField(),
-        ),
-        kind=Case(
-            When(video_id__isnull=True, then=Value('award_without_video')),
-            default=Value('awarded_video'),
-            output_field=CharField(),
-        ),
-        entry_year=F('competition_year__year'),
-        sort_year=F('competition_year__year'),
-        sort_created=F('created_at'),
-        sort_kind=Case(
-            When(video_id__isnull=True, then=Value(1)),
-            default=Value(0),
-            output_field=IntegerField(),
-        ),
-        record_key=Cast('id', output_field=CharField()),
-        video_key=Cast('video_id', output_field=CharField()),
-        award_key=Cast('award_id', output_field=CharField()),
-    ).values(*ENTRY_VALUE_FIELDS)
+        entries = entries.filter(sort_year=year)
+    entries = entries.select_related(
+        'award',
+        'award_record__group',
+        'award_record__competition_year',
+        'video__group',
+        'video__competition',
+        'video__uploaded_by',
+    ).prefetch_related('video__tags')
 
     if award is not None:
-        return award_rows.order_by('-sort_year', '-sort_created', '-entry_id')
+        return entries.filter(award=award).order_by(*AWARD_ENTRY_ORDERING)
+    return entries.order_by(*ENTRY_ORDERING)
+
+
+def encode_entry_cursor(entry, count):
+    raw = json.dumps([entry.sort_year, entry.sort_kind, entry.sort_created.isoformat(), entry.entry_id, count])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_entry_cursor(cursor):
+    """返回 (sort_year, sort_kind, sort_created, entry_id, count)"""
+    try:
+        sort_year, sort_kind, sort_created, entry_id, count = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(sort_year), int(sort_kind), datetime.fromisoformat(sort_created), str(entry_id), int(count)
+    except (ValueError, TypeError, UnicodeError) as exc:
+        raise InvalidEntryCursor(cursor) from exc
+
 
-    unawarded_videos = Video.objects.filter(
-        competition=competition,
-        award_records__isnull=True,
+def entries_after(entries, cursor, *, by_award=False):
+    """按排序键取游标之后的条目；排序方向混合，展开成 OR 条件"""
+    sort_year, sort_kind, sort_created, entry_id, _ = cursor
+    if by_award:
+        return entries.filter(
+            Q(sort_year__lt=sort_year)
+            | Q(sort_year=sort_year, sort_created__lt=sort_created)
+            | Q(sort_year=sort_year, sort_created=sort_created, entry_id__lt=entry_id)
+        )
+    return entries.filter(
+        Q(sort_year__lt=sort_year)
+        | Q(sort_year=sort_year, sort_kind__gt=sort_kind)
+        | Q(sort_year=sort_year, sort_kind=sort_kind, sort_created__lt=sort_created)
+        | Q(sort_year=sort_year, sort_kind=sort_kind, sort_created=sort_created, entry_id__lt=entry_id)
     )
+
+
+def _snapshot_count(options, *, year=None, award=None):
+    """从筛选项快照中取条目总数，年份和奖项同时筛选时快照里没有，返回 None"""
+    if year is not None and award is not None:
+        return None
     if year is not None:
-        unawarded_videos = unawarded_videos.filter(year=year)
-
-    video_rows = unawarded_videos.annotate(
-        entry_id=Concat(
-            Value('video:'),
-            Cast('id', output_field=CharField()),
-            output_field=CharField(),
-        ),
-        kind=Value('unawarded_video', output_field=CharField()),
-        entry_year=F('year'),
-        sort_year=Coalesce('year', Value(0), output_field=IntegerField()),
-        sort_created=F('created_at'),
-        sort_kind=Value(2, output_field=IntegerField()),
-        record_key=Value(None, output_field=CharField()),
-        video_key=Cast('id', output_field=CharField()),
-        award_key=Value(None, output_field=CharField()),
-    ).values(*ENTRY_VALUE_FIELDS)
-
-    return award_rows.union(video_rows, all=True).order_by(
-        '-sort_year',
-        'sort_kind',
-        '-sort_created',
-        '-entry_id',
-    )
+        return next((item['count'] for item in options['years'] if item['value'] == year), 0)
+    if award is not None:
+        return next((item['count'] for item in options['awards'] if item['id'] == str(award.id)), 0)
+    return options['total_count']
 
 
-def hydrate_competition_entries(rows):
-    rows = list(rows)
-    record_ids = [row['record_key'] for row in rows if row['record_key']]
-    video_ids = [row['video_key'] for row in rows if row['video_key']]
+def paginate_competition_entries(request, competition, *, year=None, award=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    游标分页，返回与 PageNumberPagination 相同结构的 {count, next, previous, results}
 
-    records = {
-        str(record.id): record
-        for record in AwardRecord.objects.filter(id__in=record_ids).select_related(
-            'award',
-            'group',
-            'competition_year',
-        )
+    不支持按页码跳页：next 链接带 cursor 参数，previous 始终为 None。
+    """
+    entries = build_competition_entries(competition, year=year, award=award)
+    raw_cursor = request.query_params.get('cursor')
+    if raw_cursor:
+        cursor = decode_entry_cursor(raw_cursor)
+        count = cursor[-1]
+        entries = entries_after(entries, cursor, by_award=award is not None)
+    else:
+        count = _snapshot_count(get_competition_filter_options(competition), year=year, award=award)
+        if count is None:
+            count = entries.count()
+
+    page = list(entries[:page_size + 1])
+    next_url = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        url = remove_query_param(request.build_absolute_uri(), 'page')
+        next_url = replace_query_param(url, 'cursor', encode_entry_cursor(page[-1], count))
+    return {
+        'count': count,
+        'next': next_url,
+        'previous': None,
+        'results': hydrate_competition_entries(page),
     }
-    videos = {
-        str(video.id): video
-        for video in Video.objects.filter(id__in=video_ids).select_related(
-            'group',
-            'competition',
-            'uploaded_by',
-        ).prefetch_related('tags')
+
+
+def hydrate_competition_entries(entries):
+    entries = list(entries)
+    videos = [entry.video for entry in entries if entry.video_id]
+    video_data = {
+        item['id']: item
+        for item in VideoListSerializer(videos, many=True).data
     }
 
     results = []
-    for row in rows:
-        record = records.get(row['record_key'])
-        video = videos.get(row['video_key'])
-        award = record.award if record else None
+    for entry in entries:
+        record = entry.award_record
+        award = entry.award
         results.append({
-            'entry_id': row['entry_id'],
-            'kind': row['kind'],
-            'year': row['entry_year'],
+            'entry_id': entry.entry_id,
+            'kind': entry.kind,
+            'year': entry.year,
             'award': (
                 {'id': str(award.id), 'name': award.name}
                 if award else None
@@ -148,31 +294,31 @@ def hydrate_competition_entries(rows):
                 }
                 if record else None
             ),
-            'video': VideoListSerializer(video).data if video else None,
+            'video': video_data.get(str(entry.video_id)) if entry.video_id else None,
         })
     return results
 
 
-def get_competition_filter_options(competition):
+def _build_filter_options(competition):
     year_counts = defaultdict(int)
-    award_records = AwardRecord.objects.filter(award__competition=competition)
-    unawarded_videos = Video.objects.filter(
-        competition=competition,
-        award_records__isnull=True,
+    award_counts = defaultdict(int)
+    total_count = 0
+    rows = (
+        CompetitionEntry.objects
+        .filter(competition=competition)
+        .values_list('year', 'award_id')
+        .annotate(count=Count('entry_id'))
+        .order_by()
     )
-
-    for row in award_records.values('competition_year__year').annotate(count=Count('id')):
-        year_counts[row['competition_year__year']] += row['count']
-    for row in unawarded_videos.values('year').annotate(count=Count('id')):
-        if row['year'] is not None:
-            year_counts[row['year']] += row['count']
+    for year, award_id, count in rows:
+        total_count += count
+        if year is not None:
+            year_counts[year] += count
+        if award_id is not None:
+            award_counts[award_id] += count
     for configured_year in competition.years.values_list('year', flat=True):
         year_counts.setdefault(configured_year, 0)
 
-    award_counts = {
-        row['award_id']: row['count']
-        for row in award_records.values('award_id').annotate(count=Count('id'))
-    }
     awards = [
         {
             'id': str(award.id),
@@ -188,5 +334,15 @@ def get_competition_filter_options(competition):
             for year in sorted(year_counts, reverse=True)
         ],
         'awards': awards,
-        'total_count': award_records.count() + unawarded_videos.count(),
+        'total_count': total_count,
     }
+
+
+def get_competition_filter_options(competition):
+    """比赛的年份/奖项筛选项及计数，按比赛缓存"""
+    key = FILTER_OPTIONS_KEY.format(competition.pk)
+    options = cache.get(key)
+    if options is None:
+        options = _build_filter_options(competition)
+        cache.set(key, options, FILTER_OPTIONS_TIMEOUT)
+    return options
@@ -0,0 +1,156 @@
+"""
+赛事日历索引
+
+所有赛事的精简表示（不含关联视频）按开始日期排好序，连同按月分桶的区间索引
+一起缓存在 Redis 中：跨多个月的赛事会出现在它覆盖的每个月的桶里，按月/按日期
+范围查询只需取出相关月份的桶；进行中、即将开始、最近赛事也直接在缓存的列表上
+计算，不再各自查询数据库。
+
+关联视频只在 ?expand=videos 时用一条查询批量加载。赛事或比赛变化时在事务提交后
+清除整个索引，下次请求时重建（一条查询）。
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import Event
+from .serializers import EventCalendarSerializer, EventVideoSerializer
+
+CALENDAR_KEY = 'competitions:event_calendar'
+CALENDAR_TIMEOUT = 60 * 60
+ACTIVE_LOOKBACK_DAYS = 30
+
+
+def month_key(value):
+    return f'{value.year:04d}-{value.month:02d}'
+
+
+def _iter_months(start, end):
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield f'{year:04d}-{month:02d}'
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def build_calendar_index():
+    """一条查询构建日历索引：events 按开始日期排序，months 为 {年-月: [events 下标]}"""
+    queryset = (
+        Event.objects
+        .select_related('competition')
+        .order_by(F('start_date').asc(nulls_last=True), F('end_date').asc(nulls_last=True), 'id')
+    )
+    events = [dict(item) for item in EventCalendarSerializer(queryset, many=True).data]
+
+    months = defaultdict(list)
+    for position, event in enumerate(events):
+        if not event['start_date'] or not event['end_date']:
+            continue
+        start = date.fromisoformat(event['start_date'])
+        end = date.fromisoformat(event['end_date'])
+        for key in _iter_months(start, end):
+            months[key].append(position)
+
+    return {
+        'events': events,
+        'months': dict(months),
+        'month_keys': sorted(months),
+    }
+
+
+def get_calendar_index():
+    index = cache.get(CALENDAR_KEY)
+    if index is None:
+        index = build_calendar_index()
+        cache.set(CALENDAR_KEY, index, CALENDAR_TIMEOUT)
+    return index
+
+
+def invalidate_calendar():
+    """事务提交后清除日历索引，避免提交前被并发请求重新写入旧数据"""
+    transaction.on_commit(lambda: cache.delete(CALENDAR_KEY))
+
+
+def _bucket(index, key):
+    return [index['events'][position] for position in index['months'].get(key, [])]
+
+
+def events_in_month(year, month):
+    return _bucket(get_calendar_index(), f'{year:04d}-{month:02d}')
+
+
+def events_between(start, end):
+    """与 [start, end] 有交集的赛事（start_date <= end 且 end_date >= start）"""
+    index = get_calendar_index()
+    keys = index['month_keys']
+    selected = keys[bisect_left(keys, month_key(start)):bisect_right(keys, month_key(end))]
+    positions = sorted({position for key in selected for position in index['months'][key]})
+    start, end = start.isoformat(), end.isoformat()
+    events = (index['events'][position] for position in positions)
+    return [event for event in events if event['start_date'] <= end and event['end_date'] >= start]
+
+
+def _schedule_order(event):
+    # 与 order_by('competition__name', 'region', 'stage', 'start_date') 一致，空日期排在最后
+    return (
+        event['competition_name'], event['region'], event['stage'],
+        event['start_date'] is None, event['start_date'] or '',
+    )
+
+
+def active_events(today):
+    """结束日期在最近 30 天之后的赛事（进行中或即将开始）"""
+    threshold = (today - timedelta(days=ACTIVE_LOOKBACK_DAYS)).isoformat()
+    events = get_calendar_index()['events']
+    return sorted((e for e in events if e['end_date'] and e['end_date'] >= threshold), key=_schedule_order)
+
+
+def upcoming_events(today):
+    today = today.isoformat()
+    events = get_calendar_index()['events']
+    return sorted((e for e in events if e['start_date'] and e['start_date'] >= today), key=_schedule_order)
+
+
+def nearest_event(today):
+    """优先返回进行中且最早结束的赛事，其次最早开始的未来赛事，最后最近结束的赛事"""
+    index = get_calendar_index()
+    events = index['events']
+    ongoing = [
+        event for event in _bucket(index, month_key(today))
+        if event['start_date'] <= today.isoformat() <= event['end_date']
+    ]
+    if ongoing:
+        return min(ongoing, key=lambda event: (event['end_date'], event['start_date']))
+
+    today = today.isoformat()
+    # events 已按 (start_date, end_date) 升序排列
+    for event in events:
+        if event['start_date'] and event['start_date'] >= today:
+            return event
+
+    past = [event for event in events if event['end_date'] and event['end_date'] < today]
+    if past:
+        return max(past, key=lambda event: (event['end_date'], event['start_date'] is None, event['start_date'] or ''))
+    return None
+
+
+def attach_videos(events):
+    """一条查询批量加载关联视频，返回带 videos 字段的赛事副本"""
+    if not events:
+        return []
+    event_ids = [event['id'] for event in events]
+    links = list(
+        Event.videos.through.objects
+        .filter(event_id__in=event_ids)
+        .select_related('video__group')
+        .order_by('-video__created_at')
+    )
+    serialized = EventVideoSerializer([link.video for link in links], many=True).data
+    grouped = defaultdict(list)
+    for link, video in zip(links, serialized):
+        grouped[str(link.event_id)].append(video)
+    return [dict(event, videos=grouped[str(event['id'])]) for event in events]
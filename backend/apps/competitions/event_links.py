@@ -0,0 +1,104 @@
+"""
+批量关联/取消关联赛事与视频
+
+所有 (赛事, 视频) 组合用一条 SQL 校验：unnest 展开请求的组合，左连接赛事、视频和
+中间表，一次取回赛事是否存在、开始日期、视频年份和所属社团以及是否已关联。
+新关联用 bulk_create(ignore_conflicts=True) 写入，取消关联是一条 DELETE；
+不合法的组合逐条返回错误，其余组合照常处理。
+"""
+
+from functools import reduce
+from operator import or_
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from apps.videos.models import Video
+
+from .models import Event
+
+EventVideo = Event.videos.through
+
+PAIR_STATE_SQL = f"""
+SELECT p.event_id, p.video_id, e.id IS NOT NULL, e.start_date, v.id IS NOT NULL, v.year, v.group_id,
+       EXISTS (SELECT 1 FROM {EventVideo._meta.db_table} l
+               WHERE l.event_id = p.event_id AND l.video_id = p.video_id)
+FROM unnest(%s::uuid[], %s::uuid[]) AS p(event_id, video_id)
+LEFT JOIN {Event._meta.db_table} e ON e.id = p.event_id
+LEFT JOIN {Video._meta.db_table} v ON v.id = p.video_id
+"""
+
+
+def _pair_states(pairs):
+    if not pairs:
+        return {}
+    event_ids, video_ids = zip(*pairs)
+    with connection.cursor() as cursor:
+        cursor.execute(PAIR_STATE_SQL, [list(event_ids), list(video_ids)])
+        rows = cursor.fetchall()
+    return {(row[0], row[1]): row[2:] for row in rows}
+
+
+def _pair_error(perms, state, linking):
+    event_exists, start_date, video_exists, video_year, group_id, _ = state
+    if not event_exists:
+        return '赛事不存在'
+    if not video_exists:
+        return '视频不存在'
+    if not perms.can_manage_data and not perms.can_manage_group(group_id):
+        return '只能管理自己管理社团的视频'
+    if linking and start_date and video_year and video_year != start_date.year:
+        return f'视频年份{video_year}与赛事年份{start_date.year}不一致'
+    return None
+
+
+def _unique(pairs):
+    return list(dict.fromkeys((pair['event'], pair['video']) for pair in pairs))
+
+
+@transaction.atomic
+def apply_event_video_links(perms, link, unlink):
+    """
+    批量关联 link、取消关联 unlink 中的 (赛事, 视频) 组合
+
+    返回 {linked, unlinked, unchanged, errors}，errors 中每项为 {event, video, error}
+    """
+    link, unlink = _unique(link), _unique(unlink)
+    conflicting = set(link) & set(unlink)
+    errors = [
+        {'event': event_id, 'video': video_id, 'error': '不能同时关联和取消关联'}
+        for event_id, video_id in link if (event_id, video_id) in conflicting
+    ]
+    link = [pair for pair in link if pair not in conflicting]
+    unlink = [pair for pair in unlink if pair not in conflicting]
+    states = _pair_states(link + unlink)
+
+    to_link, to_unlink, unchanged = [], [], 0
+    for pairs, linking in ((link, True), (unlink, False)):
+        for pair in pairs:
+            error = _pair_error(perms, states[pair], linking)
+            if error:
+                errors.append({'event': pair[0], 'video': pair[1], 'error': error})
+            elif states[pair][-1] == linking:
+                unchanged += 1
+            elif linking:
+                to_link.append(pair)
+            else:
+                to_unlink.append(pair)
+
+    if to_link:
+        EventVideo.objects.bulk_create(
+            [EventVideo(event_id=event_id, video_id=video_id) for event_id, video_id in to_link],
+            ignore_conflicts=True,
+        )
+    unlinked = 0
+    if to_unlink:
+        condition = reduce(or_, (Q(event_id=event_id, video_id=video_id) for event_id, video_id in to_unlink))
+        unlinked, _ = EventVideo.objects.filter(condition).delete()
+
+    return {
+        'linked': len(to_link),
+        'unlinked': unlinked,
+        'unchanged': unchanged,
+        'errors': errors,
+    }
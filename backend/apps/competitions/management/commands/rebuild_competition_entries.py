@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.competitions.entries import rebuild_competition_entries
+from apps.competitions.models import Competition
+
+
+class Command(BaseCommand):
+    help = '重建比赛作品条目表（批量导入等绕过信号的写入后使用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--competition-id',
+            type=str,
+            help='只重建指定比赛的条目（可选）',
+        )
+
+    def handle(self, *args, **options):
+        competition_id = options.get('competition_id')
+        if competition_id and not Competition.objects.filter(id=competition_id).exists():
+            self.stdout.write(self.style.ERROR(f'比赛ID {competition_id} 不存在'))
+            return
+
+        with transaction.atomic():
+            created = rebuild_competition_entries(competition_id)
+
+        scope = f'比赛 {competition_id}' if competition_id else '全部比赛'
+        self.stdout.write(self.style.SUCCESS(f'已重建{scope}的作品条目，共 {created} 条'))
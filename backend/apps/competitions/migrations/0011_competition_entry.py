@@ -0,0 +1,80 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# 由现有获奖记录和未获奖比赛视频填充条目表（与 entries.rebuild_competition_entries 相同）
+BACKFILL_SQL = """
+INSERT INTO competition_entry (
+    entry_id, competition_id, kind, year, sort_year, sort_kind, sort_created,
+    award_record_id, award_id, video_id
+)
+SELECT
+    'award-record:' || r.id::text,
+    a.competition_id,
+    CASE WHEN r.video_id IS NULL THEN 'award_without_video' ELSE 'awarded_video' END,
+    cy.year,
+    cy.year,
+    CASE WHEN r.video_id IS NULL THEN 1 ELSE 0 END,
+    r.created_at,
+    r.id,
+    r.award_id,
+    r.video_id
+FROM awards_awardrecord r
+JOIN awards_award a ON a.id = r.award_id
+JOIN competitions_competitionyear cy ON cy.id = r.competition_year_id;
+
+INSERT INTO competition_entry (
+    entry_id, competition_id, kind, year, sort_year, sort_kind, sort_created,
+    award_record_id, award_id, video_id
+)
+SELECT
+    'video:' || v.id::text,
+    v.competition_id,
+    'unawarded_video',
+    v.year,
+    COALESCE(v.year, 0),
+    2,
+    v.created_at,
+    NULL,
+    NULL,
+    v.id
+FROM videos_video v
+WHERE v.competition_id IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM awards_awardrecord r WHERE r.video_id = v.id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0005_video_videos_vide_group_i_0f5a19_idx_and_more'),
+        ('awards', '0007_award_name_trgm_index'),
+        ('competitions', '0010_competition_name_trgm_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompetitionEntry',
+            fields=[
+                ('entry_id', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='条目ID')),
+                ('kind', models.CharField(choices=[('awarded_video', '获奖视频'), ('award_without_video', '获奖记录（无视频）'), ('unawarded_video', '未获奖视频')], max_length=32, verbose_name='条目类型')),
+                ('year', models.IntegerField(blank=True, null=True, verbose_name='年份')),
+                ('sort_year', models.IntegerField(verbose_name='排序年份')),
+                ('sort_kind', models.SmallIntegerField(verbose_name='排序类型')),
+                ('sort_created', models.DateTimeField(verbose_name='排序时间')),
+                ('award', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='awards.award', verbose_name='奖项')),
+                ('award_record', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='awards.awardrecord', verbose_name='获奖记录')),
+                ('competition', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='competitions.competition', verbose_name='所属比赛')),
+                ('video', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='videos.video', verbose_name='视频')),
+            ],
+            options={
+                'verbose_name': '比赛作品条目',
+                'verbose_name_plural': '比赛作品条目',
+                'db_table': 'competition_entry',
+                'indexes': [models.Index(fields=['competition', '-sort_year', 'sort_kind', '-sort_created', '-entry_id'], name='competition_entry_order_idx'), models.Index(fields=['award', '-sort_year', '-sort_created', '-entry_id'], name='competition_entry_award_idx')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
 import uuid
 
 
@@ -103,4 +105,156 @@ class Event(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.title} - {self.start_date} to {self.end_date}"
\ No newline at end of file
+        return f"{self.title} - {self.start_date} to {self.end_date}"
+
+
+class CompetitionEntry(models.Model):
+    """
+    比赛作品条目（预计算表）
+
+    每条获奖记录一行，没有获奖记录的比赛视频一行，排序键预先算好，
+    比赛作品列表直接按复合索引做范围扫描。由下方的信号增量维护，
+    批量导入等绕过信号的写入后可运行 rebuild_competition_entries 重建。
+    """
+    KIND_AWARDED_VIDEO = 'awarded_video'
+    KIND_AWARD_WITHOUT_VIDEO = 'award_without_video'
+    KIND_UNAWARDED_VIDEO = 'unawarded_video'
+    KIND_CHOICES = [
+        (KIND_AWARDED_VIDEO, '获奖视频'),
+        (KIND_AWARD_WITHOUT_VIDEO, '获奖记录（无视频）'),
+        (KIND_UNAWARDED_VIDEO, '未获奖视频'),
+    ]
+
+    entry_id = models.CharField(max_length=64, primary_key=True, verbose_name='条目ID')
+    # competition/award 的查询都由下面的复合索引覆盖，不再单独建索引
+    competition = models.ForeignKey(Competition, on_delete=models.CASCADE, db_index=False,
+                                    related_name='entries', verbose_name='所属比赛')
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES, verbose_name='条目类型')
+    year = models.IntegerField(null=True, blank=True, verbose_name='年份')
+    sort_year = models.IntegerField(verbose_name='排序年份')
+    sort_kind = models.SmallIntegerField(verbose_name='排序类型')
+    sort_created = models.DateTimeField(verbose_name='排序时间')
+    award_record = models.ForeignKey('awards.AwardRecord', on_delete=models.CASCADE, null=True, blank=True,
+                                     related_name='+', verbose_name='获奖记录')
+    award = models.ForeignKey('awards.Award', on_delete=models.CASCADE, null=True, blank=True, db_index=False,
+                              related_name='+', verbose_name='奖项')
+    video = models.ForeignKey('videos.Video', on_delete=models.CASCADE, null=True, blank=True,
+                              related_name='+', verbose_name='视频')
+
+    class Meta:
+        db_table = 'competition_entry'
+        verbose_name = '比赛作品条目'
+        verbose_name_plural = '比赛作品条目'
+        indexes = [
+            models.Index(
+                fields=['competition', '-sort_year', 'sort_kind', '-sort_created', '-entry_id'],
+                name='competition_entry_order_idx',
+            ),
+            models.Index(
+                fields=['award', '-sort_year', '-sort_created', '-entry_id'],
+                name='competition_entry_award_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.entry_id
+
+
+@receiver(post_save, sender='awards.AwardRecord')
+def award_record_entry_saved(sender, instance, **kwargs):
+    """获奖记录变化时刷新对应条目（视频变化时同时刷新新旧视频的未获奖条目）"""
+    from .entries import refresh_record_entries
+    refresh_record_entries([instance.pk])
+
+
+@receiver(pre_delete, sender='awards.AwardRecord')
+def award_record_entry_deleting(sender, instance, **kwargs):
+    # 条目随获奖记录级联删除，不经过 refresh_*，记下所属比赛稍后作废筛选项
+    instance._entry_competition_ids = list(
+        CompetitionEntry.objects.filter(award_record=instance).values_list('competition_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender='awards.AwardRecord')
+def award_record_entry_deleted(sender, instance, **kwargs):
+    """获奖记录删除后，其视频可能变成未获奖视频"""
+    from .entries import invalidate_filter_options, refresh_video_entries
+    invalidate_filter_options(getattr(instance, '_entry_competition_ids', []))
+    refresh_video_entries([instance.video_id])
+
+
+@receiver(post_save, sender='videos.Video')
+def video_entry_saved(sender, instance, **kwargs):
+    from .entries import refresh_video_entries
+    refresh_video_entries([instance.pk])
+
+
+@receiver(pre_delete, sender='videos.Video')
+def video_entry_deleting(sender, instance, **kwargs):
+    # 删除视频时获奖记录的 video 被置空（不触发信号），记下这些记录稍后刷新；
+    # 未获奖视频的条目随视频级联删除，记下所属比赛稍后作废筛选项
+    instance._entry_record_ids = list(instance.award_records.values_list('id', flat=True))
+    instance._entry_competition_ids = list(
+        CompetitionEntry.objects.filter(video=instance, award_record__isnull=True)
+        .values_list('competition_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender='videos.Video')
+def video_entry_deleted(sender, instance, **kwargs):
+    from .entries import invalidate_filter_options, refresh_record_entries
+    invalidate_filter_options(getattr(instance, '_entry_competition_ids', []))
+    refresh_record_entries(getattr(instance, '_entry_record_ids', []))
+
+
+@receiver(post_save, sender='awards.Award')
+def award_entry_saved(sender, instance, created, **kwargs):
+    """奖项改挂到其他比赛时刷新其获奖记录条目"""
+    if created:
+        return
+    stale = CompetitionEntry.objects.filter(award=instance).exclude(competition_id=instance.competition_id)
+    if stale.exists():
+        from .entries import refresh_record_entries
+        refresh_record_entries(instance.records.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=CompetitionYear)
+def competition_year_entry_saved(sender, instance, created, **kwargs):
+    """比赛年份修改年份时刷新其获奖记录条目"""
+    if created:
+        return
+    stale = CompetitionEntry.objects.filter(award_record__competition_year=instance).exclude(sort_year=instance.year)
+    if stale.exists():
+        from .entries import refresh_record_entries
+        refresh_record_entries(instance.award_records.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=CompetitionYear)
+@receiver(post_save, sender=CompetitionYear)
+def competition_year_options_changed(sender, instance, **kwargs):
+    """配置的年份出现在筛选项中"""
+    from .entries import invalidate_filter_options
+    invalidate_filter_options([instance.competition_id])
+
+
+@receiver(post_delete, sender='awards.Award')
+@receiver(post_save, sender='awards.Award')
+def award_options_changed(sender, instance, **kwargs):
+    """奖项名称和列表出现在筛选项中"""
+    from .entries import invalidate_filter_options
+    invalidate_filter_options([instance.competition_id])
+
+
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=Event)
+def event_calendar_changed(sender, instance, **kwargs):
+    from .event_calendar import invalidate_calendar
+    invalidate_calendar()
+
+
+@receiver(post_save, sender=Competition)
+def competition_calendar_changed(sender, instance, created, **kwargs):
+    """比赛名称出现在日历索引的赛事中"""
+    if not created:
+        from .event_calendar import invalidate_calendar
+        invalidate_calendar()
@@ -40,10 +40,21 @@ class EventSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class EventCalendarSerializer(EventSerializer):
+    """日历索引中缓存的赛事精简表示，不含关联视频"""
+
+    class Meta(EventSerializer.Meta):
+        fields = [name for name in EventSerializer.Meta.fields if name != 'videos']
+
+
 class CompetitionSerializer(serializers.ModelSerializer):
     """
     比赛序列化器
+
+    context 中带 expand 时只输出其中列出的嵌套集合（years/events）
     """
+    EXPANDABLE_FIELDS = ('years', 'events')
+
     years = CompetitionYearSerializer(many=True, read_only=True)
     events = EventSerializer(many=True, read_only=True)
     
@@ -55,3 +66,48 @@ class CompetitionSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.context.get('expand')
+        if expand is not None:
+            for name in self.EXPANDABLE_FIELDS:
+                if name not in expand:
+                    self.fields.pop(name)
+
+
+class CompetitionSummarySerializer(CompetitionSerializer):
+    """
+    比赛列表序列化器：只返回年份/赛事/视频/奖项数量，
+    嵌套集合需通过 ?expand=years,events 显式请求
+    """
+    year_count = serializers.IntegerField(read_only=True)
+    event_count = serializers.IntegerField(read_only=True)
+    video_count = serializers.IntegerField(read_only=True)
+    award_count = serializers.IntegerField(read_only=True)
+
+    class Meta(CompetitionSerializer.Meta):
+        fields = CompetitionSerializer.Meta.fields + ['year_count', 'event_count', 'video_count', 'award_count']
+
+
+class EventVideoPairSerializer(serializers.Serializer):
+    event = serializers.UUIDField()
+    video = serializers.UUIDField()
+
+
+class EventVideoLinksSerializer(serializers.Serializer):
+    """
+    批量关联/取消关联赛事与视频：{"link": [{"event", "video"}], "unlink": [...]}
+    """
+    MAX_PAIRS = 1000
+
+    link = EventVideoPairSerializer(many=True, required=False, default=list)
+    unlink = EventVideoPairSerializer(many=True, required=False, default=list)
+
+    def validate(self, attrs):
+        total = len(attrs['link']) + len(attrs['unlink'])
+        if not total:
+            raise serializers.ValidationError({'link': ['需要提供至少一组赛事与视频。']})
+        if total > self.MAX_PAIRS:
+            raise serializers.ValidationError({'link': [f'单次最多处理 {self.MAX_PAIRS} 组关联。']})
+        return attrs
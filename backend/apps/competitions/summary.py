@@ -0,0 +1,62 @@
+"""
+比赛列表的计数与按需展开
+
+计数用相关子查询在同一条 SQL 中算出（避免多个一对多 JOIN 相乘后再 DISTINCT），
+嵌套的年份/赛事只在 ?expand= 请求时通过 prefetch 一次性加载。
+"""
+
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.awards.models import Award
+from apps.videos.models import Video
+
+from .models import CompetitionYear, Event
+from .serializers import CompetitionSerializer
+
+EXPANDABLE = CompetitionSerializer.EXPANDABLE_FIELDS
+
+
+def parse_expand(raw, allowed=EXPANDABLE):
+    """解析 ?expand=years,events，忽略不支持的值"""
+    requested = {part.strip() for part in (raw or '').split(',')}
+    return {name for name in allowed if name in requested}
+
+
+def _count_of(model, field='competition'):
+    counts = (
+        model.objects
+        .filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def with_summary_counts(queryset):
+    return queryset.annotate(
+        year_count=_count_of(CompetitionYear),
+        event_count=_count_of(Event),
+        video_count=_count_of(Video),
+        award_count=_count_of(Award),
+    )
+
+
+def prefetch_expanded(queryset, expand):
+    """为需要展开的嵌套集合添加 prefetch，每个集合固定一到两条查询"""
+    if 'years' in expand:
+        queryset = queryset.prefetch_related(
+            Prefetch('years', queryset=CompetitionYear.objects.order_by('-year')),
+        )
+    if 'events' in expand:
+        queryset = queryset.prefetch_related(
+            Prefetch(
+                'events',
+                queryset=Event.objects.order_by('-start_date').prefetch_related(
+                    Prefetch('videos', queryset=Video.objects.select_related('group')),
+                ),
+            ),
+        )
+    return queryset
@@ -0,0 +1,62 @@
+from datetime import date
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from apps.competitions.event_calendar import CALENDAR_KEY
+from apps.competitions.models import Competition, Event
+from apps.videos.models import Video
+
+
+class EventCalendarTests(APITestCase):
+    url = '/api/competitions/events/'
+
+    def setUp(self):
+        cache.delete(CALENDAR_KEY)
+        self.addCleanup(cache.delete, CALENDAR_KEY)
+        self.competition = Competition.objects.create(name='测试比赛')
+        self.long_event = self.create_event('跨月赛事', date(2025, 1, 20), date(2025, 3, 5))
+        self.short_event = self.create_event('二月赛事', date(2025, 2, 10), date(2025, 2, 12))
+        self.video = Video.objects.create(
+            bv_number='BV1CAL',
+            title='赛事视频',
+            url='https://www.bilibili.com/video/BV1CAL',
+            competition=self.competition,
+        )
+        self.long_event.videos.add(self.video)
+
+    def create_event(self, title, start, end):
+        return Event.objects.create(competition=self.competition, title=title, start_date=start, end_date=end)
+
+    def titles(self, response):
+        return [event['title'] for event in response.data]
+
+    def test_multi_month_event_is_in_every_bucket(self):
+        for month, expected in ((1, ['跨月赛事']), (2, ['跨月赛事', '二月赛事']), (3, ['跨月赛事']), (4, [])):
+            response = self.client.get(f'{self.url}by_month/', {'year': 2025, 'month': month})
+            self.assertEqual(self.titles(response), expected)
+
+        response = self.client.get(
+            f'{self.url}by_date_range/', {'start_date': '2025-02-13', 'end_date': '2025-06-01'}
+        )
+        self.assertEqual(self.titles(response), ['跨月赛事'])
+
+    def test_cached_views_and_lazy_videos(self):
+        params = {'year': 2025, 'month': 2}
+        self.client.get(f'{self.url}by_month/', params)
+        with self.assertNumQueries(0):
+            response = self.client.get(f'{self.url}by_month/', params)
+        self.assertNotIn('videos', response.data[0])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f'{self.url}by_month/', {**params, 'expand': 'videos'})
+        videos = {event['title']: [video['bv_number'] for video in event['videos']] for event in response.data}
+        self.assertEqual(videos, {'跨月赛事': ['BV1CAL'], '二月赛事': []})
+
+    def test_event_change_invalidates_index(self):
+        params = {'year': 2025, 'month': 4}
+        self.assertEqual(self.titles(self.client.get(f'{self.url}by_month/', params)), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.short_event.end_date = date(2025, 4, 2)
+            self.short_event.save()
+        self.assertEqual(self.titles(self.client.get(f'{self.url}by_month/', params)), ['二月赛事'])
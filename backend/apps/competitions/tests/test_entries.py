@@ -133,3 +133,100 @@ class CompetitionEntriesTests(APITestCase):
         awards = {item['id']: item for item in response.data['awards']}
         self.assertEqual(awards[str(self.award_a.id)]['count'], 1)
         self.assertEqual(awards[str(self.award_b.id)]['count'], 1)
+
+    def entry_kinds(self):
+        return {
+            entry_id: kind
+            for entry_id, kind in self.competition.entries.values_list('entry_id', 'kind')
+        }
+
+    def test_entry_table_follows_record_and_video_changes(self):
+        self.assertEqual(self.entry_kinds(), {
+            f'award-record:{self.awarded_record.id}': 'awarded_video',
+            f'award-record:{self.no_video_record.id}': 'award_without_video',
+            f'video:{self.unawarded_video.id}': 'unawarded_video',
+        })
+
+        # 给无视频的获奖记录补上未获奖视频：视频条目被获奖记录条目取代
+        self.no_video_record.video = self.unawarded_video
+        self.no_video_record.save()
+        kinds = self.entry_kinds()
+        self.assertEqual(kinds[f'award-record:{self.no_video_record.id}'], 'awarded_video')
+        self.assertNotIn(f'video:{self.unawarded_video.id}', kinds)
+
+        # 删除视频后获奖记录退回"无视频"
+        self.unawarded_video.delete()
+        self.assertEqual(
+            self.entry_kinds()[f'award-record:{self.no_video_record.id}'],
+            'award_without_video',
+        )
+
+        # 删除获奖记录后视频变成未获奖视频
+        self.awarded_record.delete()
+        self.assertEqual(self.entry_kinds()[f'video:{self.awarded_video.id}'], 'unawarded_video')
+
+    def test_entries_page_query_count_is_constant(self):
+        for index in range(5):
+            self.create_video(f'BV1EXTRA{index}', f'额外视频{index}')
+        self.client.get(self.entries_url)  # 写入筛选项缓存，第一页总数取自缓存
+        # 比赛、条目页（含获奖记录/视频）、视频标签
+        with self.assertNumQueries(3):
+            response = self.client.get(self.entries_url, {'page_size': 50})
+        self.assertEqual(response.data['count'], 8)
+
+    def test_cursor_pages_cover_all_entries(self):
+        for index in range(5):
+            self.create_video(f'BV1EXTRA{index}', f'额外视频{index}')
+        response = self.client.get(self.entries_url, {'page_size': 3})
+        seen = [item['entry_id'] for item in response.data['results']]
+        while response.data['next']:
+            parts = urlsplit(response.data['next'])
+            response = self.client.get(f'{parts.path}?{parts.query}')
+            self.assertEqual(response.data['count'], 8)
+            seen.extend(item['entry_id'] for item in response.data['results'])
+        self.assertEqual(len(seen), 8)
+        self.assertEqual(len(set(seen)), 8)
+
+        response = self.client.get(self.entries_url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+        # 第一页仍可带 page=1，跳页请求明确拒绝
+        self.assertEqual(self.client.get(self.entries_url, {'page': 1}).status_code, 200)
+        response = self.client.get(self.entries_url, {'page': 2})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('page', response.data)
+
+    def test_filter_options_cache_is_invalidated_per_competition(self):
+        options_url = f'/api/competitions/competitions/{self.competition.id}/filter-options/'
+        self.assertEqual(self.client.get(options_url).data['total_count'], 3)
+        with self.assertNumQueries(1):
+            self.client.get(options_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_video('BV1NEW', '新视频')
+        self.assertEqual(self.client.get(options_url).data['total_count'], 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CompetitionYear.objects.create(competition=self.competition, year=2026)
+        years = [item['value'] for item in self.client.get(options_url).data['years']]
+        self.assertEqual(years, [2026, 2025])
+
+    def test_deleting_entries_invalidates_counts(self):
+        options_url = f'/api/competitions/competitions/{self.competition.id}/filter-options/'
+
+        def assert_counts(expected):
+            self.assertEqual(self.client.get(options_url).data['total_count'], expected)
+            response = self.client.get(self.entries_url)
+            self.assertEqual((response.data['count'], len(response.data['results'])), (expected, expected))
+
+        assert_counts(3)
+        # 未获奖视频和没有视频的获奖记录，条目都是级联删除的
+        for instance, expected in [
+            (self.unawarded_video, 2),
+            (self.no_video_record, 1),
+            (self.awarded_record, 1),
+            (self.awarded_video, 0),
+        ]:
+            with self.captureOnCommitCallbacks(execute=True):
+                instance.delete()
+            assert_counts(expected)
@@ -0,0 +1,78 @@
+import uuid
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from apps.competitions.models import Competition, Event
+from apps.groups.models import Group
+from apps.videos.models import Video
+
+User = get_user_model()
+
+
+class EventVideoBulkLinkTests(APITestCase):
+    url = '/api/competitions/events/bulk-links/'
+
+    def setUp(self):
+        competition = Competition.objects.create(name='测试比赛')
+        self.event = Event.objects.create(competition=competition, title='决赛', start_date=date(2025, 8, 1))
+        self.own_group = Group.objects.create(name='社团 A')
+        self.other_group = Group.objects.create(name='社团 B')
+        self.videos = [self.create_video(f'BV1LINK{index}', 2025, self.own_group) for index in range(5)]
+        self.wrong_year = self.create_video('BV1OLD', 2024, self.own_group)
+        self.other = self.create_video('BV1OTHER', 2025, self.other_group)
+        user = User.objects.create_user(username='curator', email='c@example.com', password='pass', role='contributor')
+        user.managed_groups.add(self.own_group)
+        self.client.force_authenticate(user)
+
+    @staticmethod
+    def create_video(bv_number, year, group):
+        return Video.objects.create(
+            bv_number=bv_number, title=bv_number, url=f'https://www.bilibili.com/video/{bv_number}',
+            year=year, group=group,
+        )
+
+    def pairs(self, videos, event=None):
+        return [{'event': str(event or self.event.id), 'video': str(video.id)} for video in videos]
+
+    def test_bulk_link_in_constant_queries(self):
+        self.event.videos.add(self.videos[0])
+        payload = {
+            'link': self.pairs(self.videos + [self.wrong_year, self.other]) + self.pairs(self.videos[:1], uuid.uuid4()),
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['linked'], response.data['unchanged']), (4, 1))
+        self.assertEqual(
+            sorted(error['error'] for error in response.data['errors']),
+            ['只能管理自己管理社团的视频', '视频年份2024与赛事年份2025不一致', '赛事不存在'],
+        )
+        self.assertEqual(self.event.videos.count(), 5)
+        link_queries = [q for q in queries.captured_queries if 'competitions_event_videos' in q['sql']]
+        self.assertEqual(len(link_queries), 2)
+
+    def test_bulk_unlink_and_validation(self):
+        self.event.videos.add(*self.videos)
+        response = self.client.post(self.url, {'unlink': self.pairs(self.videos[:3])}, format='json')
+        self.assertEqual(response.data['unlinked'], 3)
+        self.assertEqual(self.event.videos.count(), 2)
+
+        response = self.client.post(self.url, {'link': [{'event': 'x', 'video': 'y'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_video_without_group(self):
+        ungrouped = self.create_video('BV1NOGROUP', 2025, None)
+        response = self.client.post(self.url, {'link': self.pairs([ungrouped])}, format='json')
+        self.assertEqual(response.data['errors'][0]['error'], '只能管理自己管理社团的视频')
+
+        editor = User.objects.create_user(username='editor', email='e@example.com', password='pass', role='editor')
+        self.client.force_authenticate(editor)
+        response = self.client.post(self.url, {'link': self.pairs([ungrouped])}, format='json')
+        self.assertEqual((response.data['linked'], response.data['errors']), (1, []))
+        self.assertTrue(self.event.videos.filter(id=ungrouped.id).exists())
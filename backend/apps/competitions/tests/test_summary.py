@@ -0,0 +1,71 @@
+from datetime import date
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from apps.awards.models import Award
+from apps.competitions.models import Competition, CompetitionYear, Event
+from apps.groups.models import Group
+from apps.videos.models import Video
+
+
+class CompetitionSummaryListTests(APITestCase):
+    url = '/api/competitions/competitions/'
+
+    def setUp(self):
+        self.group = Group.objects.create(name='测试社团')
+        self.serial = 0
+
+    def create_competition(self, name):
+        competition = Competition.objects.create(name=name)
+        for year in (2024, 2025):
+            CompetitionYear.objects.create(competition=competition, year=year)
+        Award.objects.create(competition=competition, name=f'{name}金奖')
+        event = Event.objects.create(competition=competition, title=f'{name}决赛', start_date=date(2025, 8, 1))
+        for _ in range(2):
+            self.serial += 1
+            video = Video.objects.create(
+                bv_number=f'BV1SUM{self.serial}',
+                title=f'视频{self.serial}',
+                url=f'https://www.bilibili.com/video/BV1SUM{self.serial}',
+                competition=competition,
+                group=self.group,
+            )
+            event.videos.add(video)
+        return competition
+
+    def count_queries(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries), response.data
+
+    def results(self, data):
+        return data['results'] if isinstance(data, dict) else data
+
+    def test_summary_has_counts_without_nested_collections(self):
+        self.create_competition('比赛一')
+        _, data = self.count_queries({})
+        item = self.results(data)[0]
+        self.assertEqual(
+            (item['year_count'], item['event_count'], item['video_count'], item['award_count']),
+            (2, 1, 2, 1),
+        )
+        self.assertNotIn('years', item)
+        self.assertNotIn('events', item)
+
+    def test_expand_query_count_does_not_grow_with_competitions(self):
+        self.create_competition('比赛一')
+        self.create_competition('比赛二')
+        params = {'expand': 'years,events'}
+        small, _ = self.count_queries(params)
+        for index in range(3):
+            self.create_competition(f'比赛{index + 3}')
+        large, data = self.count_queries(params)
+
+        self.assertEqual(small, large)
+        items = self.results(data)
+        self.assertEqual(len(items), 5)
+        self.assertEqual(len(items[0]['years']), 2)
+        self.assertEqual(len(items[0]['events'][0]['videos']), 2)
@@ -4,20 +4,38 @@ from rest_framework.response import Response
 from rest_framework.filters import SearchFilter
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
-from datetime import datetime
+from datetime import date, datetime
 from .models import Competition, CompetitionYear, Event
-from .serializers import CompetitionSerializer, CompetitionYearSerializer, EventSerializer
+from .serializers import (
+    CompetitionSerializer,
+    CompetitionSummarySerializer,
+    CompetitionYearSerializer,
+    EventSerializer,
+    EventVideoLinksSerializer,
+)
+from .event_links import apply_event_video_links
+from .summary import EXPANDABLE, parse_expand, prefetch_expanded, with_summary_counts
+from .event_calendar import (
+    active_events,
+    attach_videos,
+    events_between,
+    events_in_month,
+    nearest_event,
+    upcoming_events,
+)
 from apps.videos.serializers import VideoSerializer
 from apps.videos.models import Video
 from rest_framework.pagination import PageNumberPagination
 from apps.videos.pagination import LargeResultsSetPagination
 from django.utils import timezone
 from apps.awards.models import Award
+from apps.users.permissions import permission_context
 from .entries import (
-    CompetitionEntriesPagination,
-    build_competition_entries,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidEntryCursor,
     get_competition_filter_options,
-    hydrate_competition_entries,
+    paginate_competition_entries,
 )
 
 
@@ -29,6 +47,32 @@ class CompetitionViewSet(viewsets.ModelViewSet):
     serializer_class = CompetitionSerializer
     filter_backends = [SearchFilter]
     search_fields = ['name', 'description']
+
+    def get_expand(self):
+        """列表默认不展开嵌套集合，详情默认全部展开以保持兼容"""
+        raw = self.request.query_params.get('expand')
+        if raw is None and self.action != 'list':
+            return set(EXPANDABLE)
+        return parse_expand(raw)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = with_summary_counts(queryset)
+        if self.action in ('list', 'retrieve'):
+            queryset = prefetch_expanded(queryset, self.get_expand())
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return CompetitionSummarySerializer
+        return CompetitionSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ('list', 'retrieve'):
+            context['expand'] = self.get_expand()
+        return context
     
     def get_permissions(self):
         """
@@ -69,6 +113,12 @@ class CompetitionViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['get'], url_path='entries')
     def entries(self, request, pk=None):
+        # 条目列表改为游标分页，只接受第一页的 page 参数，后续页需使用返回的 next 链接
+        if request.query_params.get('page') not in (None, '', '1'):
+            return Response(
+                {'page': ['条目列表使用游标分页，请使用 next 链接翻页。']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         competition = self.get_object()
         year, error_response = self._parse_year(request.query_params.get('year'))
         if error_response:
@@ -90,16 +140,24 @@ class CompetitionViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-        queryset = build_competition_entries(
-            competition,
-            year=year,
-            award=award,
-        )
-        paginator = CompetitionEntriesPagination()
-        page = paginator.paginate_queryset(queryset, request, view=self)
-        return paginator.get_paginated_response(
-            hydrate_competition_entries(page)
-        )
+        try:
+            page_size = int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE))
+        except (TypeError, ValueError):
+            page_size = DEFAULT_PAGE_SIZE
+        try:
+            data = paginate_competition_entries(
+                request,
+                competition,
+                year=year,
+                award=award,
+                page_size=max(1, min(page_size, MAX_PAGE_SIZE)),
+            )
+        except InvalidEntryCursor:
+            return Response(
+                {'cursor': ['无效的分页游标。']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(data)
 
     @action(detail=True, methods=['get'], url_path='filter-options')
     def filter_options(self, request, pk=None):
@@ -208,6 +266,12 @@ class EventViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.AllowAny]
         return [permission() for permission in permission_classes]
     
+    def expand_calendar(self, events):
+        """日历接口返回缓存的精简赛事，?expand=videos 时再批量加载关联视频"""
+        if 'videos' in parse_expand(self.request.query_params.get('expand'), ('videos',)):
+            return attach_videos(events)
+        return events
+
     @action(detail=False, methods=['get'])
     def by_month(self, request):
         """按月份获取赛事信息"""
@@ -228,23 +292,13 @@ class EventViewSet(viewsets.ModelViewSet):
                 {'error': 'year和month必须是数字'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # 只要赛事的 start_date 或 end_date 在该月，或者跨越该月，都算作当月的赛事
-        # (start_date <= month_end AND end_date >= month_start)
-        from calendar import monthrange
-        import datetime
-        
-        _, last_day = monthrange(year, month)
-        month_start = datetime.date(year, month, 1)
-        month_end = datetime.date(year, month, last_day)
-        
-        events = Event.objects.filter(
-            start_date__lte=month_end,
-            end_date__gte=month_start
-        ).select_related('competition').order_by('start_date')
-        
-        serializer = self.get_serializer(events, many=True)
-        return Response(serializer.data)
+
+        if not 1 <= month <= 12:
+            return Response({'error': 'month必须在1到12之间'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 只要赛事的 start_date 或 end_date 在该月，或者跨越该月，都算作当月的赛事，
+        # 跨月赛事在日历索引中会出现在它覆盖的每个月
+        return Response(self.expand_calendar(events_in_month(year, month)))
     
     @action(detail=False, methods=['get'])
     def by_date_range(self, request):
@@ -266,80 +320,43 @@ class EventViewSet(viewsets.ModelViewSet):
                 {'error': '日期格式错误，应为YYYY-MM-DD'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        events = Event.objects.filter(
-            start_date__lte=end_date,
-            end_date__gte=start_date
-        ).select_related('competition').order_by('start_date')
 
-        serializer = self.get_serializer(events, many=True)
-        return Response(serializer.data)
+        return Response(self.expand_calendar(events_between(start_date, end_date)))
 
     @action(detail=False, methods=['get'])
     def active(self, request):
         """获取当前进行中或即将开始的赛事"""
-        import datetime as dt
-        today = dt.date.today()
-        threshold = today - dt.timedelta(days=30)
-
-        events = Event.objects.filter(
-            end_date__gte=threshold
-        ).select_related('competition').prefetch_related('videos').order_by(
-            'competition__name', 'region', 'stage', 'start_date'
-        )
-
-        serializer = self.get_serializer(events, many=True)
-        return Response(serializer.data)
+        return Response(self.expand_calendar(active_events(date.today())))
 
     @action(detail=False, methods=['get'])
     def nearest(self, request):
         """获取按后端当前日期计算的最近一场赛事。"""
-        today = timezone.localdate()
-        base_queryset = Event.objects.select_related('competition').prefetch_related('videos')
-
-        event = (
-            base_queryset
-            .filter(start_date__lte=today, end_date__gte=today)
-            .order_by('end_date', 'start_date')
-            .first()
-        )
-
-        if event is None:
-            event = (
-                base_queryset
-                .filter(start_date__gte=today)
-                .order_by('start_date', 'end_date')
-                .first()
-            )
-
-        if event is None:
-            event = (
-                base_queryset
-                .filter(end_date__lt=today)
-                .order_by('-end_date', '-start_date')
-                .first()
-            )
-
+        event = nearest_event(timezone.localdate())
         if event is None:
             return Response(None)
-
-        serializer = self.get_serializer(event)
-        return Response(serializer.data)
+        return Response(self.expand_calendar([event])[0])
 
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """获取所有未来的赛事（用于赛程页面）"""
-        import datetime as dt
-        today = dt.date.today()
-
-        events = Event.objects.filter(
-            start_date__gte=today
-        ).select_related('competition').prefetch_related('videos').order_by(
-            'competition__name', 'region', 'stage', 'start_date'
+        return Response(self.expand_calendar(upcoming_events(date.today())))
+
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=[permissions.IsAuthenticated],
+        url_path='bulk-links'
+    )
+    def bulk_links(self, request):
+        """批量关联/取消关联赛事与视频，返回各自数量和逐条错误"""
+        serializer = EventVideoLinksSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = apply_event_video_links(
+            permission_context(request),
+            serializer.validated_data['link'],
+            serializer.validated_data['unlink'],
         )
-
-        serializer = self.get_serializer(events, many=True)
-        return Response(serializer.data)
+        return Response(result)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def link_video(self, request, pk=None):
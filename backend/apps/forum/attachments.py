@@ -0,0 +1,159 @@
+"""
+论坛图片附件处理流水线
+
+上传请求里只做两件事：流式计算内容哈希，以及按哈希去重——同一张图片再次上传时
+新记录直接指向已有文件，不再重复存储。解码图片相关的工作全部放到 Celery 任务
+process_attachment 中完成：
+
+- 读取尺寸（按 EXIF 方向校正）；
+- 原图带 EXIF/XMP 元数据时重新编码去除并原地覆盖，已插入正文的 URL 保持不变
+  （GIF 保持原样，避免丢失动画）；
+- 生成多尺寸 WebP/AVIF 缩略图，路径按内容哈希命名，相同图片只生成一次。
+"""
+
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from .models import ForumAttachment
+
+logger = logging.getLogger(__name__)
+
+# (名称, 最长边像素)
+VARIANT_SIZES = [('sm', 320), ('md', 800), ('lg', 1600)]
+VARIANT_FORMATS = [('webp', 'WEBP', 80)] + ([('avif', 'AVIF', 60)] if features.check('avif') else [])
+VARIANT_ROOT = 'forum/variants'
+CLEAN_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp')
+
+
+def hash_upload(file):
+    """分块计算上传文件的 SHA-256，计算后把读指针复位"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def find_duplicate(content_hash):
+    """返回内容相同且文件仍在使用的最早一条附件"""
+    return (
+        ForumAttachment.objects
+        .filter(content_hash=content_hash)
+        .exclude(status__in=[ForumAttachment.STATUS_ORPHANED, ForumAttachment.STATUS_BLOCKED])
+        .exclude(file='')
+        .order_by('created_at')
+        .first()
+    )
+
+
+def enqueue_processing(attachment):
+    """事务提交后投递处理任务；投递失败时由定时任务 process_pending_attachments 补处理"""
+    from .tasks import process_attachment
+
+    def send():
+        try:
+            process_attachment.delay(attachment.id)
+        except Exception as exc:
+            logger.warning('附件 %s 处理任务投递失败，等待定时补处理: %s', attachment.id, exc)
+
+    transaction.on_commit(send)
+
+
+def _encode(image, fmt, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def _save_once(path, data):
+    if not default_storage.exists(path):
+        path = default_storage.save(path, ContentFile(data))
+    return path
+
+
+def _build_variants(image, content_hash):
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'P') else 'RGB')
+    variants = {}
+    for label, max_side in VARIANT_SIZES:
+        resized = image.copy()
+        resized.thumbnail((max_side, max_side), Image.LANCZOS)
+        entry = {'width': resized.width, 'height': resized.height}
+        for ext, fmt, quality in VARIANT_FORMATS:
+            path = f'{VARIANT_ROOT}/{content_hash[:2]}/{content_hash}/{label}.{ext}'
+            entry[ext] = _save_once(path, _encode(resized, fmt, quality=quality))
+        variants[label] = entry
+    return variants
+
+
+def _overwrite(name, data):
+    """用 data 替换已有文件，文件名不变；写入失败时原文件保持不动"""
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        # 对象存储没有本地路径，单个对象的写入本身是原子的
+        with default_storage.open(name, 'wb') as target:
+            target.write(data)
+        return
+    # 先写同目录下的临时文件，再原子地替换原文件
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.strip-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _strip_metadata(image, source_format, name):
+    """重新编码原图以去掉 EXIF/GPS 等元数据并原地写回，返回是否处理过"""
+    if source_format not in CLEAN_FORMATS or not any(image.info.get(key) for key in METADATA_KEYS):
+        return False
+    options = {'quality': 90} if source_format in ('JPEG', 'WEBP') else {}
+    if image.info.get('icc_profile'):
+        # 保留色彩配置，只去掉 EXIF
+        options['icc_profile'] = image.info['icc_profile']
+    if source_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    _overwrite(name, _encode(image, source_format, **options))
+    return True
+
+
+def process_image(attachment):
+    """解码一次图片，生成尺寸、去元数据的原图和缩略图，并更新所有内容相同的附件"""
+    old_name = attachment.file.name
+    with attachment.file.open('rb') as source:
+        content_hash = attachment.content_hash or hash_upload(source)
+        image = Image.open(source)
+        source_format = image.format
+        image.load()
+
+    # exif_transpose 保留 info，保存时不传 exif 参数即不会写回元数据
+    image = ImageOps.exif_transpose(image)
+    variants = _build_variants(image, content_hash)
+    _strip_metadata(image, source_format, old_name)
+
+    updates = {
+        'content_hash': content_hash,
+        'width': image.width,
+        'height': image.height,
+        'variants': variants,
+        'processed_at': timezone.now(),
+    }
+    # 去重后多条记录共用同一个文件，一起更新
+    ForumAttachment.objects.filter(file=old_name).update(**updates)
+    return updates
@@ -0,0 +1,104 @@
+"""
+评论树分页加载
+
+帖子详情只加载一页根评论，并用窗口函数一次取出每个根评论的前 N 条回复，
+查询数固定为 2 条，与评论数量无关。根评论和回复都按 (created_at, id) 做
+keyset 分页，超出部分返回续页游标，由前端按需继续加载。
+"""
+
+import base64
+from collections import defaultdict
+from datetime import datetime
+
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+
+DEFAULT_ROOT_LIMIT = 20
+MAX_ROOT_LIMIT = 100
+DEFAULT_REPLY_LIMIT = 3
+MAX_REPLY_LIMIT = 50
+
+ORDERING = ('created_at', 'id')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(comment):
+    raw = f'{comment.created_at.isoformat()}|{comment.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, comment_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(comment_id)
+    except (ValueError, UnicodeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def visible_comments():
+    return (
+        Comment.objects
+        .filter(is_active=True, status=Comment.STATUS_PUBLISHED)
+        .select_related('author')
+        .defer('search_vector')
+    )
+
+
+def _after(qs, cursor):
+    if not cursor:
+        return qs
+    created_at, comment_id = decode_cursor(cursor)
+    return qs.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=comment_id))
+
+
+def _page(items, limit):
+    if len(items) > limit:
+        items = items[:limit]
+        return items, encode_cursor(items[-1])
+    return items, None
+
+
+def attach_replies(roots, reply_limit=DEFAULT_REPLY_LIMIT):
+    """给一批根评论挂上前 reply_limit 条回复（prefetched_replies）和续页游标（replies_cursor）"""
+    roots = [root for root in roots if not root.parent_id]
+    for root in roots:
+        root.prefetched_replies = []
+        root.replies_cursor = None
+    if not roots:
+        return
+
+    ranked = (
+        visible_comments()
+        .filter(parent_id__in=[root.id for root in roots])
+        .annotate(reply_rank=Window(
+            RowNumber(),
+            partition_by=[F('parent_id')],
+            order_by=[F('created_at').asc(), F('id').asc()],
+        ))
+        .filter(reply_rank__lte=reply_limit + 1)
+        .order_by('parent_id', *ORDERING)
+    )
+    grouped = defaultdict(list)
+    for reply in ranked:
+        grouped[reply.parent_id].append(reply)
+    for root in roots:
+        root.prefetched_replies, root.replies_cursor = _page(grouped[root.id], reply_limit)
+
+
+def load_comment_page(post, cursor=None, limit=DEFAULT_ROOT_LIMIT, reply_limit=DEFAULT_REPLY_LIMIT):
+    """返回 (根评论列表, 下一页游标)，每个根评论已挂好前几条回复"""
+    qs = _after(visible_comments().filter(post=post, parent__isnull=True), cursor)
+    roots, next_cursor = _page(list(qs.order_by(*ORDERING)[:limit + 1]), limit)
+    attach_replies(roots, reply_limit)
+    return roots, next_cursor
+
+
+def load_reply_page(root, cursor=None, limit=MAX_REPLY_LIMIT):
+    """返回 (回复列表, 下一页游标)，用于继续展开长回复链"""
+    qs = _after(visible_comments().filter(parent=root), cursor)
+    return _page(list(qs.order_by(*ORDERING)[:limit + 1]), limit)
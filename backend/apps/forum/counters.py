@@ -0,0 +1,340 @@
+"""
+论坛计数器维护
+
+浏览数：写后缓冲（write-behind）。浏览时只在 Redis 哈希里 HINCRBY，不再每次
+UPDATE forum_post；读取时把尚未落库的增量合并进 view_count；Celery 定时任务
+flush_post_views 加锁后原子地认领累积的增量，用一条 UPDATE ... FROM (VALUES ...)
+批量写回数据库。
+Redis 不可用时退回到原来的 F() 直接更新，保证计数不丢。
+
+回复数/点赞数/举报数/分区计数：按状态变化做原子增减（F() 表达式），
+不再每次写入后 COUNT 整个帖子或分区；定时任务 reconcile_forum_counters
+用一次聚合 SQL 校正可能出现的漂移。
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .models import Comment, ForumCategory, ForumReaction, ForumReport, Post
+from .ranking import hot_score_expression, hot_score_sql
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'forum:post_views'
+FLUSHING_KEY = 'forum:post_views:flushing'
+FLUSH_LOCK_KEY = 'forum:post_views:flush_lock'
+# 远大于一次落库的耗时，进程崩溃后锁自动过期
+FLUSH_LOCK_TIMEOUT = 10 * 60
+SEEN_KEY_PREFIX = 'forum:post_view_seen'
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _viewer_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'u{user.pk}'
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    ip = forwarded.split(',')[0].strip() if forwarded else request.META.get('REMOTE_ADDR', '')
+    return f'ip{ip}' if ip else ''
+
+
+def record_view(post_id, request=None):
+    """记录一次浏览，返回该帖子尚未落库的增量（含本次）
+
+    FORUM_VIEW_DEDUP_SECONDS > 0 时，同一用户/IP 在窗口内重复浏览只计一次。
+    """
+    dedup_seconds = getattr(settings, 'FORUM_VIEW_DEDUP_SECONDS', 0)
+    try:
+        client = _redis()
+        if dedup_seconds and request is not None:
+            viewer = _viewer_key(request)
+            if viewer and not client.set(f'{SEEN_KEY_PREFIX}:{post_id}:{viewer}', 1, nx=True, ex=dedup_seconds):
+                return pending_views([post_id]).get(post_id, 0)
+        pipe = client.pipeline()
+        pipe.hincrby(PENDING_KEY, post_id, 1)
+        pipe.hget(FLUSHING_KEY, post_id)
+        pending, flushing = pipe.execute()
+        return int(pending) + int(flushing or 0)
+    except Exception as exc:
+        logger.warning('浏览数写入 Redis 失败，直接更新数据库: %s', exc)
+        bump_post(post_id, view_count=1)
+        return 1
+
+
+def pending_views(post_ids):
+    """批量读取尚未落库的浏览增量，返回 {post_id: delta}"""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return {}
+    try:
+        pipe = _redis().pipeline()
+        pipe.hmget(PENDING_KEY, post_ids)
+        pipe.hmget(FLUSHING_KEY, post_ids)
+        pending, flushing = pipe.execute()
+    except Exception as exc:
+        logger.warning('读取待落库浏览数失败: %s', exc)
+        return {}
+    deltas = {}
+    for post_id, a, b in zip(post_ids, pending, flushing):
+        delta = int(a or 0) + int(b or 0)
+        if delta:
+            deltas[post_id] = delta
+    return deltas
+
+
+def merge_pending_views(posts):
+    """把待落库增量加到已加载的帖子对象上（只改内存，不写库）"""
+    posts = list(posts)
+    deltas = pending_views(post.id for post in posts)
+    for post in posts:
+        post.view_count += deltas.get(post.id, 0)
+    return posts
+
+
+def _apply_deltas(deltas):
+    if not deltas:
+        return 0
+    values = ', '.join(['(%s, %s)'] * len(deltas))
+    params = [value for item in deltas.items() for value in item]
+    hot_score = hot_score_sql(
+        views='p.view_count + v.delta', replies='p.reply_count', likes='p.like_count', published_at='p.published_at'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {Post._meta.db_table} AS p '
+            f'SET view_count = p.view_count + v.delta, hot_score = {hot_score} '
+            f'FROM (VALUES {values}) AS v(id, delta) '
+            f'WHERE p.id = v.id',
+            params,
+        )
+        return cursor.rowcount
+
+
+# 原子地认领待落库增量：处理中的键还在（上次落库失败残留）时先处理它，否则把
+# 累积哈希 RENAME 为处理中的键；两种情况都在同一个脚本里返回全部字段
+CLAIM_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return {}
+    end
+    redis.call('RENAME', KEYS[1], KEYS[2])
+end
+return redis.call('HGETALL', KEYS[2])
+"""
+
+
+def flush_pending_views():
+    """把 Redis 中累积的浏览增量批量写回数据库，返回更新的帖子数
+
+    持有 FLUSH_LOCK_KEY 锁，同一时间只有一个任务在落库，拿不到锁直接返回。
+    认领后新的浏览继续写入空哈希；处理中的键在写库事务提交前删除，
+    因此残留的处理中键一定没有落库，下次可以安全重放，不会重复累加。
+    """
+    client = _redis()
+    lock = client.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        logger.info('浏览数落库任务仍在执行，跳过本次')
+        return 0
+    try:
+        raw = client.eval(CLAIM_SCRIPT, 2, PENDING_KEY, FLUSHING_KEY)
+        deltas = {}
+        for post_id, delta in zip(raw[::2], raw[1::2]):
+            delta = int(delta)
+            if delta > 0:
+                deltas[int(post_id)] = delta
+
+        with transaction.atomic():
+            updated = _apply_deltas(deltas)
+            client.delete(FLUSHING_KEY)
+        return updated
+    finally:
+        lock.release()
+
+
+# ---------------------------------------------------------------------------
+# 增量计数
+# ---------------------------------------------------------------------------
+
+HOT_SCORE_FIELDS = ('view_count', 'reply_count', 'like_count')
+
+
+def _bump(model, pk, extra=None, **deltas):
+    updates = {field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items() if delta}
+    if pk and updates:
+        model.objects.filter(pk=pk).update(**updates, **(extra or {}))
+
+
+def bump_post(post_id, **deltas):
+    """调整帖子计数；影响热度的计数变化时在同一条 UPDATE 中重算 hot_score"""
+    extra = None
+    if any(deltas.get(field) for field in HOT_SCORE_FIELDS):
+        # SET 子句读到的是旧值，分数要按增量后的计数计算
+        columns = {
+            field: f'GREATEST({field} + {int(deltas[field])}, 0)' if deltas.get(field) else field
+            for field in HOT_SCORE_FIELDS
+        }
+        extra = {'hot_score': hot_score_expression(
+            columns['view_count'], columns['reply_count'], columns['like_count']
+        )}
+    _bump(Post, post_id, extra, **deltas)
+
+
+def bump_comment(comment_id, **deltas):
+    _bump(Comment, comment_id, **deltas)
+
+
+def bump_category(category_id, **deltas):
+    _bump(ForumCategory, category_id, **deltas)
+
+
+def post_is_counted(post):
+    return post.is_active and post.status == Post.STATUS_PUBLISHED
+
+
+def comment_is_counted(comment):
+    return comment.is_active and comment.status == Comment.STATUS_PUBLISHED
+
+
+def sync_post_visibility(post, was_counted):
+    """帖子状态变化后调整分区的 post_count，was_counted 为变化前的 post_is_counted(post)"""
+    delta = int(post_is_counted(post)) - int(was_counted)
+    bump_category(post.category_id, post_count=delta)
+
+
+def sync_post_update(post, old_category_id, was_counted):
+    """帖子编辑后调整分区计数；换分区时帖子本身和它的已发布评论一起从旧分区移到新分区"""
+    if post.category_id == old_category_id:
+        sync_post_visibility(post, was_counted)
+        return
+    comments = Comment.objects.filter(post=post, is_active=True, status=Comment.STATUS_PUBLISHED).count()
+    bump_category(old_category_id, post_count=-int(was_counted), comment_count=-comments)
+    bump_category(post.category_id, post_count=int(post_is_counted(post)), comment_count=comments)
+
+
+def sync_comment_visibility(comment, was_counted):
+    """评论状态变化后调整帖子 reply_count 和分区 comment_count"""
+    delta = int(comment_is_counted(comment)) - int(was_counted)
+    if delta:
+        bump_post(comment.post_id, reply_count=delta)
+        bump_category(comment.post.category_id, comment_count=delta)
+
+
+def sync_report_status(report, was_pending):
+    """举报状态变化后调整被举报对象的 report_count"""
+    delta = int(report.status == ForumReport.STATUS_PENDING) - int(was_pending)
+    if report.post_id:
+        bump_post(report.post_id, report_count=delta)
+    if report.comment_id:
+        bump_comment(report.comment_id, report_count=delta)
+
+
+# ---------------------------------------------------------------------------
+# 定期校正
+# ---------------------------------------------------------------------------
+
+def _reconcile_sql():
+    post = Post._meta.db_table
+    comment = Comment._meta.db_table
+    category = ForumCategory._meta.db_table
+    reaction = ForumReaction._meta.db_table
+    report = ForumReport._meta.db_table
+    return [
+        (
+            'post',
+            f"""
+            UPDATE {post} AS p
+            SET reply_count = s.reply_count, like_count = s.like_count, report_count = s.report_count,
+                hot_score = {hot_score_sql(
+                    views='p.view_count', replies='s.reply_count', likes='s.like_count', published_at='p.published_at'
+                )}
+            FROM (
+                SELECT p.id,
+                       COALESCE(c.n, 0) AS reply_count,
+                       COALESCE(r.n, 0) AS like_count,
+                       COALESCE(rp.n, 0) AS report_count
+                FROM {post} p
+                LEFT JOIN (
+                    SELECT post_id, COUNT(*) AS n FROM {comment}
+                    WHERE is_active AND status = %(comment_published)s GROUP BY post_id
+                ) c ON c.post_id = p.id
+                LEFT JOIN (
+                    SELECT post_id, COUNT(*) AS n FROM {reaction}
+                    WHERE post_id IS NOT NULL AND reaction = 'like' GROUP BY post_id
+                ) r ON r.post_id = p.id
+                LEFT JOIN (
+                    SELECT post_id, COUNT(*) AS n FROM {report}
+                    WHERE post_id IS NOT NULL AND status = %(report_pending)s GROUP BY post_id
+                ) rp ON rp.post_id = p.id
+            ) s
+            WHERE p.id = s.id
+              AND (p.reply_count, p.like_count, p.report_count, p.hot_score)
+                  IS DISTINCT FROM (s.reply_count, s.like_count, s.report_count, {hot_score_sql(
+                      views='p.view_count', replies='s.reply_count', likes='s.like_count',
+                      published_at='p.published_at'
+                  )})
+            """,
+        ),
+        (
+            'comment',
+            f"""
+            UPDATE {comment} AS c
+            SET like_count = s.like_count, report_count = s.report_count
+            FROM (
+                SELECT c.id, COALESCE(r.n, 0) AS like_count, COALESCE(rp.n, 0) AS report_count
+                FROM {comment} c
+                LEFT JOIN (
+                    SELECT comment_id, COUNT(*) AS n FROM {reaction}
+                    WHERE comment_id IS NOT NULL AND reaction = 'like' GROUP BY comment_id
+                ) r ON r.comment_id = c.id
+                LEFT JOIN (
+                    SELECT comment_id, COUNT(*) AS n FROM {report}
+                    WHERE comment_id IS NOT NULL AND status = %(report_pending)s GROUP BY comment_id
+                ) rp ON rp.comment_id = c.id
+            ) s
+            WHERE c.id = s.id
+              AND (c.like_count, c.report_count) IS DISTINCT FROM (s.like_count, s.report_count)
+            """,
+        ),
+        (
+            'category',
+            f"""
+            UPDATE {category} AS cat
+            SET post_count = s.post_count, comment_count = s.comment_count
+            FROM (
+                SELECT cat.id,
+                       (SELECT COUNT(*) FROM {post} p
+                        WHERE p.category_id = cat.id AND p.is_active
+                          AND p.status = %(post_published)s) AS post_count,
+                       (SELECT COUNT(*) FROM {comment} c JOIN {post} p ON p.id = c.post_id
+                        WHERE p.category_id = cat.id AND c.is_active
+                          AND c.status = %(comment_published)s) AS comment_count
+                FROM {category} cat
+            ) s
+            WHERE cat.id = s.id
+              AND (cat.post_count, cat.comment_count) IS DISTINCT FROM (s.post_count, s.comment_count)
+            """,
+        ),
+    ]
+
+
+def reconcile_counters():
+    """按真实数据重算所有计数器，只更新有偏差的行，返回 {表: 校正行数}"""
+    params = {
+        'post_published': Post.STATUS_PUBLISHED,
+        'comment_published': Comment.STATUS_PUBLISHED,
+        'report_pending': ForumReport.STATUS_PENDING,
+    }
+    fixed = {}
+    with connection.cursor() as cursor:
+        for name, sql in _reconcile_sql():
+            cursor.execute(sql, params)
+            fixed[name] = cursor.rowcount
+    return fixed
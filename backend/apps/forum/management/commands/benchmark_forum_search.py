@@ -0,0 +1,134 @@
+"""
+论坛检索基准
+
+在一个事务中生成 N 篇帖子（默认 10 万），对比：
+- icontains: 旧的 SearchFilter 方式，对 title/content/excerpt 做 ILIKE；
+- tsvector:  search_vector GIN 索引 + ts_rank 排序。
+结束时回滚，不会在库中留下数据（--keep 保留）。
+
+用法:
+    python manage.py benchmark_forum_search [--posts 100000] [--runs 20]
+"""
+
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from apps.forum.models import ForumCategory, Post
+from apps.forum.search import extract_plain_text, post_document, search_queryset
+
+WORDS = [
+    "原神", "崩坏星穹铁道", "明日方舟", "王者荣耀", "阴阳师", "第五人格", "恋与深空", "光与夜之恋",
+    "舞台剧", "舞美", "灯光", "配音", "剧本", "道具", "妆造", "假发", "走位", "排练", "彩排", "后台",
+    "ChinaJoy", "漫展", "金奖", "银奖", "最佳编剧", "最佳舞美", "社团", "招新", "复盘", "心得",
+    "上海", "广州", "成都", "北京", "杭州", "比赛", "评委", "观众", "返场", "谢幕",
+]
+PUNCTUATION = ["，", "。", "！", "、", " "]
+QUERIES = ["舞美", "原神舞台剧", "最佳编剧", "chinajoy", "假发 妆造", "恋与深空", "评委 返场", "不存在的词"]
+
+BATCH_SIZE = 5000
+TOPIC_RATE = 0.05
+
+
+class Rollback(Exception):
+    pass
+
+
+def make_filler(rng, size=5000):
+    """随机汉字组成的填充词，让主题词只出现在少部分帖子中"""
+    return ["".join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(rng.randint(2, 3))) for _ in range(size)]
+
+
+def make_text(rng, words, filler):
+    parts = []
+    for _ in range(words):
+        parts.append(rng.choice(WORDS) if rng.random() < TOPIC_RATE else rng.choice(filler))
+        if rng.random() < 0.3:
+            parts.append(rng.choice(PUNCTUATION))
+    return "".join(parts)
+
+
+def generate_posts(count, seed=7):
+    rng = random.Random(seed)
+    filler = make_filler(rng)
+    user, _ = get_user_model().objects.get_or_create(
+        username="forum_bench", defaults={"email": "forum_bench@example.com"}
+    )
+    category, _ = ForumCategory.objects.get_or_create(slug="forum-bench", defaults={"name": "检索基准"})
+    started = time.perf_counter()
+    for offset in range(0, count, BATCH_SIZE):
+        batch = []
+        for _ in range(min(BATCH_SIZE, count - offset)):
+            body = make_text(rng, rng.randint(20, 80), filler)
+            post = Post(
+                title=make_text(rng, rng.randint(2, 5), filler),
+                content=f"<p>{body}</p>",
+                excerpt=body[:300],
+                author=user,
+                category=category,
+            )
+            post.search_vector = post_document(post)
+            batch.append(post)
+        Post.objects.bulk_create(batch)
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {Post._meta.db_table}")
+    return time.perf_counter() - started
+
+
+def icontains_page(query):
+    qs = Post.objects.filter(is_active=True, status=Post.STATUS_PUBLISHED)
+    for term in query.split():
+        qs = qs.filter(Q(title__icontains=term) | Q(content__icontains=term) | Q(excerpt__icontains=term))
+    return qs.count(), list(qs.order_by("-is_pinned", "-last_commented_at", "-created_at")[:20])
+
+
+def tsvector_page(query):
+    qs = search_queryset(Post.objects.filter(is_active=True, status=Post.STATUS_PUBLISHED), query)
+    page = list(qs.order_by("-search_rank", "-id").defer("search_vector")[:20])
+    for post in page:
+        extract_plain_text(post.content, post.content_json)
+    return qs.count(), page
+
+
+def measure(runs, func, query):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func(query)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return result[0], statistics.median(samples), samples[max(int(len(samples) * 0.95) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = '对比论坛 icontains 检索与 tsvector 全文检索的延迟（数据在事务中生成，结束后回滚）'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=100000, help="生成的帖子数")
+        parser.add_argument("--runs", type=int, default=20, help="每个查询的执行次数")
+        parser.add_argument("--keep", action="store_true", help="保留生成的数据")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                elapsed = generate_posts(options["posts"])
+                self.stdout.write(f"生成 {options['posts']} 篇帖子用时 {elapsed:.1f}s")
+                self.stdout.write(
+                    f"{'query':<14} {'hits':>7} {'icontains p50':>14} {'p95':>8} {'tsvector p50':>13} {'p95':>8}  (ms)"
+                )
+                for query in QUERIES:
+                    hits_old, old_p50, old_p95 = measure(options["runs"], icontains_page, query)
+                    hits_new, new_p50, new_p95 = measure(options["runs"], tsvector_page, query)
+                    self.stdout.write(
+                        f"{query:<14} {hits_new:>7} {old_p50:>14.1f} {old_p95:>8.1f} "
+                        f"{new_p50:>13.1f} {new_p95:>8.1f}   (icontains 命中 {hits_old})"
+                    )
+                if not options["keep"]:
+                    raise Rollback()
+        except Rollback:
+            self.stdout.write("已回滚生成的数据")
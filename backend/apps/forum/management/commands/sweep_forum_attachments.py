@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from apps.forum.sweeper import DEFAULT_BATCH_SIZE, sweep_orphaned_attachments
+
+
+class Command(BaseCommand):
+    help = '标记未被正文引用的论坛附件为孤儿，并删除超过宽限期的孤儿文件'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ttl-hours',
+            type=int,
+            help='上传后多少小时未被引用视为孤儿（默认读取 FORUM_ATTACHMENT_ORPHAN_TTL_HOURS）',
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            help='标记为孤儿后保留多少小时再删除（默认读取 FORUM_ATTACHMENT_ORPHAN_GRACE_HOURS）',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'每批删除的附件数量 (默认: {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='仅统计将要处理的附件，不实际修改数据或删除文件',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options.get('dry_run')
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN 模式 - 不会实际修改数据或删除文件'))
+
+        report = sweep_orphaned_attachments(
+            ttl_hours=options.get('ttl_hours'),
+            grace_hours=options.get('grace_hours'),
+            batch_size=options['batch_size'],
+            dry_run=dry_run,
+        )
+
+        self.stdout.write(f'关联到正文: {report["attached"]} 个')
+        self.stdout.write(f'新增孤儿: {report["orphaned"]} 个')
+        self.stdout.write(f'删除孤儿附件: {report["purged"]} 个，文件 {report["deleted_files"]} 个')
+        reclaimed_mb = report['reclaimed_bytes'] / 1024 / 1024
+        prefix = 'DRY RUN 完成，预计' if dry_run else '清理完成，'
+        self.stdout.write(self.style.SUCCESS(f'{prefix}释放 {reclaimed_mb:.2f} MB'))
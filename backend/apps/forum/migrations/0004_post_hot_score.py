@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:45
+
+from django.db import migrations, models
+
+from apps.forum.ranking import hot_score_expression
+
+
+def backfill_hot_score(apps, schema_editor):
+    Post = apps.get_model('forum', 'Post')
+    Post.objects.update(hot_score=hot_score_expression())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0003_forumreaction_forumreport_forumtag_moderationlog_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0, help_text='热门排序分数，见 apps.forum.ranking'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_active', True), ('status', 'published')), fields=['-is_pinned', '-hot_score', '-id'], name='forum_post_hot_idx'),
+        ),
+        migrations.RunPython(backfill_hot_score, migrations.RunPython.noop),
+    ]
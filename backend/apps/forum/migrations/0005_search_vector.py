@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:47
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from apps.forum.search import comment_document, document_value, post_document
+
+
+def backfill_search_vectors(apps, schema_editor):
+    for model_name, build in (('Post', post_document), ('Comment', comment_document)):
+        Model = apps.get_model('forum', model_name)
+        batch = []
+        for obj in Model.objects.all().iterator(chunk_size=500):
+            obj.search_vector = document_value(build(obj))
+            batch.append(obj)
+            if len(batch) >= 500:
+                Model.objects.bulk_update(batch, ['search_vector'])
+                batch = []
+        if batch:
+            Model.objects.bulk_update(batch, ['search_vector'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0004_post_hot_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='全文检索文档，见 apps.forum.search', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='forum_comment_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='forum_post_search_idx'),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0005_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumattachment',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256，用于去重', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='forumattachment',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='forumattachment',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, help_text='缩略图：{尺寸: {width, height, webp, avif}}'),
+        ),
+    ]
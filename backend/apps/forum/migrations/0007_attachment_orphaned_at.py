@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0006_attachment_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumattachment',
+            name='orphaned_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:12
+
+from django.db import migrations
+
+from apps.forum.search import comment_document, document_value, post_document
+
+
+def rebuild_search_vectors(apps, schema_editor):
+    """检索文档新增单字词元，已有帖子和评论需要重新生成"""
+    for model_name, build in (('Post', post_document), ('Comment', comment_document)):
+        Model = apps.get_model('forum', model_name)
+        batch = []
+        for obj in Model.objects.all().iterator(chunk_size=500):
+            obj.search_vector = document_value(build(obj))
+            batch.append(obj)
+            if len(batch) >= 500:
+                Model.objects.bulk_update(batch, ['search_vector'])
+                batch = []
+        if batch:
+            Model.objects.bulk_update(batch, ['search_vector'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0007_attachment_orphaned_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_vectors, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
+from .ranking import hot_score_expression
+from .search import comment_document, document_value, post_document
+
 User = get_user_model()
 
 class ForumCategory(models.Model):
@@ -59,6 +66,8 @@ class Post(models.Model):
     reply_count = models.PositiveIntegerField(default=0)
     like_count = models.PositiveIntegerField(default=0)
     report_count = models.PositiveIntegerField(default=0)
+    hot_score = models.FloatField(default=0, help_text="热门排序分数，见 apps.forum.ranking")
+    search_vector = SearchVectorField(null=True, editable=False, help_text="全文检索文档，见 apps.forum.search")
     is_pinned = models.BooleanField(default=False)
     is_featured = models.BooleanField(default=False)
     is_locked = models.BooleanField(default=False)
@@ -81,6 +90,12 @@ class Post(models.Model):
             models.Index(fields=['status', 'is_active']),
             models.Index(fields=['category', 'status']),
             models.Index(fields=['-is_pinned', '-last_commented_at']),
+            models.Index(
+                fields=['-is_pinned', '-hot_score', '-id'],
+                condition=models.Q(is_active=True, status='published'),
+                name='forum_post_hot_idx',
+            ),
+            GinIndex(fields=['search_vector'], name='forum_post_search_idx'),
         ]
 
     def __str__(self):
@@ -116,12 +131,14 @@ class Comment(models.Model):
     deleted_at = models.DateTimeField(null=True, blank=True)
     deleted_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='deleted_forum_comments')
     is_active = models.BooleanField(default=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['created_at']
         indexes = [
             models.Index(fields=['post', 'parent', 'status']),
             models.Index(fields=['author', 'created_at']),
+            GinIndex(fields=['search_vector'], name='forum_comment_search_idx'),
         ]
 
     def __str__(self):
@@ -149,8 +166,12 @@ class ForumAttachment(models.Model):
     width = models.PositiveIntegerField(null=True, blank=True)
     height = models.PositiveIntegerField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_UPLOADED)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256，用于去重")
+    variants = models.JSONField(default=dict, blank=True, help_text="缩略图：{尺寸: {width, height, webp, avif}}")
+    processed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     attached_at = models.DateTimeField(null=True, blank=True)
+    orphaned_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"Attachment by {self.author} at {self.created_at}"
@@ -260,3 +281,33 @@ class ModerationLog(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+
+
+SEARCH_SOURCE_FIELDS = {'title', 'content', 'content_json'}
+
+
+def _search_source_changed(created, update_fields):
+    return created or update_fields is None or bool(SEARCH_SOURCE_FIELDS & set(update_fields))
+
+
+# 计数通过 F() 增量更新时会在同一条 UPDATE 中重算 hot_score，这里覆盖的是
+# 后台、导入脚本等直接 save() 的写入
+HOT_SCORE_SOURCE_FIELDS = {'view_count', 'reply_count', 'like_count', 'published_at'}
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, update_fields=None, **kwargs):
+    """标题或正文变化时重建检索文档，计数或发布时间变化时重算热度"""
+    updates = {}
+    if _search_source_changed(created, update_fields):
+        updates['search_vector'] = document_value(post_document(instance))
+    if created or update_fields is None or HOT_SCORE_SOURCE_FIELDS & set(update_fields):
+        updates['hot_score'] = hot_score_expression()
+    if updates:
+        Post.objects.filter(pk=instance.pk).update(**updates)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, update_fields=None, **kwargs):
+    if _search_source_changed(created, update_fields):
+        Comment.objects.filter(pk=instance.pk).update(search_vector=document_value(comment_document(instance)))
@@ -1,35 +1,33 @@
 from rest_framework import permissions
 
+from apps.users.permissions import permission_context
 
 MODERATOR_ROLES = {'admin', 'editor'}
 
 
-def user_role(user):
-    return getattr(user, 'role', None)
-
-
-def is_moderator(user):
-    return bool(user and user.is_authenticated and user_role(user) in MODERATOR_ROLES)
-
-
 def can_contribute(user):
     return bool(user and user.is_authenticated)
 
 
+def request_is_moderator(request):
+    """按请求缓存的版主判断，供权限类和序列化器逐行使用"""
+    return permission_context(request).has_role(MODERATOR_ROLES)
+
+
 class ForumPostPermission(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return True
         if view.action in {'moderate', 'hide', 'restore'}:
-            return is_moderator(request.user)
+            return request_is_moderator(request)
         return can_contribute(request.user)
 
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        if is_moderator(request.user):
+        if request_is_moderator(request):
             return True
-        return obj.author_id == request.user.id and not obj.is_locked
+        return obj.author_id == permission_context(request).user_id and not obj.is_locked
 
 
 class ForumCommentPermission(permissions.BasePermission):
@@ -41,11 +39,11 @@ class ForumCommentPermission(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        if is_moderator(request.user):
+        if request_is_moderator(request):
             return True
-        return obj.author_id == request.user.id and not obj.post.is_locked
+        return obj.author_id == permission_context(request).user_id and not obj.post.is_locked
 
 
 class IsForumModerator(permissions.BasePermission):
     def has_permission(self, request, view):
-        return is_moderator(request.user)
+        return request_is_moderator(request)
@@ -0,0 +1,37 @@
+"""
+论坛热门排序分数
+
+hot_score = log10(max(浏览 + 5 × 回复 + 3 × 点赞, 1)) + (发布时间 - 基准时间) / 45000
+
+时间衰减通过发布时间直接计入分数（晚发布 12.5 小时的帖子只需 1/10 的互动即可持平），
+因此分数只在计数变化时随同一条 UPDATE 重算（新建或直接 save() 时由 post_save 计算，
+夜间校正顺带修正偏差），不需要定时全表刷新；
+配合 (is_pinned, hot_score) 部分索引，热门列表是一次索引扫描。
+"""
+
+from django.db.models.expressions import RawSQL
+
+HOT_REPLY_WEIGHT = 5
+HOT_LIKE_WEIGHT = 3
+HOT_EPOCH = 1704067200  # 2024-01-01 00:00:00 UTC
+HOT_DECAY_SECONDS = 45000
+
+HOT_ORDERING = ('-is_pinned', '-hot_score', '-id')
+
+
+def hot_score_sql(views='view_count', replies='reply_count', likes='like_count', published_at='published_at'):
+    """按给定的列/表达式生成 hot_score 的 SQL，UPDATE 中可传入带增量的表达式"""
+    return (
+        f'LOG(GREATEST(({views}) + {HOT_REPLY_WEIGHT} * ({replies}) + {HOT_LIKE_WEIGHT} * ({likes}), 1)'
+        f'::double precision) '
+        f'+ (EXTRACT(EPOCH FROM {published_at})::double precision - {HOT_EPOCH}) / {HOT_DECAY_SECONDS}'
+    )
+
+
+def hot_score_expression(views='view_count', replies='reply_count', likes='like_count'):
+    return RawSQL(hot_score_sql(views, replies, likes), ())
+
+
+def refresh_hot_scores(queryset):
+    """按当前计数重算一批帖子的 hot_score"""
+    return queryset.update(hot_score=hot_score_expression())
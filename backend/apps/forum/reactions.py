@@ -0,0 +1,117 @@
+"""
+论坛点赞/表态
+
+切换表态只用一条 SQL：可写 CTE 中先 INSERT ... ON CONFLICT DO NOTHING RETURNING，
+没有插入时再 DELETE ... RETURNING，并在同一语句里按插入/删除的行数原子调整
+目标的 like_count（帖子同时重算 hot_score）。双击等并发请求由唯一约束兜底，
+计数不会重复增减。
+
+显式传 active=true/false 时只做插入或只做删除，重复提交结果相同。
+"""
+
+from collections import defaultdict
+
+from django.db import connection
+
+from .models import Comment, ForumReaction, Post
+from .ranking import hot_score_sql
+
+LIKE = 'like'
+MAX_REACTION_LENGTH = ForumReaction._meta.get_field('reaction').max_length
+MAX_STATE_IDS = 100
+
+TARGETS = {
+    ForumReaction.TARGET_POST: (Post, 'post_id'),
+    ForumReaction.TARGET_COMMENT: (Comment, 'comment_id'),
+}
+
+
+def _like_assignment(target_type):
+    like_count = 'GREATEST(like_count + (SELECT delta FROM change), 0)'
+    if target_type == ForumReaction.TARGET_POST:
+        return f'like_count = {like_count}, hot_score = {hot_score_sql(likes=like_count)}'
+    return f'like_count = {like_count}'
+
+
+def _toggle_sql(target_type, active):
+    model, column = TARGETS[target_type]
+    reaction_table = ForumReaction._meta.db_table
+    insert = (
+        f'INSERT INTO {reaction_table} (user_id, target_type, {column}, reaction, created_at) '
+        f'VALUES (%(user)s, %(target_type)s, %(target)s, %(reaction)s, NOW()) '
+        f'ON CONFLICT (user_id, {column}, reaction) WHERE {column} IS NOT NULL DO NOTHING '
+        f'RETURNING 1'
+    )
+    delete = (
+        f'DELETE FROM {reaction_table} '
+        f'WHERE user_id = %(user)s AND {column} = %(target)s AND reaction = %(reaction)s '
+        f'{"AND NOT EXISTS (SELECT 1 FROM ins) " if active is None else ""}'
+        f'RETURNING 1'
+    )
+    # SQL 中未使用的一侧保留为空结果，便于统一计算
+    ins = insert if active in (None, True) else 'SELECT 1 WHERE FALSE'
+    dele = delete if active in (None, False) else 'SELECT 1 WHERE FALSE'
+    return (
+        f'WITH ins AS ({ins}), del AS ({dele}), '
+        f'change AS (SELECT (SELECT COUNT(*) FROM ins) - (SELECT COUNT(*) FROM del) AS delta), '
+        f'upd AS ('
+        f'UPDATE {model._meta.db_table} SET {_like_assignment(target_type)} '
+        f'WHERE id = %(target)s AND %(is_like)s AND (SELECT delta FROM change) <> 0 '
+        f'RETURNING like_count) '
+        f'SELECT (SELECT COUNT(*) FROM ins), (SELECT COUNT(*) FROM del), '
+        f'COALESCE((SELECT like_count FROM upd), '
+        f'(SELECT like_count FROM {model._meta.db_table} WHERE id = %(target)s))'
+    )
+
+
+def set_reaction(user_id, target_type, target_id, reaction=LIKE, active=None):
+    """
+    切换（active=None）或设置表态，返回 (当前是否已表态, 目标最新 like_count)
+    """
+    params = {
+        'user': user_id,
+        'target_type': target_type,
+        'target': target_id,
+        'reaction': reaction,
+        'is_like': reaction == LIKE,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(_toggle_sql(target_type, active), params)
+        inserted, deleted, like_count = cursor.fetchone()
+
+    if active is None:
+        # 插入冲突且没有删到行：并发请求刚插入的记录对本语句不可见，视为已表态
+        active = bool(inserted) or not deleted
+    return active, like_count
+
+
+def reaction_states(user, target_type, target_ids):
+    """返回当前用户对一批帖子/评论的表态 {target_id: [reaction, ...]}"""
+    target_ids = list(target_ids)
+    states = {target_id: [] for target_id in target_ids}
+    if not target_ids or not user.is_authenticated:
+        return states
+    _, column = TARGETS[target_type]
+    rows = (
+        ForumReaction.objects
+        .filter(user=user, **{f'{column}__in': target_ids})
+        .order_by('created_at')
+        .values_list(column, 'reaction')
+    )
+    grouped = defaultdict(list)
+    for target_id, reaction in rows:
+        grouped[target_id].append(reaction)
+    states.update(grouped)
+    return states
+
+
+def parse_ids(raw, limit=MAX_STATE_IDS):
+    """解析逗号分隔的 id 列表，忽略非法值并去重"""
+    ids = {}
+    for part in (raw or '').split(','):
+        part = part.strip()
+        if part.isdigit():
+            ids.setdefault(int(part), None)
+            if len(ids) >= limit:
+                break
+    return list(ids)
@@ -0,0 +1,159 @@
+"""
+论坛全文检索
+
+保存帖子/评论时从 content_json（TipTap 文档）或 HTML 中提取一次纯文本，写入
+search_vector（tsvector，GIN 索引）。PostgreSQL 自带解析器不切分中文（整段汉字
+算一个词，C locale 下甚至直接丢弃），所以分词在 Python 中完成并直接构造 tsvector 字面量：
+
+- 中文按连续汉字切成二元组（"原神舞台" -> 原神/神舞/舞台），位置连续；
+  二元组里的单字也以同一位置入库，单字查询"神"才能命中"原神"；
+- 英文数字按单词小写；
+- 标题权重 A，正文权重 B。
+
+查询时用同样的规则切分，同一段汉字的二元组用 <-> 要求相邻，单个汉字精确匹配单字，不同词之间用 &，
+检索结果按 ts_rank 排序，并在 Python 中对当前页生成带 <mark> 的摘要。
+"""
+
+import re
+from collections import OrderedDict
+
+from django.contrib.postgres.search import SearchQueryField, SearchRank, SearchVectorField
+from django.db.models import BooleanField, F, Func, Value
+from django.db.models.functions import Cast
+from django.utils.html import escape, strip_tags
+
+TOKEN_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]+|[a-z0-9]+')
+CJK_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+
+# tsvector 限制：位置最大 16383，每个词最多保留 256 个位置
+MAX_POSITION = 16383
+MAX_POSITIONS_PER_LEXEME = 256
+MAX_QUERY_LENGTH = 100
+SNIPPET_RADIUS = 60
+
+BLOCK_NODES = {'paragraph', 'heading', 'blockquote', 'listItem', 'codeBlock', 'hardBreak'}
+
+
+def _collect_text(node, parts):
+    if isinstance(node, list):
+        for child in node:
+            _collect_text(child, parts)
+        return
+    if not isinstance(node, dict):
+        return
+    if node.get('type') == 'text':
+        parts.append(node.get('text') or '')
+    _collect_text(node.get('content'), parts)
+    if node.get('type') in BLOCK_NODES:
+        parts.append(' ')
+
+
+def extract_plain_text(content='', content_json=None):
+    """优先从 TipTap JSON 提取纯文本，没有时退回到去除 HTML 标签"""
+    if content_json:
+        parts = []
+        _collect_text(content_json, parts)
+        text = ''.join(parts)
+    else:
+        text = strip_tags(content or '')
+    return ' '.join(text.split())
+
+
+def _segments(text):
+    """切出 (是否中文, 词元列表)，中文段内的二元组位置连续"""
+    for match in TOKEN_RE.finditer((text or '').lower()):
+        run = match.group(0)
+        if CJK_RE.match(run):
+            yield True, [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+        else:
+            yield False, [run]
+
+
+def build_document(*weighted_texts):
+    """由 [(文本, 权重), ...] 构造 tsvector 字面量"""
+    positions = OrderedDict()
+
+    def add(token, position, weight):
+        slots = positions.setdefault(token, [])
+        slot = f'{position}{weight}'
+        if len(slots) < MAX_POSITIONS_PER_LEXEME and (not slots or slots[-1] != slot):
+            slots.append(slot)
+
+    position = 0
+    for text, weight in weighted_texts:
+        for is_cjk, tokens in _segments(text):
+            for token in tokens:
+                position += 1
+                if position > MAX_POSITION:
+                    break
+                add(token, position, weight)
+                if is_cjk and len(token) > 1:
+                    for char in token:
+                        add(char, position, weight)
+    return ' '.join(f"'{token}':{','.join(slots)}" for token, slots in positions.items())
+
+
+def build_query(query):
+    """把用户输入转换成 tsquery 字面量，无可检索内容时返回 None"""
+    clauses = []
+    for is_cjk, tokens in _segments((query or '')[:MAX_QUERY_LENGTH]):
+        if is_cjk and len(tokens) > 1:
+            clauses.append('(' + ' <-> '.join(f"'{token}'" for token in tokens) + ')')
+        elif is_cjk:
+            clauses.append(f"'{tokens[0]}'")
+        else:
+            # 英文词允许前缀匹配
+            clauses.append(f"'{tokens[0]}':*")
+    return ' & '.join(clauses) or None
+
+
+def highlight_terms(query):
+    return [match.group(0) for match in TOKEN_RE.finditer((query or '').lower())]
+
+
+def make_snippet(text, terms, radius=SNIPPET_RADIUS):
+    """截取第一个命中附近的文本，HTML 转义后用 <mark> 标出命中词"""
+    lowered = text.lower()
+    hits = [index for index in (lowered.find(term) for term in terms) if index >= 0]
+    start = max(min(hits) - radius, 0) if hits else 0
+    end = min(start + radius * 2 + (max(len(term) for term in terms) if terms else 0), len(text))
+    snippet = escape(text[start:end])
+    if terms:
+        pattern = re.compile('|'.join(re.escape(escape(term)) for term in sorted(terms, key=len, reverse=True)), re.I)
+        snippet = pattern.sub(lambda m: f'<mark>{m.group(0)}</mark>', snippet)
+    return ('…' if start > 0 else '') + snippet + ('…' if end < len(text) else '')
+
+
+class TSQuery(Func):
+    template = '%(expressions)s::tsquery'
+    output_field = SearchQueryField()
+
+
+class TSMatch(Func):
+    arg_joiner = ' @@ '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+def document_value(document):
+    return Cast(Value(document), SearchVectorField())
+
+
+def post_document(post):
+    return build_document(
+        (post.title, 'A'),
+        (extract_plain_text(post.content, post.content_json), 'B'),
+    )
+
+
+def comment_document(comment):
+    return build_document((extract_plain_text(comment.content), 'B'))
+
+
+def search_queryset(queryset, query):
+    """按 search_vector 过滤并附加 search_rank；query 无可检索词元时返回空结果"""
+    tsquery = build_query(query)
+    if tsquery is None:
+        return queryset.none()
+    ts = TSQuery(Value(tsquery))
+    return queryset.filter(TSMatch(F('search_vector'), ts)).annotate(search_rank=SearchRank(F('search_vector'), ts))
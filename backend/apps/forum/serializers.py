@@ -2,6 +2,10 @@ from django.utils import timezone
 from django.utils.html import strip_tags
 from rest_framework import serializers
 
+from apps.users.permissions import permission_context
+
+from .attachments import enqueue_processing, find_duplicate, hash_upload
+from .comment_tree import attach_replies, load_comment_page
 from .models import (
     Comment,
     ForumAttachment,
@@ -13,7 +17,7 @@ from .models import (
     Post,
     PostRevision,
 )
-from .permissions import can_contribute, is_moderator
+from .permissions import can_contribute, request_is_moderator
 
 
 MAX_IMAGE_SIZE = 5 * 1024 * 1024
@@ -31,6 +35,12 @@ def avatar_url(user):
         return None
 
 
+def viewer_permissions(context):
+    """当前用户的 (id, 是否版主)，取自请求级权限上下文，嵌套序列化器共享"""
+    request = context.get('request')
+    return permission_context(request).user_id, request_is_moderator(request)
+
+
 def make_excerpt(content):
     text = ' '.join(strip_tags(content or '').split())
     return text[:300]
@@ -53,17 +63,18 @@ class ForumCategorySerializer(serializers.ModelSerializer):
 
 class ForumAttachmentSerializer(serializers.ModelSerializer):
     file_url = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
 
     class Meta:
         model = ForumAttachment
         fields = [
             'id', 'file', 'file_url', 'post', 'comment', 'original_name',
-            'content_type', 'size', 'width', 'height', 'status',
-            'created_at', 'attached_at'
+            'content_type', 'size', 'width', 'height', 'status', 'variants',
+            'processed_at', 'created_at', 'attached_at'
         ]
         read_only_fields = [
             'author', 'original_name', 'content_type', 'size', 'width',
-            'height', 'status', 'created_at', 'attached_at'
+            'height', 'status', 'processed_at', 'created_at', 'attached_at'
         ]
 
     def get_file_url(self, obj):
@@ -72,6 +83,13 @@ class ForumAttachmentSerializer(serializers.ModelSerializer):
         except ValueError:
             return None
 
+    def get_variants(self, obj):
+        storage = obj.file.storage
+        return {
+            label: {key: storage.url(value) if key not in ('width', 'height') else value for key, value in entry.items()}
+            for label, entry in (obj.variants or {}).items()
+        }
+
     def validate_file(self, file):
         if file.size > MAX_IMAGE_SIZE:
             raise serializers.ValidationError('图片不能超过 5MB')
@@ -82,16 +100,29 @@ class ForumAttachmentSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         file = validated_data.get('file')
+        content_hash = hash_upload(file)
         validated_data.update({
             'original_name': getattr(file, 'name', '')[:255],
             'content_type': getattr(file, 'content_type', ''),
             'size': getattr(file, 'size', 0),
+            'content_hash': content_hash,
         })
+        if ForumAttachment.objects.filter(content_hash=content_hash, status=ForumAttachment.STATUS_BLOCKED).exists():
+            raise serializers.ValidationError({'file': '该图片已被屏蔽'})
+        duplicate = find_duplicate(content_hash)
+        if duplicate:
+            # 内容相同的图片只存一份，沿用已有文件和处理结果
+            validated_data.update({
+                'file': duplicate.file.name,
+                'width': duplicate.width,
+                'height': duplicate.height,
+                'variants': duplicate.variants,
+                'processed_at': duplicate.processed_at,
+            })
+            return super().create(validated_data)
+
         attachment = super().create(validated_data)
-        if attachment.file and hasattr(attachment.file, 'width'):
-            attachment.width = attachment.file.width
-            attachment.height = attachment.file.height
-            attachment.save(update_fields=['width', 'height'])
+        enqueue_processing(attachment)
         return attachment
 
 
@@ -99,6 +130,7 @@ class CommentSerializer(serializers.ModelSerializer):
     author_name = serializers.SerializerMethodField()
     author_avatar = serializers.SerializerMethodField()
     replies = serializers.SerializerMethodField()
+    replies_cursor = serializers.SerializerMethodField()
     can_edit = serializers.SerializerMethodField()
     can_moderate = serializers.SerializerMethodField()
 
@@ -108,7 +140,7 @@ class CommentSerializer(serializers.ModelSerializer):
             'id', 'post', 'author', 'author_name', 'author_avatar',
             'content', 'parent', 'status', 'like_count', 'report_count',
             'created_at', 'updated_at', 'edited_at', 'replies',
-            'can_edit', 'can_moderate'
+            'replies_cursor', 'can_edit', 'can_moderate'
         ]
         read_only_fields = [
             'author', 'status', 'like_count', 'report_count', 'created_at',
@@ -122,29 +154,31 @@ class CommentSerializer(serializers.ModelSerializer):
         return avatar_url(obj.author)
 
     def get_can_edit(self, obj):
-        request = self.context.get('request')
-        user = getattr(request, 'user', None)
-        return bool(user and user.is_authenticated and (is_moderator(user) or obj.author_id == user.id))
+        user_id, moderator = viewer_permissions(self.context)
+        return bool(user_id and (moderator or obj.author_id == user_id))
 
     def get_can_moderate(self, obj):
-        request = self.context.get('request')
-        return is_moderator(getattr(request, 'user', None))
+        return viewer_permissions(self.context)[1]
 
     def get_replies(self, obj):
-        replies = getattr(obj, 'prefetched_replies', None)
-        if replies is None:
-            replies = obj.replies.filter(is_active=True, status=Comment.STATUS_PUBLISHED).select_related('author')
-        return CommentSerializer(replies, many=True, context=self.context).data
+        if obj.parent_id:
+            return []
+        if not hasattr(obj, 'prefetched_replies'):
+            # 列表接口会在分页后批量挂载，这里只兜底单个对象
+            attach_replies([obj])
+        return CommentSerializer(obj.prefetched_replies, many=True, context=self.context).data
+
+    def get_replies_cursor(self, obj):
+        return getattr(obj, 'replies_cursor', None)
 
     def validate(self, attrs):
         post = attrs.get('post') or getattr(self.instance, 'post', None)
         parent = attrs.get('parent')
         request = self.context.get('request')
-        user = getattr(request, 'user', None)
 
-        if post and post.is_locked and not is_moderator(user):
+        if post and post.is_locked and not request_is_moderator(request):
             raise serializers.ValidationError('该帖子已锁定，无法继续评论')
-        if post and not post.is_visible and not is_moderator(user):
+        if post and not post.is_visible and not request_is_moderator(request):
             raise serializers.ValidationError('该帖子当前不可评论')
         if parent:
             if parent.post_id != post.id:
@@ -189,43 +223,38 @@ class PostListSerializer(serializers.ModelSerializer):
         return avatar_url(obj.author)
 
     def get_can_edit(self, obj):
-        request = self.context.get('request')
-        user = getattr(request, 'user', None)
-        return bool(user and user.is_authenticated and (is_moderator(user) or obj.author_id == user.id))
+        user_id, moderator = viewer_permissions(self.context)
+        return bool(user_id and (moderator or obj.author_id == user_id))
 
     def get_can_moderate(self, obj):
-        request = self.context.get('request')
-        return is_moderator(getattr(request, 'user', None))
+        return viewer_permissions(self.context)[1]
 
 
 class PostDetailSerializer(PostListSerializer):
-    comments = serializers.SerializerMethodField()
     tag_ids = serializers.PrimaryKeyRelatedField(
         source='tags', queryset=ForumTag.objects.all(), many=True, required=False, write_only=True
     )
 
     class Meta(PostListSerializer.Meta):
         fields = PostListSerializer.Meta.fields + [
-            'content', 'content_json', 'published_at', 'edited_at',
-            'comments', 'tag_ids'
+            'content', 'content_json', 'published_at', 'edited_at', 'tag_ids'
         ]
         read_only_fields = PostListSerializer.Meta.read_only_fields + ['status', 'published_at', 'edited_at']
 
-    def get_comments(self, obj):
-        qs = (
-            obj.comments
-            .filter(parent__isnull=True, is_active=True, status=Comment.STATUS_PUBLISHED)
-            .select_related('author')
-            .prefetch_related('replies__author')
-        )
-        return CommentSerializer(qs, many=True, context=self.context).data
+    def to_representation(self, instance):
+        # 首屏评论和游标来自同一次分页查询
+        data = super().to_representation(instance)
+        roots, cursor = load_comment_page(instance)
+        data['comments'] = CommentSerializer(roots, many=True, context=self.context).data
+        data['comments_cursor'] = cursor
+        return data
 
     def validate(self, attrs):
         request = self.context.get('request')
         user = getattr(request, 'user', None)
         category = attrs.get('category') or getattr(self.instance, 'category', None)
         allowed_roles = getattr(category, 'allowed_roles', []) or []
-        if allowed_roles and getattr(user, 'role', None) not in allowed_roles and not is_moderator(user):
+        if allowed_roles and getattr(user, 'role', None) not in allowed_roles and not request_is_moderator(request):
             raise serializers.ValidationError('当前角色不能在该分区发帖')
         if user and user.is_authenticated and not can_contribute(user):
             raise serializers.ValidationError('当前账号还没有发帖权限')
@@ -0,0 +1,190 @@
+"""
+论坛孤儿附件清理
+
+上传的图片只有被插入帖子/评论正文后才算"已关联"。定时任务按以下步骤回收其余文件：
+
+1. 取出超过 TTL 仍未关联的附件，一次性扫描这段时间内改动过的帖子、修订记录和评论
+   （content / content_json），按文件名和缩略图的内容哈希匹配引用；
+2. 被引用的附件改为 attached 并补上 post/comment；未被引用的标记为 orphaned；
+3. orphaned 超过宽限期的附件按批删除存储中的文件和缩略图，同一文件/哈希仍被其他
+   附件使用时保留。S3 类存储使用 DeleteObjects 每批一次请求，其他存储逐个删除。
+
+返回的报告中 reclaimed_bytes 为释放的存储空间。
+"""
+
+import json
+import re
+from datetime import timedelta
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Comment, ForumAttachment, Post, PostRevision
+
+ATTACHMENT_REF_RE = re.compile(r'forum/attachments/[^"\'\s?#)<>\\]+')
+VARIANT_REF_RE = re.compile(r'forum/variants/[0-9a-f]{2}/([0-9a-f]{64})/')
+
+DEFAULT_BATCH_SIZE = 500
+# S3 DeleteObjects 单次最多 1000 个键
+STORAGE_DELETE_CHUNK = 1000
+
+
+def _scan(text, owner, names, hashes):
+    """记录文本中引用的附件文件名和缩略图哈希，保留最早发现的 owner"""
+    if not text:
+        return
+    for name in ATTACHMENT_REF_RE.findall(text):
+        # 正文中的 URL 可能经过百分号编码，还原后才能和存储中的文件名对上
+        names.setdefault(unquote(name), owner)
+    for content_hash in VARIANT_REF_RE.findall(text):
+        hashes.setdefault(content_hash, owner)
+
+
+def collect_references(since):
+    """
+    扫描 since 之后改动过的正文，返回 ({文件名: (post_id, comment_id)}, {哈希: (post_id, comment_id)})
+    """
+    names, hashes = {}, {}
+    posts = Post.objects.filter(updated_at__gte=since).values_list('id', 'content', 'content_json')
+    for post_id, content, content_json in posts.iterator(chunk_size=2000):
+        _scan(content, (post_id, None), names, hashes)
+        if content_json:
+            _scan(json.dumps(content_json, ensure_ascii=False), (post_id, None), names, hashes)
+
+    revisions = PostRevision.objects.filter(created_at__gte=since).values_list('post_id', 'content', 'content_json')
+    for post_id, content, content_json in revisions.iterator(chunk_size=2000):
+        _scan(content, (post_id, None), names, hashes)
+        if content_json:
+            _scan(json.dumps(content_json, ensure_ascii=False), (post_id, None), names, hashes)
+
+    comments = Comment.objects.filter(updated_at__gte=since).values_list('id', 'post_id', 'content')
+    for comment_id, post_id, content in comments.iterator(chunk_size=2000):
+        _scan(content, (post_id, comment_id), names, hashes)
+    return names, hashes
+
+
+def _classify(now, ttl, dry_run):
+    """把超过 TTL 的 uploaded/orphaned 附件重新分类，返回 (关联数, 新增孤儿数)"""
+    candidates = list(
+        ForumAttachment.objects
+        .filter(
+            status__in=[ForumAttachment.STATUS_UPLOADED, ForumAttachment.STATUS_ORPHANED],
+            created_at__lt=now - ttl,
+        )
+        .exclude(file='')
+        .only('id', 'file', 'content_hash', 'status', 'post_id', 'comment_id', 'created_at')
+    )
+    if not candidates:
+        return 0, 0
+
+    names, hashes = collect_references(min(item.created_at for item in candidates))
+    attached, orphaned = [], []
+    for item in candidates:
+        owner = names.get(item.file.name) or hashes.get(item.content_hash)
+        if owner is None and (item.post_id or item.comment_id):
+            owner = (item.post_id, item.comment_id)
+        if owner is not None:
+            item.post_id = item.post_id or owner[0]
+            item.comment_id = item.comment_id or owner[1]
+            item.status = ForumAttachment.STATUS_ATTACHED
+            item.attached_at = now
+            item.orphaned_at = None
+            attached.append(item)
+        elif item.status == ForumAttachment.STATUS_UPLOADED:
+            item.status = ForumAttachment.STATUS_ORPHANED
+            item.orphaned_at = now
+            orphaned.append(item)
+
+    if not dry_run:
+        ForumAttachment.objects.bulk_update(
+            attached, ['status', 'post', 'comment', 'attached_at', 'orphaned_at'], batch_size=DEFAULT_BATCH_SIZE
+        )
+        ForumAttachment.objects.bulk_update(orphaned, ['status', 'orphaned_at'], batch_size=DEFAULT_BATCH_SIZE)
+    return len(attached), len(orphaned)
+
+
+def _file_size(storage, name, default=0):
+    try:
+        return storage.size(name)
+    except Exception:
+        # 文件已不存在时各存储后端抛出的异常类型不同
+        return default
+
+
+def _delete_files(storage, names):
+    """批量删除存储中的文件，S3 类存储每批一次 DeleteObjects 请求"""
+    bucket = getattr(storage, 'bucket', None)
+    if bucket is not None and hasattr(storage, '_normalize_name'):
+        for start in range(0, len(names), STORAGE_DELETE_CHUNK):
+            chunk = names[start:start + STORAGE_DELETE_CHUNK]
+            bucket.delete_objects(Delete={
+                'Objects': [{'Key': storage._normalize_name(name)} for name in chunk],
+                'Quiet': True,
+            })
+        return
+    for name in names:
+        storage.delete(name)
+
+
+def _purge_batch(batch, storage, dry_run):
+    """删除一批孤儿附件的文件和缩略图，返回 (删除文件数, 释放字节数)"""
+    batch_ids = [item.id for item in batch]
+    file_names = {item.file.name for item in batch}
+    content_hashes = {item.content_hash for item in batch if item.content_hash}
+
+    # 去重后多条附件共用同一文件，其余附件仍在使用时保留
+    others = ForumAttachment.objects.exclude(id__in=batch_ids).exclude(file='')
+    kept_names = set(others.filter(file__in=file_names).values_list('file', flat=True))
+    kept_hashes = set(others.filter(content_hash__in=content_hashes).values_list('content_hash', flat=True))
+
+    sizes = {}
+    for item in batch:
+        name = item.file.name
+        if name not in kept_names and name not in sizes:
+            sizes[name] = _file_size(storage, name, item.size)
+        if item.content_hash and item.content_hash not in kept_hashes:
+            for entry in (item.variants or {}).values():
+                for key, path in entry.items():
+                    if key not in ('width', 'height') and path not in sizes:
+                        sizes[path] = _file_size(storage, path)
+
+    if not dry_run:
+        if sizes:
+            _delete_files(storage, list(sizes))
+        ForumAttachment.objects.filter(id__in=batch_ids).update(file='', variants={})
+    return len(sizes), sum(sizes.values())
+
+
+def sweep_orphaned_attachments(ttl_hours=None, grace_hours=None, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    标记并清理孤儿附件，返回报告 {attached, orphaned, purged, deleted_files, reclaimed_bytes}
+    """
+    now = timezone.now()
+    if ttl_hours is None:
+        ttl_hours = settings.FORUM_ATTACHMENT_ORPHAN_TTL_HOURS
+    if grace_hours is None:
+        grace_hours = settings.FORUM_ATTACHMENT_ORPHAN_GRACE_HOURS
+
+    attached, orphaned = _classify(now, timedelta(hours=ttl_hours), dry_run)
+    report = {'attached': attached, 'orphaned': orphaned, 'purged': 0, 'deleted_files': 0, 'reclaimed_bytes': 0}
+
+    expired = (
+        ForumAttachment.objects
+        .filter(status=ForumAttachment.STATUS_ORPHANED, orphaned_at__lt=now - timedelta(hours=grace_hours))
+        .exclude(file='')
+        .only('id', 'file', 'content_hash', 'size', 'variants')
+        .order_by('id')
+    )
+    storage = ForumAttachment._meta.get_field('file').storage
+    last_id = 0
+    while True:
+        batch = list(expired.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        deleted, reclaimed = _purge_batch(batch, storage, dry_run)
+        report['purged'] += len(batch)
+        report['deleted_files'] += deleted
+        report['reclaimed_bytes'] += reclaimed
+    return report
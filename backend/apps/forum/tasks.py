@@ -0,0 +1,86 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+from PIL import UnidentifiedImageError
+
+from .attachments import process_image
+from .counters import flush_pending_views, reconcile_counters
+from .models import ForumAttachment
+from .sweeper import sweep_orphaned_attachments
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_post_views():
+    """
+    定时把 Redis 中缓冲的帖子浏览数批量写回数据库
+    """
+    updated = flush_pending_views()
+    if updated:
+        logger.info(f"论坛浏览数落库完成，更新帖子 {updated} 个")
+    return updated
+
+
+@shared_task
+def reconcile_forum_counters():
+    """
+    定时按真实数据校正论坛计数器（回复数、点赞数、举报数、分区计数）
+    """
+    fixed = reconcile_counters()
+    if any(fixed.values()):
+        logger.warning(f"论坛计数器存在漂移，已校正: {fixed}")
+    return fixed
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def process_attachment(self, attachment_id):
+    """
+    后台处理上传的图片附件：尺寸、去元数据、多尺寸缩略图
+    """
+    attachment = ForumAttachment.objects.filter(id=attachment_id).first()
+    if attachment is None or attachment.processed_at or not attachment.file:
+        return None
+    try:
+        process_image(attachment)
+    except (FileNotFoundError, UnidentifiedImageError) as exc:
+        # 文件缺失或无法解码，重试也没有意义
+        logger.warning(f"附件 {attachment_id} 无法处理: {exc}")
+        ForumAttachment.objects.filter(id=attachment_id).update(processed_at=timezone.now())
+        return None
+    except OSError as exc:
+        # 存储暂时不可用时重试
+        raise self.retry(exc=exc)
+    return attachment_id
+
+
+@shared_task
+def process_pending_attachments(limit=100):
+    """
+    补处理投递失败或处理中断的附件
+    """
+    stale_before = timezone.now() - timedelta(minutes=5)
+    ids = list(
+        ForumAttachment.objects
+        .filter(processed_at__isnull=True, created_at__lt=stale_before)
+        .exclude(file='')
+        .values_list('id', flat=True)[:limit]
+    )
+    for attachment_id in ids:
+        process_attachment.delay(attachment_id)
+    return len(ids)
+
+
+@shared_task
+def sweep_forum_attachments():
+    """
+    定时标记未被正文引用的附件为孤儿，并删除超过宽限期的孤儿文件
+    """
+    report = sweep_orphaned_attachments()
+    logger.info(
+        f"论坛附件清理完成: 关联 {report['attached']} 个，新增孤儿 {report['orphaned']} 个，"
+        f"删除 {report['purged']} 个附件（{report['deleted_files']} 个文件，释放 {report['reclaimed_bytes']} 字节）"
+    )
+    return report
@@ -0,0 +1,114 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from apps.forum.attachments import process_image
+from apps.forum.models import ForumAttachment
+from apps.forum.tasks import process_attachment
+
+User = get_user_model()
+
+LOCAL_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+def jpeg_with_exif(size=(1200, 900)):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # 需要旋转 90 度
+    exif[0x010F] = 'TestCamera'
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+class AttachmentPipelineTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root, STORAGES=LOCAL_STORAGES)
+        self.override.enable()
+        self.user = User.objects.create_user(username='uploader', email='uploader@example.com', password='pass')
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def upload(self, data, name='photo.jpg'):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(
+                '/api/forum/attachments/',
+                {'file': SimpleUploadedFile(name, data, content_type='image/jpeg')},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data, callbacks
+
+    def test_upload_is_deduplicated_and_processed_off_request(self):
+        data = jpeg_with_exif()
+        first, callbacks = self.upload(data)
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNone(first['width'])
+        self.assertIsNone(first['processed_at'])
+
+        second, callbacks = self.upload(data, name='again.jpg')
+        self.assertEqual(len(callbacks), 0)
+        self.assertEqual(second['file'], first['file'])
+
+        process_attachment(first['id'])
+        rows = ForumAttachment.objects.filter(id__in=[first['id'], second['id']])
+        self.assertEqual(len({(row.file.name, row.width, row.height) for row in rows}), 1)
+        attachment = rows.first()
+        self.assertEqual((attachment.width, attachment.height), (900, 1200))
+        self.assertIsNotNone(attachment.processed_at)
+
+        storage = attachment.file.storage
+        with storage.open(attachment.file.name) as cleaned:
+            image = Image.open(cleaned)
+            self.assertFalse(image.getexif())
+        # 原地覆盖，已经插入正文的 URL 不变
+        self.assertTrue(first['file'].endswith(attachment.file.name))
+
+        self.assertEqual(set(attachment.variants), {'sm', 'md', 'lg'})
+        self.assertEqual((attachment.variants['sm']['width'], attachment.variants['sm']['height']), (240, 320))
+        self.assertTrue(storage.exists(attachment.variants['md']['webp']))
+
+        third, callbacks = self.upload(data, name='third.jpg')
+        self.assertEqual(len(callbacks), 0)
+        self.assertEqual(third['width'], 900)
+        self.assertIn('sm', third['variants'])
+
+    def test_blocked_image_is_rejected(self):
+        data = jpeg_with_exif((64, 64))
+        first, _ = self.upload(data)
+        ForumAttachment.objects.filter(id=first['id']).update(status=ForumAttachment.STATUS_BLOCKED)
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post(
+                '/api/forum/attachments/',
+                {'file': SimpleUploadedFile('x.jpg', data, content_type='image/jpeg')},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 400)
+
+    def test_failed_overwrite_keeps_original(self):
+        data = jpeg_with_exif((64, 64))
+        first, _ = self.upload(data)
+        attachment = ForumAttachment.objects.get(id=first['id'])
+        directory = os.path.dirname(attachment.file.path)
+
+        with mock.patch('apps.forum.attachments.os.replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                process_image(attachment)
+
+        with attachment.file.storage.open(attachment.file.name) as original:
+            self.assertEqual(original.read(), data)
+        self.assertEqual(os.listdir(directory), [os.path.basename(attachment.file.name)])
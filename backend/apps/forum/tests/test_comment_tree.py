@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from apps.forum.comment_tree import load_comment_page
+from apps.forum.models import Comment, ForumCategory, Post
+
+User = get_user_model()
+
+
+class CommentTreeTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', email='reader@example.com', password='pass')
+        category = ForumCategory.objects.create(name='综合', slug='general')
+        self.post = Post.objects.create(title='帖子', content='正文', author=self.user, category=category)
+        self.roots = [
+            Comment.objects.create(post=self.post, author=self.user, content=f'根评论 {i}')
+            for i in range(5)
+        ]
+        for i in range(7):
+            Comment.objects.create(post=self.post, author=self.user, parent=self.roots[0], content=f'回复 {i}')
+        Comment.objects.create(
+            post=self.post, author=self.user, parent=self.roots[1], content='已隐藏',
+            status=Comment.STATUS_HIDDEN,
+        )
+
+    def test_page_loads_in_fixed_queries(self):
+        with self.assertNumQueries(2):
+            roots, next_cursor = load_comment_page(self.post, limit=3, reply_limit=2)
+        self.assertEqual([root.id for root in roots], [root.id for root in self.roots[:3]])
+        self.assertIsNotNone(next_cursor)
+        self.assertEqual(len(roots[0].prefetched_replies), 2)
+        self.assertIsNotNone(roots[0].replies_cursor)
+        self.assertEqual(roots[1].prefetched_replies, [])
+        self.assertIsNone(roots[1].replies_cursor)
+
+        roots, next_cursor = load_comment_page(self.post, cursor=next_cursor, limit=3)
+        self.assertEqual([root.id for root in roots], [root.id for root in self.roots[3:]])
+        self.assertIsNone(next_cursor)
+
+    def test_reply_continuation(self):
+        response = self.client.get(f'/api/forum/posts/{self.post.id}/comments/', {'limit': 1, 'replies': 3})
+        self.assertEqual(response.status_code, 200)
+        first = response.data['results'][0]
+        seen = [reply['id'] for reply in first['replies']]
+
+        cursor = first['replies_cursor']
+        while cursor:
+            response = self.client.get(f"/api/forum/comments/{first['id']}/replies/", {'cursor': cursor, 'limit': 2})
+            seen += [reply['id'] for reply in response.data['results']]
+            cursor = response.data['next_cursor']
+        self.assertEqual(seen, list(self.roots[0].replies.order_by('created_at', 'id').values_list('id', flat=True)))
+
+        response = self.client.get(f'/api/forum/posts/{self.post.id}/comments/', {'cursor': 'bad'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_detail_cursor_matches_first_page(self):
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, content=f'更多评论 {i}') for i in range(20)
+        )
+        response = self.client.get(f'/api/forum/posts/{self.post.id}/')
+        self.assertEqual(response.status_code, 200)
+        seen = [comment['id'] for comment in response.data['comments']]
+        self.assertEqual(len(seen), 20)
+
+        response = self.client.get(
+            f'/api/forum/posts/{self.post.id}/comments/', {'cursor': response.data['comments_cursor']}
+        )
+        seen += [comment['id'] for comment in response.data['results']]
+        self.assertIsNone(response.data['next_cursor'])
+        self.assertEqual(sorted(seen), sorted(self.post.comments.filter(parent__isnull=True).values_list('id', flat=True)))
@@ -0,0 +1,217 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from apps.forum import counters
+from apps.forum.counters import (
+    FLUSH_LOCK_KEY,
+    FLUSHING_KEY,
+    PENDING_KEY,
+    SEEN_KEY_PREFIX,
+    flush_pending_views,
+    reconcile_counters,
+    record_view,
+)
+from apps.forum.models import Comment, ForumCategory, ForumReport, Post
+
+User = get_user_model()
+
+
+class ForumCounterTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass')
+        self.moderator = User.objects.create_user(
+            username='moderator', email='moderator@example.com', password='pass', role='admin'
+        )
+        self.category = ForumCategory.objects.create(name='综合', slug='general')
+        self.client.force_authenticate(self.author)
+        response = self.client.post('/api/forum/posts/', {
+            'title': '测试帖子',
+            'content': '<p>正文</p>',
+            'category': self.category.id,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.post = Post.objects.get(id=response.data['id'])
+
+    def comment(self, content='评论'):
+        response = self.client.post('/api/forum/comments/', {'post': self.post.id, 'content': content}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def assertCounts(self, replies, category_posts, category_comments):
+        self.post.refresh_from_db()
+        self.category.refresh_from_db()
+        self.assertEqual(self.post.reply_count, replies)
+        self.assertEqual(self.category.post_count, category_posts)
+        self.assertEqual(self.category.comment_count, category_comments)
+
+    def assertReconciled(self):
+        self.assertEqual(reconcile_counters(), {'post': 0, 'comment': 0, 'category': 0})
+
+    def test_comment_hide_restore_delete(self):
+        first = self.comment()
+        second = self.comment()
+        self.assertCounts(replies=2, category_posts=1, category_comments=2)
+
+        self.client.force_authenticate(self.moderator)
+        self.client.post(f'/api/forum/comments/{first}/hide/')
+        self.assertCounts(replies=1, category_posts=1, category_comments=1)
+        # 重复隐藏不应重复扣减
+        self.client.post(f'/api/forum/comments/{first}/hide/')
+        self.assertCounts(replies=1, category_posts=1, category_comments=1)
+
+        self.client.post(f'/api/forum/comments/{first}/restore/')
+        self.assertCounts(replies=2, category_posts=1, category_comments=2)
+
+        self.client.post(f'/api/forum/comments/{first}/hide/')
+        self.client.delete(f'/api/forum/comments/{first}/')
+        self.client.delete(f'/api/forum/comments/{second}/')
+        self.assertCounts(replies=0, category_posts=1, category_comments=0)
+        self.assertReconciled()
+
+    def test_post_moderation_and_delete(self):
+        self.comment()
+        self.client.force_authenticate(self.moderator)
+        self.client.post(f'/api/forum/posts/{self.post.id}/moderate/', {'status': Post.STATUS_HIDDEN}, format='json')
+        self.assertCounts(replies=1, category_posts=0, category_comments=1)
+        self.client.post(f'/api/forum/posts/{self.post.id}/moderate/', {'status': Post.STATUS_PUBLISHED}, format='json')
+        self.assertCounts(replies=1, category_posts=1, category_comments=1)
+        self.client.delete(f'/api/forum/posts/{self.post.id}/')
+        self.assertCounts(replies=1, category_posts=0, category_comments=1)
+        self.assertReconciled()
+
+    def test_post_edit_moves_counts_between_categories(self):
+        self.comment()
+        self.comment()
+        other = ForumCategory.objects.create(name='攻略', slug='guides')
+        response = self.client.patch(f'/api/forum/posts/{self.post.id}/', {'category': other.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertCounts(replies=2, category_posts=0, category_comments=0)
+        other.refresh_from_db()
+        self.assertEqual((other.post_count, other.comment_count), (1, 2))
+
+        # 隐藏的帖子换回原分区时只移动评论数，不再扣减帖子数
+        self.client.force_authenticate(self.moderator)
+        self.client.post(f'/api/forum/posts/{self.post.id}/moderate/', {'status': Post.STATUS_HIDDEN}, format='json')
+        response = self.client.patch(f'/api/forum/posts/{self.post.id}/', {'category': self.category.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        other.refresh_from_db()
+        self.assertEqual((other.post_count, other.comment_count), (0, 0))
+        self.assertCounts(replies=2, category_posts=0, category_comments=2)
+        self.assertReconciled()
+
+    def test_reactions_and_reports(self):
+        comment_id = self.comment()
+        for expected in (1, 0, 1):
+            response = self.client.post(f'/api/forum/posts/{self.post.id}/react/')
+            self.assertEqual(response.data['like_count'], expected)
+        response = self.client.post(f'/api/forum/comments/{comment_id}/react/')
+        self.assertEqual(response.data['like_count'], 1)
+
+        response = self.client.post('/api/forum/reports/', {'post': self.post.id, 'reason': 'spam'}, format='json')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.report_count, 1)
+        self.client.force_authenticate(self.moderator)
+        self.client.post(f"/api/forum/reports/{response.data['id']}/resolve/")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.report_count, 0)
+        self.assertReconciled()
+
+    def test_reconcile_fixes_drift(self):
+        self.comment()
+        Post.objects.filter(id=self.post.id).update(reply_count=7, like_count=3)
+        Comment.objects.update(like_count=5)
+        ForumCategory.objects.filter(id=self.category.id).update(post_count=0, comment_count=9)
+        ForumReport.objects.create(reporter=self.author, post=self.post, reason='spam')
+
+        self.assertEqual(reconcile_counters(), {'post': 1, 'comment': 1, 'category': 1})
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.reply_count, self.post.like_count, self.post.report_count), (1, 0, 1))
+        self.assertCounts(replies=1, category_posts=1, category_comments=1)
+        self.assertReconciled()
+
+    def test_hot_score_follows_counters(self):
+        self.post.refresh_from_db()
+        initial = self.post.hot_score
+        self.assertGreater(initial, 0)
+        self.comment()
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.hot_score, initial)
+
+        # 后台/脚本直接创建的帖子也有热度
+        older = Post.objects.create(
+            title='旧帖', content='正文', author=self.author, category=self.category,
+            published_at=self.post.published_at - timedelta(days=3),
+        )
+        older.refresh_from_db()
+        self.assertNotEqual(older.hot_score, 0)
+        response = self.client.get('/api/forum/posts/', {'ordering': 'hot'})
+        self.assertEqual([item['id'] for item in response.data['results']], [self.post.id, older.id])
+
+        Post.objects.filter(id=older.id).update(hot_score=0)
+        self.assertEqual(reconcile_counters()['post'], 1)
+        older.refresh_from_db()
+        self.assertNotEqual(older.hot_score, 0)
+        self.assertReconciled()
+
+
+class PostViewCountTests(APITestCase):
+    def setUp(self):
+        self.redis = counters._redis()
+        self.clear_redis()
+        self.addCleanup(self.clear_redis)
+        author = User.objects.create_user(username='author', email='author@example.com', password='pass')
+        category = ForumCategory.objects.create(name='综合', slug='general')
+        self.post = Post.objects.create(title='帖子', content='正文', author=author, category=category, view_count=10)
+        self.url = f'/api/forum/posts/{self.post.id}/'
+
+    def clear_redis(self):
+        seen = list(self.redis.scan_iter(f'{SEEN_KEY_PREFIX}:*'))
+        self.redis.delete(PENDING_KEY, FLUSHING_KEY, FLUSH_LOCK_KEY, *seen)
+
+    def view_count_in_db(self):
+        self.post.refresh_from_db()
+        return self.post.view_count
+
+    @override_settings(FORUM_VIEW_DEDUP_SECONDS=60)
+    def test_repeat_views_within_window_count_once(self):
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR='10.0.0.1').data['view_count'], 11)
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR='10.0.0.1').data['view_count'], 11)
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR='10.0.0.2').data['view_count'], 12)
+        self.assertEqual(self.view_count_in_db(), 10)
+
+    def test_pending_views_are_merged_until_flushed(self):
+        for _ in range(3):
+            record_view(self.post.id)
+        response = self.client.get('/api/forum/posts/')
+        self.assertEqual(response.data['results'][0]['view_count'], 13)
+
+        self.assertEqual(flush_pending_views(), 1)
+        self.assertEqual(self.view_count_in_db(), 13)
+        response = self.client.get('/api/forum/posts/')
+        self.assertEqual(response.data['results'][0]['view_count'], 13)
+        # 已落库的增量不会再被应用
+        self.assertEqual(flush_pending_views(), 0)
+        self.assertEqual(self.view_count_in_db(), 13)
+
+    def test_leftover_batch_is_applied_once(self):
+        # 上次落库在提交前中断：处理中的键仍在，新的浏览写入累积哈希
+        self.redis.hset(FLUSHING_KEY, self.post.id, 2)
+        record_view(self.post.id)
+        self.assertEqual(flush_pending_views(), 1)
+        self.assertEqual(self.view_count_in_db(), 12)
+        self.assertEqual(flush_pending_views(), 1)
+        self.assertEqual(self.view_count_in_db(), 13)
+
+    def test_concurrent_flush_is_skipped(self):
+        record_view(self.post.id)
+        lock = self.redis.lock(FLUSH_LOCK_KEY, timeout=60)
+        self.assertTrue(lock.acquire(blocking=False))
+        self.assertEqual(flush_pending_views(), 0)
+        self.assertEqual(self.view_count_in_db(), 10)
+        lock.release()
+        self.assertEqual(flush_pending_views(), 1)
+        self.assertEqual(self.view_count_in_db(), 11)
+
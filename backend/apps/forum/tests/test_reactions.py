@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from apps.forum.models import Comment, ForumCategory, ForumReaction, Post
+
+User = get_user_model()
+
+
+class ForumReactionTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fan', email='fan@example.com', password='pass')
+        category = ForumCategory.objects.create(name='综合', slug='general')
+        self.post = Post.objects.create(title='帖子', content='<p>正文</p>', author=self.user, category=category)
+        self.comment = Comment.objects.create(post=self.post, author=self.user, content='评论')
+        self.client.force_authenticate(self.user)
+
+    def test_toggle_is_single_statement(self):
+        url = f'/api/forum/posts/{self.post.id}/react/'
+        self.client.post(url)  # 预热认证等与表态无关的查询
+        self.client.post(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url)
+        self.assertEqual(response.data, {'active': True, 'like_count': 1})
+        reaction_queries = [q['sql'] for q in queries.captured_queries if 'forum_forumreaction' in q['sql']]
+        self.assertEqual(len(reaction_queries), 1)
+
+        response = self.client.post(url)
+        self.assertEqual(response.data, {'active': False, 'like_count': 0})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_explicit_state_is_idempotent(self):
+        url = f'/api/forum/comments/{self.comment.id}/react/'
+        for _ in range(2):
+            response = self.client.post(url, {'active': True}, format='json')
+            self.assertEqual(response.data, {'active': True, 'like_count': 1})
+        self.client.post(url, {'reaction': 'heart', 'active': True}, format='json')
+        for _ in range(2):
+            response = self.client.post(url, {'active': False}, format='json')
+            self.assertEqual(response.data, {'active': False, 'like_count': 0})
+        self.assertEqual(ForumReaction.objects.filter(comment=self.comment).count(), 1)
+
+    def test_batch_state(self):
+        self.client.post(f'/api/forum/posts/{self.post.id}/react/')
+        response = self.client.get(f'/api/forum/posts/reactions/?ids={self.post.id},999,abc')
+        self.assertEqual(response.data, {str(self.post.id): ['like'], '999': []})
+        response = self.client.get(f'/api/forum/comments/reactions/?ids={self.comment.id}')
+        self.assertEqual(response.data, {str(self.comment.id): []})
@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from apps.forum.models import Comment, ForumCategory, Post
+from apps.forum.search import build_query
+
+User = get_user_model()
+
+
+class ForumSearchTests(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='writer', email='writer@example.com', password='pass')
+        category = ForumCategory.objects.create(name='综合', slug='general')
+        self.post = Post.objects.create(
+            title='原神舞台剧观后感',
+            content='<p>这次 <b>ChinaJoy</b> 的舞美很棒</p>',
+            author=user,
+            category=category,
+        )
+        Post.objects.create(title='招新', content='<p>舞台<span>剧</span>社团招新</p>', author=user, category=category)
+        Comment.objects.create(post=self.post, author=user, content='灯光和舞美都很用心')
+
+    def test_build_query(self):
+        self.assertEqual(build_query('原神舞台 cj'), "('原神' <-> '神舞' <-> '舞台') & 'cj':*")
+        self.assertEqual(build_query('神 c'), "'神' & 'c':*")
+        self.assertIsNone(build_query('！？'))
+
+    def test_single_cjk_char_matches_either_side_of_bigram(self):
+        # "神"只作为"原神"的后一个字出现，"原"只作为前一个字出现
+        response = self.client.get('/api/forum/posts/search/', {'q': '神'})
+        self.assertEqual([item['title'] for item in response.data['results']], ['原神舞台剧观后感'])
+        response = self.client.get('/api/forum/posts/search/', {'q': '原'})
+        self.assertEqual(response.data['count'], 1)
+        response = self.client.get('/api/forum/posts/search/', {'q': '剧'})
+        self.assertEqual(response.data['count'], 2)
+        response = self.client.get('/api/forum/comments/search/', {'q': '光'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertIn('<mark>光</mark>', response.data['results'][0]['highlight'])
+
+    def test_post_search_ranks_and_highlights(self):
+        response = self.client.get('/api/forum/posts/search/', {'q': '舞台剧'})
+        self.assertEqual([item['title'] for item in response.data['results']], ['原神舞台剧观后感', '招新'])
+
+        response = self.client.get('/api/forum/posts/search/', {'q': 'chinajoy'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertIn('<mark>ChinaJoy</mark>', response.data['results'][0]['highlight'])
+        self.assertNotIn('<b>', response.data['results'][0]['highlight'])
+
+        # 修改正文后检索文档随之更新
+        self.post.content = '<p>内容已修改</p>'
+        self.post.save()
+        response = self.client.get('/api/forum/posts/', {'search': 'chinajoy'})
+        self.assertEqual(response.data['count'], 0)
+
+    def test_comment_search(self):
+        response = self.client.get('/api/forum/comments/search/', {'q': '舞美'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['post_title'], '原神舞台剧观后感')
+        self.assertIn('<mark>舞美</mark>', response.data['results'][0]['highlight'])
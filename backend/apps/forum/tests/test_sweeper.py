@@ -0,0 +1,102 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.forum.models import ForumAttachment, ForumCategory, Post
+from apps.forum.sweeper import sweep_orphaned_attachments
+
+from .test_attachments import LOCAL_STORAGES
+
+User = get_user_model()
+
+
+class AttachmentSweeperTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root, STORAGES=LOCAL_STORAGES)
+        self.override.enable()
+        self.user = User.objects.create_user(username='sweeper', email='sweeper@example.com', password='pass')
+        self.category = ForumCategory.objects.create(name='综合', slug='general')
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def attachment(self, name, data=b'x' * 100, content_hash=''):
+        attachment = ForumAttachment(author=self.user, size=len(data), content_hash=content_hash)
+        attachment.file.save(name, ContentFile(data), save=False)
+        attachment.save()
+        ForumAttachment.objects.filter(id=attachment.id).update(created_at=timezone.now() - timedelta(days=2))
+        return attachment
+
+    def test_sweep_marks_and_purges_unreferenced_uploads(self):
+        used = self.attachment('used.jpg')
+        orphan = self.attachment('orphan.jpg', b'y' * 300, content_hash='a' * 64)
+        variant = f'forum/variants/aa/{"a" * 64}/sm.webp'
+        storage = orphan.file.storage
+        storage.save(variant, ContentFile(b'z' * 50))
+        ForumAttachment.objects.filter(id=orphan.id).update(variants={'sm': {'width': 1, 'height': 1, 'webp': variant}})
+        # 去重后指向同一文件的另一条附件仍被引用，文件必须保留
+        shared = ForumAttachment.objects.create(author=self.user, file=used.file.name, size=100)
+        post = Post.objects.create(
+            title='带图帖子',
+            content='',
+            content_json={'type': 'doc', 'content': [
+                {'type': 'image', 'attrs': {'src': f'/media/{used.file.name}'}},
+            ]},
+            author=self.user,
+            category=self.category,
+        )
+
+        report = sweep_orphaned_attachments(ttl_hours=24, grace_hours=24)
+        self.assertEqual((report['attached'], report['orphaned'], report['purged']), (1, 1, 0))
+        used.refresh_from_db()
+        self.assertEqual((used.status, used.post_id), (ForumAttachment.STATUS_ATTACHED, post.id))
+
+        ForumAttachment.objects.filter(id=orphan.id).update(orphaned_at=timezone.now() - timedelta(days=2))
+        ForumAttachment.objects.filter(id=shared.id).update(
+            status=ForumAttachment.STATUS_ORPHANED, orphaned_at=timezone.now() - timedelta(days=2)
+        )
+        dry_run = sweep_orphaned_attachments(ttl_hours=24, grace_hours=24, dry_run=True)
+        self.assertTrue(storage.exists(orphan.file.name))
+
+        report = sweep_orphaned_attachments(ttl_hours=24, grace_hours=24)
+        self.assertEqual(report, dry_run)
+        self.assertEqual((report['purged'], report['deleted_files'], report['reclaimed_bytes']), (2, 2, 350))
+        self.assertFalse(storage.exists(orphan.file.name))
+        self.assertFalse(storage.exists(variant))
+        self.assertTrue(storage.exists(used.file.name))
+        orphan.refresh_from_db()
+        self.assertEqual((orphan.file.name, orphan.variants), ('', {}))
+
+    def test_non_ascii_names_are_matched_in_html_and_json(self):
+        in_html = self.attachment('截图一.png')
+        in_json = self.attachment('截图二.png')
+        html_post = Post.objects.create(
+            title='HTML 正文',
+            content=f'<p><img src="/media/{quote(in_html.file.name)}"></p>',
+            author=self.user,
+            category=self.category,
+        )
+        json_post = Post.objects.create(
+            title='JSON 正文',
+            content='',
+            content_json={'type': 'doc', 'content': [
+                {'type': 'image', 'attrs': {'src': f'/media/{in_json.file.name}'}},
+            ]},
+            author=self.user,
+            category=self.category,
+        )
+
+        report = sweep_orphaned_attachments(ttl_hours=24, grace_hours=24)
+        self.assertEqual((report['attached'], report['orphaned']), (2, 0))
+        in_html.refresh_from_db()
+        in_json.refresh_from_db()
+        self.assertEqual((in_html.status, in_html.post_id), (ForumAttachment.STATUS_ATTACHED, html_post.id))
+        self.assertEqual((in_json.status, in_json.post_id), (ForumAttachment.STATUS_ATTACHED, json_post.id))
@@ -1,12 +1,35 @@
-from django.db.models import F, Q
+from django.db.models import Q
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from .comment_tree import (
+    DEFAULT_REPLY_LIMIT,
+    DEFAULT_ROOT_LIMIT,
+    MAX_REPLY_LIMIT,
+    MAX_ROOT_LIMIT,
+    InvalidCursor,
+    attach_replies,
+    load_comment_page,
+    load_reply_page,
+)
+from .counters import (
+    comment_is_counted,
+    merge_pending_views,
+    post_is_counted,
+    record_view,
+    sync_comment_visibility,
+    sync_post_update,
+    sync_post_visibility,
+    sync_report_status,
+)
 from .models import Comment, ForumAttachment, ForumCategory, ForumReaction, ForumReport, ForumTag, ModerationLog, Post
-from .permissions import ForumCommentPermission, ForumPostPermission, IsForumModerator, is_moderator
+from .permissions import ForumCommentPermission, ForumPostPermission, IsForumModerator, request_is_moderator
+from .ranking import HOT_ORDERING
+from .reactions import LIKE, MAX_REACTION_LENGTH, parse_ids, reaction_states, set_reaction
+from .search import extract_plain_text, highlight_terms, make_snippet, search_queryset
 from .serializers import (
     CommentSerializer,
     ForumAttachmentSerializer,
@@ -21,22 +44,29 @@ from .serializers import (
 )
 
 
-def recount_post(post):
-    post.reply_count = post.comments.filter(is_active=True, status=Comment.STATUS_PUBLISHED).count()
-    post.like_count = post.reactions.filter(reaction='like').count()
-    post.report_count = post.reports.filter(status=ForumReport.STATUS_PENDING).count()
-    post.save(update_fields=['reply_count', 'like_count', 'report_count'])
+def int_param(request, name, default, maximum):
+    try:
+        value = int(request.query_params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(value, maximum))
+
 
+def react_response(request, target_type, target):
+    reaction = str(request.data.get('reaction') or LIKE)
+    if len(reaction) > MAX_REACTION_LENGTH:
+        return Response({'error': '无效的表态类型'}, status=400)
+    active = request.data.get('active')
+    if active is not None:
+        active = str(active).lower() in ('1', 'true')
+    active, like_count = set_reaction(request.user.id, target_type, target.id, reaction, active)
+    return Response({'active': active, 'like_count': like_count})
 
-def recount_category(category_id):
-    category = ForumCategory.objects.get(id=category_id)
-    category.post_count = category.posts.filter(is_active=True, status=Post.STATUS_PUBLISHED).count()
-    category.comment_count = Comment.objects.filter(
-        post__category_id=category_id,
-        is_active=True,
-        status=Comment.STATUS_PUBLISHED,
-    ).count()
-    category.save(update_fields=['post_count', 'comment_count'])
+
+def reaction_state_response(request, target_type):
+    ids = parse_ids(request.query_params.get('ids'))
+    states = reaction_states(request.user, target_type, ids)
+    return Response({str(target_id): reactions for target_id, reactions in states.items()})
 
 
 def log_moderation(actor, action, *, post=None, comment=None, reason=''):
@@ -53,7 +83,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return [permissions.IsAuthenticated(), IsForumModerator()]
 
     def get_queryset(self):
-        if is_moderator(self.request.user):
+        if request_is_moderator(self.request):
             return ForumCategory.objects.all()
         return ForumCategory.objects.filter(is_active=True)
 
@@ -70,19 +100,30 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
 
 class PostViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, ForumPostPermission]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['category', 'author', 'status', 'is_pinned', 'is_featured', 'is_locked']
-    search_fields = ['title', 'content', 'excerpt']
-    ordering_fields = ['created_at', 'updated_at', 'last_commented_at', 'view_count', 'reply_count', 'like_count']
+    ordering_fields = [
+        'created_at', 'updated_at', 'last_commented_at', 'view_count', 'reply_count', 'like_count', 'hot_score'
+    ]
 
     def get_queryset(self):
         qs = (
             Post.objects
             .select_related('author', 'category', 'last_commented_by')
             .prefetch_related('tags')
+            .defer('search_vector')
         )
+        ordering = self.request.query_params.get('ordering')
+        search = self.request.query_params.get('search', '').strip()
+        if search and self.action != 'search':
+            qs = search_queryset(qs, search)
+            if not ordering:
+                qs = qs.order_by('-search_rank', '-id')
+        if ordering == 'hot':
+            # 不在 ordering_fields 中，OrderingFilter 会保留这里的排序，走 forum_post_hot_idx
+            qs = qs.order_by(*HOT_ORDERING)
         user = self.request.user
-        if is_moderator(user):
+        if request_is_moderator(self.request):
             return qs.filter(is_active=True)
         if user.is_authenticated:
             return qs.filter(
@@ -98,27 +139,65 @@ class PostViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         post = serializer.save(author=self.request.user, published_at=timezone.now())
-        recount_category(post.category_id)
+        sync_post_visibility(post, was_counted=False)
 
     def perform_update(self, serializer):
-        serializer.save()
+        instance = serializer.instance
+        old_category_id, was_counted = instance.category_id, post_is_counted(instance)
+        post = serializer.save()
+        sync_post_update(post, old_category_id, was_counted)
 
     def perform_destroy(self, instance):
+        was_counted = post_is_counted(instance)
         instance.status = Post.STATUS_DELETED
         instance.is_active = False
         instance.deleted_at = timezone.now()
         instance.deleted_by = self.request.user
         instance.save(update_fields=['status', 'is_active', 'deleted_at', 'deleted_by'])
-        recount_category(instance.category_id)
+        sync_post_visibility(instance, was_counted)
         log_moderation(self.request.user, ModerationLog.ACTION_DELETE, post=instance)
 
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        return merge_pending_views(page) if page is not None else None
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        Post.objects.filter(id=instance.id).update(view_count=F('view_count') + 1)
-        instance.refresh_from_db()
+        instance.view_count += record_view(instance.id, request)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """全文检索帖子，按相关度排序并返回高亮摘要，?q="""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': '请输入搜索关键词'}, status=400)
+        qs = search_queryset(self.filter_queryset(self.get_queryset()), query).order_by('-search_rank', '-id')
+        page = self.paginate_queryset(qs)
+        terms = highlight_terms(query)
+        data = PostListSerializer(page, many=True, context=self.get_serializer_context()).data
+        for item, post in zip(data, page):
+            item['rank'] = post.search_rank
+            item['highlight'] = make_snippet(extract_plain_text(post.content, post.content_json), terms)
+        return self.get_paginated_response(data)
+
+    @action(detail=True, methods=['get'])
+    def comments(self, request, pk=None):
+        """分页获取根评论（每条附带前几条回复），?cursor=&limit=&replies="""
+        post = self.get_object()
+        try:
+            roots, next_cursor = load_comment_page(
+                post,
+                cursor=request.query_params.get('cursor'),
+                limit=int_param(request, 'limit', DEFAULT_ROOT_LIMIT, MAX_ROOT_LIMIT),
+                reply_limit=int_param(request, 'replies', DEFAULT_REPLY_LIMIT, MAX_REPLY_LIMIT),
+            )
+        except InvalidCursor:
+            return Response({'error': '无效的分页游标'}, status=400)
+        data = CommentSerializer(roots, many=True, context=self.get_serializer_context()).data
+        return Response({'results': data, 'next_cursor': next_cursor})
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated, IsForumModerator])
     def moderate(self, request, pk=None):
         post = self.get_object()
@@ -127,6 +206,7 @@ class PostViewSet(viewsets.ModelViewSet):
         data = serializer.validated_data
         reason = data.get('reason', '')
         log_fields = []
+        was_counted = post_is_counted(post)
 
         if 'is_pinned' in data and post.is_pinned != data['is_pinned']:
             post.is_pinned = data['is_pinned']
@@ -147,27 +227,20 @@ class PostViewSet(viewsets.ModelViewSet):
                 log_fields.append(ModerationLog.ACTION_RESTORE)
 
         post.save()
+        sync_post_visibility(post, was_counted)
         for action_name in log_fields:
             log_moderation(request.user, action_name, post=post, reason=reason)
         return Response(PostDetailSerializer(post, context={'request': request}).data)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def react(self, request, pk=None):
-        post = self.get_object()
-        reaction, created = ForumReaction.objects.get_or_create(
-            user=request.user,
-            target_type=ForumReaction.TARGET_POST,
-            post=post,
-            reaction=request.data.get('reaction', 'like'),
-        )
-        if not created:
-            reaction.delete()
-            active = False
-        else:
-            active = True
-        recount_post(post)
-        post.refresh_from_db()
-        return Response({'active': active, 'like_count': post.like_count})
+        """切换表态；传 active=true/false 时为幂等设置"""
+        return react_response(request, ForumReaction.TARGET_POST, self.get_object())
+
+    @action(detail=False, methods=['get'])
+    def reactions(self, request):
+        """当前用户对一页帖子的表态，?ids=1,2,3"""
+        return reaction_state_response(request, ForumReaction.TARGET_POST)
 
 
 class CommentViewSet(viewsets.ModelViewSet):
@@ -178,60 +251,102 @@ class CommentViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'like_count']
 
     def get_queryset(self):
-        qs = Comment.objects.select_related('author', 'post').prefetch_related('replies__author')
-        if is_moderator(self.request.user):
+        qs = Comment.objects.select_related('author', 'post').defer('search_vector', 'post__search_vector')
+        if request_is_moderator(self.request):
             return qs.filter(is_active=True)
         return qs.filter(is_active=True, status=Comment.STATUS_PUBLISHED, post__status=Post.STATUS_PUBLISHED)
 
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            attach_replies(page)
+        return page
+
     def perform_create(self, serializer):
         comment = serializer.save(author=self.request.user)
         Post.objects.filter(id=comment.post_id).update(
             last_commented_at=comment.created_at,
             last_commented_by_id=comment.author_id,
         )
-        recount_post(comment.post)
-        recount_category(comment.post.category_id)
+        sync_comment_visibility(comment, was_counted=False)
 
     def perform_destroy(self, instance):
+        was_counted = comment_is_counted(instance)
         instance.status = Comment.STATUS_DELETED
         instance.is_active = False
         instance.deleted_at = timezone.now()
         instance.deleted_by = self.request.user
         instance.save(update_fields=['status', 'is_active', 'deleted_at', 'deleted_by'])
-        recount_post(instance.post)
-        recount_category(instance.post.category_id)
+        sync_comment_visibility(instance, was_counted)
         log_moderation(self.request.user, ModerationLog.ACTION_DELETE, comment=instance)
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """全文检索评论，?q="""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': '请输入搜索关键词'}, status=400)
+        qs = search_queryset(self.filter_queryset(self.get_queryset()), query).order_by('-search_rank', '-id')
+        page = self.paginator.paginate_queryset(qs, request, view=self)
+        terms = highlight_terms(query)
+        for comment in page:
+            comment.prefetched_replies = []
+        data = CommentSerializer(page, many=True, context=self.get_serializer_context()).data
+        for item, comment in zip(data, page):
+            item['post_title'] = comment.post.title
+            item['rank'] = comment.search_rank
+            item['highlight'] = make_snippet(extract_plain_text(comment.content), terms)
+        return self.get_paginated_response(data)
+
+    @action(detail=True, methods=['get'])
+    def replies(self, request, pk=None):
+        """继续加载某条根评论的回复，?cursor=&limit="""
+        comment = self.get_object()
+        try:
+            replies, next_cursor = load_reply_page(
+                comment,
+                cursor=request.query_params.get('cursor'),
+                limit=int_param(request, 'limit', MAX_REPLY_LIMIT, MAX_REPLY_LIMIT),
+            )
+        except InvalidCursor:
+            return Response({'error': '无效的分页游标'}, status=400)
+        data = CommentSerializer(replies, many=True, context=self.get_serializer_context()).data
+        return Response({'results': data, 'next_cursor': next_cursor})
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def react(self, request, pk=None):
-        comment = self.get_object()
-        reaction, created = ForumReaction.objects.get_or_create(
-            user=request.user,
-            target_type=ForumReaction.TARGET_COMMENT,
-            comment=comment,
-            reaction=request.data.get('reaction', 'like'),
-        )
-        if not created:
-            reaction.delete()
-            active = False
-        else:
-            active = True
-        comment.like_count = comment.reactions.filter(reaction='like').count()
-        comment.save(update_fields=['like_count'])
-        return Response({'active': active, 'like_count': comment.like_count})
+        """切换表态；传 active=true/false 时为幂等设置"""
+        return react_response(request, ForumReaction.TARGET_COMMENT, self.get_object())
+
+    @action(detail=False, methods=['get'])
+    def reactions(self, request):
+        """当前用户对一页评论的表态，?ids=1,2,3"""
+        return reaction_state_response(request, ForumReaction.TARGET_COMMENT)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated, IsForumModerator])
     def hide(self, request, pk=None):
         comment = self.get_object()
+        was_counted = comment_is_counted(comment)
         comment.status = Comment.STATUS_HIDDEN
         comment.hidden_at = timezone.now()
         comment.hidden_by = request.user
         comment.save(update_fields=['status', 'hidden_at', 'hidden_by'])
-        recount_post(comment.post)
-        recount_category(comment.post.category_id)
+        sync_comment_visibility(comment, was_counted)
         log_moderation(request.user, ModerationLog.ACTION_HIDE, comment=comment, reason=request.data.get('reason', ''))
         return Response(CommentSerializer(comment, context={'request': request}).data)
 
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated, IsForumModerator])
+    def restore(self, request, pk=None):
+        comment = self.get_object()
+        was_counted = comment_is_counted(comment)
+        comment.status = Comment.STATUS_PUBLISHED
+        comment.hidden_at = None
+        comment.hidden_by = None
+        comment.save(update_fields=['status', 'hidden_at', 'hidden_by'])
+        sync_comment_visibility(comment, was_counted)
+        log_moderation(request.user, ModerationLog.ACTION_RESTORE, comment=comment, reason=request.data.get('reason', ''))
+        return Response(CommentSerializer(comment, context={'request': request}).data)
+
 
 class AttachmentViewSet(viewsets.ModelViewSet):
     serializer_class = ForumAttachmentSerializer
@@ -239,7 +354,7 @@ class AttachmentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = ForumAttachment.objects.select_related('author', 'post', 'comment')
-        if is_moderator(self.request.user):
+        if request_is_moderator(self.request):
             return qs
         return qs.filter(author=self.request.user)
 
@@ -256,30 +371,23 @@ class ReportViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = ForumReport.objects.select_related('reporter', 'post', 'comment', 'handled_by')
-        if is_moderator(self.request.user):
+        if request_is_moderator(self.request):
             return qs
         return qs.filter(reporter=self.request.user)
 
     def perform_create(self, serializer):
         report = serializer.save(reporter=self.request.user)
-        if report.post:
-            recount_post(report.post)
-        if report.comment:
-            report.comment.report_count = report.comment.reports.filter(status=ForumReport.STATUS_PENDING).count()
-            report.comment.save(update_fields=['report_count'])
+        sync_report_status(report, was_pending=False)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated, IsForumModerator])
     def resolve(self, request, pk=None):
         report = self.get_object()
+        was_pending = report.status == ForumReport.STATUS_PENDING
         report.status = request.data.get('status', ForumReport.STATUS_RESOLVED)
         report.handled_by = request.user
         report.handled_at = timezone.now()
         report.save(update_fields=['status', 'handled_by', 'handled_at'])
-        if report.post:
-            recount_post(report.post)
-        if report.comment:
-            report.comment.report_count = report.comment.reports.filter(status=ForumReport.STATUS_PENDING).count()
-            report.comment.save(update_fields=['report_count'])
+        sync_report_status(report, was_pending)
         return Response(ForumReportSerializer(report, context={'request': request}).data)
 
 
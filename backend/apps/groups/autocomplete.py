@@ -0,0 +1,162 @@
+"""
+社团搜索自动补全
+
+每个进程在内存中维护一份启用社团的补全索引：社团名称的所有后缀（支持中间匹配）、
+名称拼音和首字母按音节切分的后缀、省份/城市/地址的所有后缀，统一转小写后放进一个有序列表，
+查询时用二分查找取出以输入为前缀的全部条目，再按"名称前缀命中优先、视频数多者
+优先"取前 N 个。查询本身不访问数据库。
+
+社团写入后在事务提交时删除缓存中的索引版本号；各进程每隔 VERSION_CHECK_INTERVAL 秒
+比对一次版本号，不一致时用一条查询重建索引。只有视频数/获奖数变化的保存不作废索引：
+视频数只影响排序，在本进程的索引中原地更新，其他进程在下次重建时更新。
+拼音依赖 pypinyin，未安装时只索引原文。
+"""
+
+import heapq
+import logging
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Group
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:
+    lazy_pinyin = None
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION_KEY = 'groups:autocomplete_version'
+VERSION_CHECK_INTERVAL = 2
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+_lock = threading.Lock()
+_state = {'index': None, 'version': None, 'checked_at': 0.0}
+
+
+def normalize(text):
+    return ''.join((text or '').split()).lower()
+
+
+def _suffixes(parts):
+    """按片段切分的后缀：['dong', 'man', 'she'] -> dongmanshe, manshe, she"""
+    return [''.join(parts[index:]) for index in range(len(parts))]
+
+
+def search_keys(group):
+    """返回 (名称相关的键, 其他键)"""
+    name = normalize(group['name'])
+    name_keys = set(_suffixes(list(name)))
+    if lazy_pinyin is not None:
+        syllables = [normalize(s) for s in lazy_pinyin(group['name']) if normalize(s)]
+        initials = [normalize(s)[:1] for s in lazy_pinyin(group['name'], style=Style.FIRST_LETTER) if normalize(s)]
+        name_keys.update(_suffixes(syllables))
+        name_keys.update(_suffixes(initials))
+    other_keys = set()
+    for field in ('province', 'city', 'location'):
+        other_keys.update(_suffixes(list(normalize(group[field]))))
+    return name_keys, other_keys
+
+
+class GroupAutocompleteIndex:
+    def __init__(self, groups):
+        # groups 已按名称排序，空查询直接按名称返回
+        self.groups = groups
+        entries = []
+        for position, group in enumerate(groups):
+            name_keys, other_keys = search_keys(group)
+            entries.extend((key, position) for key in name_keys)
+            entries.extend((key, position) for key in other_keys - name_keys)
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.positions = [position for _, position in entries]
+        self.names = [normalize(group['name']) for group in groups]
+        self.by_id = {group['id']: group for group in groups}
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        query = normalize(query)
+        if not query:
+            return self.groups[:limit]
+        matched = set()
+        start = bisect_left(self.keys, query)
+        for index in range(start, len(self.keys)):
+            if not self.keys[index].startswith(query):
+                break
+            matched.add(self.positions[index])
+        best = heapq.nsmallest(
+            limit,
+            matched,
+            key=lambda position: (
+                not self.names[position].startswith(query),
+                -self.groups[position]['video_count'],
+                self.names[position],
+            ),
+        )
+        return [self.groups[position] for position in best]
+
+
+def build_index():
+    groups = list(
+        Group.objects
+        .filter(is_active=True)
+        .order_by('name')
+        .values('id', 'name', 'province', 'city', 'location', 'video_count', 'is_active')
+    )
+    for group in groups:
+        group['location'] = group['location'] or ''
+        group['display_location'] = group['location'] or f"{group['province'] or ''}{group['city'] or ''}".strip()
+    return GroupAutocompleteIndex(groups)
+
+
+def _current_version():
+    version = cache.get(INDEX_VERSION_KEY)
+    if version is None:
+        cache.add(INDEX_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(INDEX_VERSION_KEY)
+    return version
+
+
+def get_index():
+    now = time.monotonic()
+    if _state['index'] is not None and now - _state['checked_at'] < VERSION_CHECK_INTERVAL:
+        return _state['index']
+    with _lock:
+        version = _current_version()
+        if _state['index'] is None or version != _state['version']:
+            started = time.monotonic()
+            _state['index'] = build_index()
+            _state['version'] = version
+            logger.info(f'社团补全索引已重建，共 {len(_state["index"].groups)} 个社团，耗时 {time.monotonic() - started:.3f}s')
+        _state['checked_at'] = now
+    return _state['index']
+
+
+def _reset():
+    cache.delete(INDEX_VERSION_KEY)
+    _state['index'] = None
+
+
+def invalidate_index():
+    """事务提交后作废所有进程的补全索引"""
+    transaction.on_commit(_reset)
+
+
+def update_video_count(group_id, video_count):
+    """事务提交后在本进程的索引中更新社团视频数，不重建索引"""
+    def patch():
+        index = _state['index']
+        group = index.by_id.get(group_id) if index is not None else None
+        if group is not None:
+            group['video_count'] = video_count
+
+    transaction.on_commit(patch)
+
+
+def autocomplete_groups(query, limit=DEFAULT_LIMIT):
+    return get_index().search(query, max(1, min(limit, MAX_LIMIT)))
@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 import uuid
 
@@ -58,4 +61,136 @@ class Group(models.Model):
         return self.name
     
     def get_absolute_url(self):
-        return f'/groups/{self.id}/'
\ No newline at end of file
+        return f'/groups/{self.id}/'
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Group)
+def group_profile_changed(sender, instance, **kwargs):
+    from .profile import invalidate_group_profiles
+    invalidate_group_profiles([instance.pk])
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Group)
+def group_autocomplete_changed(sender, instance, update_fields=None, **kwargs):
+    """名称、地区和启用状态变化时重建补全索引；只改计数时原地更新视频数"""
+    from .autocomplete import invalidate_index, update_video_count
+    if update_fields is not None and set(update_fields) <= {'video_count', 'award_count'}:
+        if 'video_count' in update_fields:
+            update_video_count(instance.pk, instance.video_count)
+        return
+    invalidate_index()
+
+
+@receiver(pre_save, sender='videos.Video')
+@receiver(pre_save, sender='awards.AwardRecord')
+def group_profile_member_saving(sender, instance, **kwargs):
+    # 视频或获奖记录改到其他社团时，原社团的主页也需要作废
+    if not instance._state.adding:
+        instance._profile_group_id = sender.objects.filter(pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_delete, sender='videos.Video')
+@receiver(post_save, sender='videos.Video')
+@receiver(post_delete, sender='awards.AwardRecord')
+@receiver(post_save, sender='awards.AwardRecord')
+def group_profile_member_changed(sender, instance, **kwargs):
+    from .profile import invalidate_group_profiles
+    invalidate_group_profiles([instance.group_id, getattr(instance, '_profile_group_id', None)])
+
+
+@receiver(m2m_changed, sender='users.User_managed_groups')
+def group_profile_managers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    from .profile import invalidate_group_profiles
+    if reverse:
+        invalidate_group_profiles([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_group_profiles(instance.managed_groups.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        invalidate_group_profiles(pk_set or [])
+
+
+def _group_ids(condition):
+    return Group.objects.filter(condition).order_by().values_list('id', flat=True).distinct()
+
+
+# 主页中还冗余展示了比赛/奖项/年份名称、视频标签和用户名，这些对象修改后作废引用它们的社团
+@receiver(post_save, sender='awards.Award')
+def group_profile_award_changed(sender, instance, created, **kwargs):
+    if not created:
+        from .profile import invalidate_group_profiles
+        invalidate_group_profiles(_group_ids(Q(award_records__award=instance)))
+
+
+@receiver(post_save, sender='competitions.CompetitionYear')
+def group_profile_competition_year_changed(sender, instance, created, **kwargs):
+    if not created:
+        from .profile import invalidate_group_profiles
+        invalidate_group_profiles(_group_ids(Q(award_records__competition_year=instance)))
+
+
+@receiver(post_save, sender='competitions.Competition')
+@receiver(pre_delete, sender='competitions.Competition')
+def group_profile_competition_changed(sender, instance, created=False, **kwargs):
+    # 删除比赛时视频的 competition 被置空，不会触发视频的信号，需在删除前查出社团
+    if not created:
+        from .profile import invalidate_group_profiles
+        invalidate_group_profiles(_group_ids(Q(videos__competition=instance) | Q(award_records__award__competition=instance)))
+
+
+@receiver(post_save, sender='tags.Tag')
+def group_profile_tag_changed(sender, instance, created, update_fields=None, **kwargs):
+    # usage_count 随每次打标签变化，按它作废会让热门标签涉及的社团主页反复失效；
+    # 主页中标签的使用次数允许在 PROFILE_TIMEOUT 内滞后
+    if created or (update_fields is not None and set(update_fields) <= {'usage_count'}):
+        return
+    from .profile import invalidate_group_profiles
+    invalidate_group_profiles(_group_ids(Q(videos__tags=instance)))
+
+
+@receiver(post_delete, sender='tags.VideoTag')
+@receiver(post_save, sender='tags.VideoTag')
+def group_profile_video_tag_changed(sender, instance, **kwargs):
+    from .profile import invalidate_group_profiles
+    invalidate_group_profiles(_group_ids(Q(videos__id=instance.video_id)))
+
+
+@receiver(m2m_changed, sender='tags.VideoTag')
+def group_profile_video_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    from .profile import invalidate_group_profiles
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_group_profiles([instance.group_id])
+    elif action == 'pre_clear':
+        invalidate_group_profiles(_group_ids(Q(videos__tags=instance)))
+    elif action in ('post_add', 'post_remove'):
+        invalidate_group_profiles(_group_ids(Q(videos__id__in=pk_set or [])))
+
+
+def _user_group_ids(user):
+    return _group_ids(Q(managers=user) | Q(created_by=user) | Q(videos__uploaded_by=user))
+
+
+@receiver(pre_save, sender=User)
+def group_profile_user_saving(sender, instance, update_fields=None, **kwargs):
+    # 主页只展示用户名和昵称，登录等只更新其他字段的保存不需要查询
+    if instance._state.adding or (update_fields is not None and not {'username', 'nickname'} & set(update_fields)):
+        return
+    instance._profile_names = sender.objects.filter(pk=instance.pk).values_list('username', 'nickname').first()
+
+
+@receiver(post_save, sender=User)
+def group_profile_user_changed(sender, instance, created, **kwargs):
+    previous = instance.__dict__.pop('_profile_names', None)
+    if previous is not None and previous != (instance.username, instance.nickname):
+        from .profile import invalidate_group_profiles
+        invalidate_group_profiles(_user_group_ids(instance))
+
+
+@receiver(pre_delete, sender=User)
+def group_profile_user_deleted(sender, instance, **kwargs):
+    # 删除用户时管理员关系和 created_by/uploaded_by 的置空都不发信号
+    from .profile import invalidate_group_profiles
+    invalidate_group_profiles(_user_group_ids(instance))
+
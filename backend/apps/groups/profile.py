@@ -0,0 +1,141 @@
+"""
+社团主页聚合数据
+
+一次请求返回社团信息、计数、最新视频、最新获奖记录和管理员：计数用相关子查询
+注解在社团查询上，列表用带切片的 Prefetch（每个集合一条查询），总查询数固定。
+
+每个社团在缓存中有一个数据版本号，社团、视频、获奖记录或管理员变化时在事务提交后
+删除版本号；读取时版本号不存在就生成新的。主页中冗余展示的比赛/奖项/年份名称、
+视频标签和用户名修改时，同样作废引用它们的社团（见 apps.groups.models 中的信号），
+只有标签的使用次数允许在缓存有效期内滞后。组合好的数据按 (社团, 版本号) 缓存，
+版本号同时作为 ETag，客户端带 If-None-Match 命中时直接返回 304，不访问数据库。
+"""
+
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.awards.models import AwardRecord
+from apps.awards.serializers import AwardRecordSerializer
+from apps.videos.models import Video
+from apps.videos.serializers import VideoListSerializer
+
+from .models import Group
+from .serializers import GroupSerializer
+
+User = get_user_model()
+
+PROFILE_VERSION_KEY = 'groups:profile_version:{}'
+PROFILE_KEY = 'groups:profile:{}:{}'
+PROFILE_TIMEOUT = 60 * 60
+RECENT_VIDEO_LIMIT = 12
+RECENT_AWARD_LIMIT = 20
+
+
+def get_profile_version(group_id):
+    key = PROFILE_VERSION_KEY.format(group_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        # 并发时以先写入的为准
+        if not cache.add(key, version, PROFILE_TIMEOUT):
+            version = cache.get(key) or version
+    return version
+
+
+def profile_etag(version):
+    return f'"{version}"'
+
+
+def invalidate_group_profiles(group_ids):
+    """事务提交后作废这些社团的主页缓存"""
+    keys = [PROFILE_VERSION_KEY.format(group_id) for group_id in {str(g) for g in group_ids if g}]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _count_of(model, field='group'):
+    counts = (
+        model.objects
+        .filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def profile_queryset():
+    return (
+        Group.objects
+        .filter(is_active=True)
+        .select_related('created_by')
+        .annotate(
+            live_video_count=_count_of(Video),
+            live_award_count=_count_of(AwardRecord),
+            manager_count=_count_of(User.managed_groups.through),
+        )
+        .prefetch_related(
+            Prefetch(
+                'videos',
+                queryset=(
+                    Video.objects
+                    .select_related('uploaded_by', 'group', 'competition')
+                    .prefetch_related('tags')
+                    .order_by('-created_at')[:RECENT_VIDEO_LIMIT]
+                ),
+                to_attr='recent_videos',
+            ),
+            Prefetch(
+                'award_records',
+                queryset=(
+                    AwardRecord.objects
+                    .select_related('award__competition', 'competition_year', 'video', 'group')
+                    .order_by('-competition_year__year', '-created_at')[:RECENT_AWARD_LIMIT]
+                ),
+                to_attr='recent_awards',
+            ),
+            Prefetch(
+                'managers',
+                queryset=User.objects.only('id', 'username', 'nickname').order_by('username'),
+                to_attr='manager_list',
+            ),
+        )
+    )
+
+
+def build_group_profile(group):
+    """group 需来自 profile_queryset()"""
+    return {
+        'group': GroupSerializer(group).data,
+        'counts': {
+            'videos': group.live_video_count,
+            'awards': group.live_award_count,
+            'managers': group.manager_count,
+        },
+        'recent_videos': VideoListSerializer(group.recent_videos, many=True).data,
+        'recent_awards': AwardRecordSerializer(group.recent_awards, many=True).data,
+        # 公开接口只返回管理员的公开信息
+        'managers': [
+            {'id': str(user.id), 'username': user.username, 'nickname': user.nickname or ''}
+            for user in group.manager_list
+        ],
+    }
+
+
+def get_group_profile(group_id, version):
+    """返回缓存的主页数据，社团不存在或未启用时返回 None"""
+    key = PROFILE_KEY.format(group_id, version)
+    profile = cache.get(key)
+    if profile is None:
+        group = profile_queryset().filter(pk=group_id).first()
+        if group is None:
+            return None
+        profile = build_group_profile(group)
+        cache.set(key, profile, PROFILE_TIMEOUT)
+    return profile
@@ -0,0 +1,57 @@
+from unittest import skipIf
+
+from rest_framework.test import APITestCase
+
+from apps.groups import autocomplete
+from apps.groups.models import Group
+
+
+class GroupAutocompleteTests(APITestCase):
+    url = '/api/videos/search-groups/'
+
+    def setUp(self):
+        autocomplete._reset()
+        self.addCleanup(autocomplete._reset)
+        Group.objects.create(name='星海动漫社', province='浙江省', city='杭州市', video_count=3)
+        Group.objects.create(name='动漫研究会', province='上海市', city='上海市', video_count=10)
+        Group.objects.create(name='晨光社', province='浙江省', city='宁波市', video_count=50)
+        Group.objects.create(name='停用社团', is_active=False)
+
+    def names(self, search, **params):
+        response = self.client.get(self.url, {'search': search, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.data['results']]
+
+    def test_infix_and_region_matches_ranked_by_video_count(self):
+        self.assertEqual(self.names('动漫'), ['动漫研究会', '星海动漫社'])
+        self.assertEqual(self.names('漫社'), ['星海动漫社'])
+        self.assertEqual(self.names('浙江'), ['晨光社', '星海动漫社'])
+        self.assertEqual(self.names('波市'), ['晨光社'])
+        self.assertEqual(self.names('江省'), ['晨光社', '星海动漫社'])
+        self.assertEqual(self.names('停用'), [])
+        self.assertEqual(self.names('', page_size=2), ['动漫研究会', '星海动漫社'])
+
+        with self.assertNumQueries(0):
+            self.names('社')
+
+    def test_group_writes_refresh_index(self):
+        self.assertEqual(self.names('新社'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Group.objects.create(name='新社团')
+        self.assertEqual(self.names('新社'), ['新社团'])
+
+    @skipIf(autocomplete.lazy_pinyin is None, 'pypinyin 未安装')
+    def test_pinyin_and_initials(self):
+        self.assertEqual(self.names('dongman'), ['动漫研究会', '星海动漫社'])
+        self.assertEqual(self.names('xhdm'), ['星海动漫社'])
+
+    def test_video_count_only_save_patches_in_place(self):
+        self.assertEqual(self.names('浙江'), ['晨光社', '星海动漫社'])
+        group = Group.objects.get(name='星海动漫社')
+        group.video_count = 60
+        index = autocomplete.get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            group.save(update_fields=['video_count'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names('浙江'), ['星海动漫社', '晨光社'])
+        self.assertIs(autocomplete.get_index(), index)
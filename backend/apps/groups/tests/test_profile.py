@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from apps.awards.models import Award, AwardRecord
+from apps.competitions.models import Competition, CompetitionYear
+from apps.groups.models import Group
+from apps.groups.profile import PROFILE_VERSION_KEY, RECENT_VIDEO_LIMIT
+from apps.tags.models import Tag
+from apps.videos.models import Video
+
+User = get_user_model()
+
+
+class GroupProfileTests(APITestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name='测试社团')
+        self.url = f'/api/groups/{self.group.id}/profile/'
+        self.addCleanup(cache.delete, PROFILE_VERSION_KEY.format(self.group.id))
+        self.competition = competition = Competition.objects.create(name='测试比赛')
+        self.award = award = Award.objects.create(competition=competition, name='金奖')
+        year = CompetitionYear.objects.create(competition=competition, year=2025)
+        for index in range(RECENT_VIDEO_LIMIT + 3):
+            self.video = video = Video.objects.create(
+                bv_number=f'BV1GRP{index}', title=f'视频{index}',
+                url=f'https://www.bilibili.com/video/BV1GRP{index}', group=self.group, competition=competition,
+            )
+            AwardRecord.objects.create(award=award, group=self.group, video=video, competition_year=year)
+        self.manager = manager = User.objects.create_user(username='manager', email='m@example.com', password='pass')
+        manager.managed_groups.add(self.group)
+
+    def test_profile_in_bounded_queries_with_conditional_get(self):
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(data['counts'], {'videos': RECENT_VIDEO_LIMIT + 3, 'awards': RECENT_VIDEO_LIMIT + 3, 'managers': 1})
+        self.assertEqual(len(data['recent_videos']), RECENT_VIDEO_LIMIT)
+        self.assertEqual(data['managers'][0]['username'], 'manager')
+        self.assertNotIn('email', data['managers'][0])
+
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(self.client.get(self.url).data, data)
+
+    def test_changes_bump_version(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Video.objects.create(
+                bv_number='BV1GRPNEW', title='新视频', url='https://www.bilibili.com/video/BV1GRPNEW', group=self.group,
+            )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['recent_videos'][0]['bv_number'], 'BV1GRPNEW')
+
+        self.assertEqual(self.client.get('/api/groups/not-a-uuid/profile/').status_code, 404)
+
+    def assert_invalidated(self, change):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_related_renames_bump_version(self):
+        self.award.name = '特等奖'
+        data = self.assert_invalidated(self.award.save)
+        self.assertEqual(data['recent_awards'][0]['award_name'], '特等奖')
+
+        self.competition.name = '新比赛名'
+        data = self.assert_invalidated(self.competition.save)
+        self.assertEqual(data['recent_videos'][0]['competition_name'], '新比赛名')
+
+        tag = Tag.objects.create(name='古风')
+        data = self.assert_invalidated(lambda: self.video.tags.add(tag))
+        self.assertEqual([item['name'] for item in data['recent_videos'][0]['tags']], ['古风'])
+
+        tag.name = '国风'
+        data = self.assert_invalidated(tag.save)
+        self.assertEqual(data['recent_videos'][0]['tags'][0]['name'], '国风')
+
+        self.manager.nickname = '管理员'
+        data = self.assert_invalidated(self.manager.save)
+        self.assertEqual(data['managers'][0]['nickname'], '管理员')
+
+    def test_unrelated_user_fields_keep_version(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                self.manager.save(update_fields=['last_login'])
+            self.manager.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
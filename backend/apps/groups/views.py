@@ -1,3 +1,5 @@
+import uuid
+
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -8,13 +10,16 @@ from django.db import transaction
 from django.db.models import Count
 from django.views.decorators.cache import cache_page
 from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags
 from .models import Group
 from .serializers import GroupSerializer
 from .cache_utils import GroupCacheManager
+from .profile import get_group_profile, get_profile_version, profile_etag
 from apps.videos.models import Video
 from apps.awards.models import AwardRecord
 from apps.videos.serializers import VideoSerializer
 from apps.videos.pagination import LargeResultsSetPagination
+from apps.users.permissions import permission_context
 
 User = get_user_model()
 
@@ -78,7 +83,7 @@ class GroupViewSet(viewsets.ModelViewSet):
         GroupCacheManager.clear_all_group_cache()
     
     def perform_update(self, serializer):
-        if not self.request.user.can_manage_group(self.get_object()):
+        if not permission_context(self.request).can_manage_group(serializer.instance):
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied('只能编辑自己管理的社团')
         super().perform_update(serializer)
@@ -150,6 +155,28 @@ class GroupViewSet(viewsets.ModelViewSet):
 
         return Response({'detail': '已移除社团管理员绑定'}, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['get'])
+    def profile(self, request, pk=None):
+        """
+        社团主页聚合数据：社团信息、计数、最新视频、最新获奖记录和管理员
+        支持 If-None-Match 条件请求
+        """
+        try:
+            group_id = uuid.UUID(str(pk))
+        except ValueError:
+            return Response({'detail': '社团不存在'}, status=status.HTTP_404_NOT_FOUND)
+
+        version = get_profile_version(group_id)
+        etag = profile_etag(version)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        profile = get_group_profile(group_id, version)
+        if profile is None:
+            return Response({'detail': '社团不存在'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(profile, headers=headers)
+
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def managed(self, request):
         """获取当前用户可管理的社团。"""
@@ -0,0 +1,89 @@
+import random
+import string
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from apps.search.suggest import SuggestIndex, build_index, make_item, normalize
+
+WORDS = [
+    '星海', '动漫', '社', '晨光', '研究会', '次元', '梦幻', '天空', '之城', '樱花', '音乐', '舞台',
+    '原神', '崩坏', '星穹', '铁道', '明日', '方舟', '东方', '幻想', '乡', '初音', '未来', '决赛',
+    '初赛', '复赛', '年度', '大赛', '嘉年华', '漫展', '联合', '剧社', '学院', 'ChinaJoy', 'COS',
+    'cosplay', 'CCG', 'Comicup', '2019', '2020', '2021', '2022', '2023', '2024', '上海', '杭州',
+]
+TYPES = [('video', 0.7), ('group', 0.2), ('competition', 0.02), ('tag', 0.08)]
+
+
+def synthetic_items(count, rng):
+    kinds = rng.choices([kind for kind, _ in TYPES], weights=[w for _, w in TYPES], k=count)
+    for kind in kinds:
+        name = ''.join(rng.choice(WORDS) for _ in range(rng.randint(2, 7)))
+        if kind == 'video':
+            bv_number = 'BV1' + ''.join(rng.choices(string.ascii_letters + string.digits, k=9))
+            yield make_item(kind, uuid.uuid4(), f'【{rng.choice(WORDS)}】{name}', bv_number, extra=[bv_number.lower()])
+        else:
+            yield make_item(kind, uuid.uuid4(), name, weight=rng.randint(0, 500))
+
+
+def sample_queries(index, count, rng):
+    keys = index.keys
+    queries = []
+    for _ in range(count):
+        key = keys[rng.randrange(len(keys))]
+        query = key[:rng.randint(1, min(len(key), 8))]
+        if len(query) >= 4 and rng.random() < 0.2:
+            # 模拟一次输入错误
+            position = rng.randrange(len(query))
+            query = query[:position] + rng.choice('abcdefghijklmnopqrstuvwxyz') + query[position + 1:]
+        queries.append(query)
+    return queries
+
+
+def percentile(samples, ratio):
+    return samples[min(len(samples) - 1, int(len(samples) * ratio))]
+
+
+class Command(BaseCommand):
+    help = '测量搜索联想索引的构建耗时和查询延迟（默认使用 10 万条合成数据）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entities', type=int, default=100000, help='合成条目数')
+        parser.add_argument('--queries', type=int, default=5000, help='查询次数')
+        parser.add_argument('--limit', type=int, default=10, help='每次返回条数')
+        parser.add_argument('--from-db', action='store_true', help='使用数据库中的真实数据构建索引')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+        if options['from_db']:
+            index = build_index()
+        else:
+            index = SuggestIndex(synthetic_items(options['entities'], rng))
+        build_seconds = time.perf_counter() - started
+        self.stdout.write(f'条目 {len(index)}，键 {len(index.keys)}，构建耗时 {build_seconds:.2f}s')
+        if not index.keys:
+            self.stdout.write(self.style.WARNING('索引为空'))
+            return
+
+        queries = sample_queries(index, options['queries'], rng)
+        samples = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, options['limit'])
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+
+        item = next(iter(index.items.values()))
+        started = time.perf_counter()
+        index.with_changes([(item['type'], item['id'])], [make_item(item['type'], item['id'], normalize(item['name']) + '更新')])
+        update_ms = (time.perf_counter() - started) * 1000
+
+        self.stdout.write(
+            f'查询 {len(samples)} 次：p50 {percentile(samples, 0.5):.3f}ms，'
+            f'p95 {percentile(samples, 0.95):.3f}ms，p99 {percentile(samples, 0.99):.3f}ms，'
+            f'最大 {samples[-1]:.3f}ms'
+        )
+        self.stdout.write(f'单条增量更新 {update_ms:.2f}ms')
@@ -0,0 +1,44 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .suggest import record_changes
+
+
+# 本应用没有数据表，只在这里注册搜索联想索引的增量更新信号
+
+@receiver(pre_save, sender='videos.Video')
+def video_suggest_saving(sender, instance, **kwargs):
+    # 视频改到其他比赛时，原比赛的视频数也变了
+    if not instance._state.adding:
+        instance._suggest_competition_id = (
+            sender.objects.filter(pk=instance.pk).values_list('competition_id', flat=True).first()
+        )
+
+
+@receiver(post_delete, sender='videos.Video')
+@receiver(post_save, sender='videos.Video')
+def video_suggest_changed(sender, instance, **kwargs):
+    # 比赛的权重是视频数，新旧比赛一并刷新
+    record_changes([
+        ('video', instance.pk),
+        ('competition', instance.competition_id),
+        ('competition', getattr(instance, '_suggest_competition_id', None)),
+    ])
+
+
+@receiver(post_delete, sender='groups.Group')
+@receiver(post_save, sender='groups.Group')
+def group_suggest_changed(sender, instance, **kwargs):
+    record_changes([('group', instance.pk)])
+
+
+@receiver(post_delete, sender='competitions.Competition')
+@receiver(post_save, sender='competitions.Competition')
+def competition_suggest_changed(sender, instance, **kwargs):
+    record_changes([('competition', instance.pk)])
+
+
+@receiver(post_delete, sender='tags.Tag')
+@receiver(post_save, sender='tags.Tag')
+def tag_suggest_changed(sender, instance, **kwargs):
+    record_changes([('tag', instance.pk)])
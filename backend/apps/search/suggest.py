@@ -0,0 +1,426 @@
+"""
+全站搜索联想
+
+视频、社团、比赛和标签的名称放在同一个进程内索引中：每个条目按名称中每个词开头
+的剩余部分、对应拼音和首字母以及视频 BV 号生成若干键，所有键放在一个有序列表里，
+查询时二分查找取出以输入为前缀的条目。命中键数超过 SCAN_LIMIT 的宽前缀在构建时
+按排序预先算好每种类型的前 MAX_LIMIT 个候选，查询时直接取用；前缀结果不足时再用
+输入的一次编辑变体（删除、相邻交换，字母数字输入还包括替换和插入）做前缀查找作为
+模糊匹配，每个变体只取字典序前 limit 个。
+排序为"前缀优先于模糊、名称前缀优先、权重（视频数/使用次数）高者优先"。
+
+写入在事务提交后把变化的条目追加到缓存中的变更日志（递增序号 + 每个序号一条
+记录）。各进程每隔 SYNC_INTERVAL 秒比对一次序号，有变化时由后台线程读取变更、
+只从数据库重新加载这些条目：大索引保持不变，变化的条目放进一个小的覆盖索引，
+查询时屏蔽大索引中的旧条目并合并覆盖索引的结果。日志缺失、落后太多或覆盖索引
+超过 MAX_OVERLAY_ITEMS 时在后台整体重建。请求线程只读当前索引，不等待同步或
+重建；冷启动时最多等待 COLD_START_WAIT 秒。
+"""
+
+import copy
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Count
+
+from apps.competitions.models import Competition
+from apps.groups.autocomplete import normalize
+from apps.groups.models import Group
+from apps.tags.models import Tag
+from apps.videos.models import Video
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:
+    lazy_pinyin = None
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_TYPES = ('video', 'group', 'competition', 'tag')
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+SEQ_KEY = 'search:suggest_seq'
+CHANGE_KEY = 'search:suggest_change:{}'
+CHANGE_TIMEOUT = 10 * 60
+SYNC_INTERVAL = 1
+# 变更记录在序号递增后才写入，短时间缺失视为尚未写入
+MISSING_GRACE = 5
+MAX_PENDING_CHANGES = 1000
+MAX_INCREMENTAL_ITEMS = 500
+MAX_OVERLAY_ITEMS = 5000
+COLD_START_WAIT = 2
+
+# 前缀命中的键数不超过该值时直接扫描，超过时使用构建时预先算好的候选
+SCAN_LIMIT = 1000
+MAX_TOKEN_KEYS = 8
+FUZZY_MIN_LENGTH = 3
+FUZZY_MAX_LENGTH = 16
+FUZZY_ALPHABET = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
+TOKEN_RE = re.compile(r'\w+')
+ASCII_RE = re.compile(r'^[a-z0-9]+$')
+CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+# 大于任何字符，prefix + PREFIX_END 是所有以 prefix 开头的键的上界
+PREFIX_END = '\U0010ffff'
+
+_lock = threading.Lock()
+_state = {'index': None, 'seq': 0, 'checked_at': 0.0, 'missing_since': None, 'building': None}
+
+
+@lru_cache(maxsize=65536)
+def _token_pinyin(token):
+    # 标题中的词大量重复，缓存每个词的拼音
+    return tuple(normalize(s) for s in lazy_pinyin(token))
+
+
+def item_keys(name, extra=()):
+    """名称中每个词开头的剩余部分、对应的拼音和首字母，外加 extra 中的键"""
+    keys = {normalize(name), *extra}
+    tokens = TOKEN_RE.findall(name.lower())
+    starts = range(min(len(tokens), MAX_TOKEN_KEYS))
+    for index in starts:
+        keys.add(''.join(tokens[index:]))
+    if lazy_pinyin is not None and CJK_RE.search(name):
+        syllables = [_token_pinyin(token) for token in tokens]
+        for index in starts:
+            rest = [s for token in syllables[index:] for s in token if s]
+            keys.add(''.join(rest))
+            keys.add(''.join(s[0] for s in rest))
+    keys.discard('')
+    return keys
+
+
+def make_item(kind, item_id, name, subtitle='', weight=0, extra=()):
+    return {
+        'type': kind,
+        'id': str(item_id),
+        'name': name,
+        'subtitle': subtitle or '',
+        'weight': weight or 0,
+        'normalized': normalize(name),
+        'order': (-(weight or 0), len(name), name),
+        'keys': item_keys(name, extra),
+    }
+
+
+def _load_videos(ids=None):
+    videos = Video.objects.all() if ids is None else Video.objects.filter(id__in=ids)
+    for video_id, title, bv_number in videos.values_list('id', 'title', 'bv_number').iterator():
+        yield make_item('video', video_id, title, bv_number, extra=[bv_number.lower()])
+
+
+def _load_groups(ids=None):
+    groups = Group.objects.filter(is_active=True)
+    if ids is not None:
+        groups = groups.filter(id__in=ids)
+    for group_id, name, city, province, video_count in groups.values_list(
+        'id', 'name', 'city', 'province', 'video_count'
+    ):
+        yield make_item('group', group_id, name, city or province, video_count)
+
+
+def _load_competitions(ids=None):
+    competitions = Competition.objects.all() if ids is None else Competition.objects.filter(id__in=ids)
+    competitions = competitions.annotate(video_total=Count('videos'))
+    for competition_id, name, video_total in competitions.values_list('id', 'name', 'video_total'):
+        yield make_item('competition', competition_id, name, weight=video_total)
+
+
+def _load_tags(ids=None):
+    tags = Tag.objects.filter(is_active=True)
+    if ids is not None:
+        tags = tags.filter(id__in=ids)
+    for tag_id, name, category, usage_count in tags.values_list('id', 'name', 'category', 'usage_count'):
+        yield make_item('tag', tag_id, name, category, usage_count)
+
+
+LOADERS = {
+    'video': _load_videos,
+    'group': _load_groups,
+    'competition': _load_competitions,
+    'tag': _load_tags,
+}
+
+
+def fuzzy_variants(query):
+    """与 query 相差一次编辑的变体；末尾插入已被前缀匹配覆盖"""
+    variants = {query[:i] + query[i + 1:] for i in range(len(query))}
+    variants.update(query[:i] + query[i + 1] + query[i] + query[i + 2:] for i in range(len(query) - 1))
+    if ASCII_RE.match(query):
+        for i in range(len(query)):
+            variants.update(query[:i] + char + query[i + 1:] for char in FUZZY_ALPHABET)
+            variants.update(query[:i] + char + query[i:] for char in FUZZY_ALPHABET)
+    variants.discard(query)
+    variants.discard('')
+    return variants
+
+
+class SuggestIndex:
+    def __init__(self, items=()):
+        self.items = {}
+        entries = []
+        for item in items:
+            ref = (item['type'], item['id'])
+            self.items[ref] = item
+            entries.extend((key, ref) for key in item['keys'])
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.refs = [ref for _, ref in entries]
+        # {宽前缀: {类型或 None: 排好序的前 MAX_LIMIT 个候选}}
+        self.top = self._broad_prefix_candidates()
+        # 增量变更：{ref: 新条目或 None（已删除）}，以及由新条目组成的覆盖索引
+        self.changed = {}
+        self.overlay = None
+
+    def __len__(self):
+        removed = sum(1 for ref in self.changed if ref in self.items)
+        return len(self.items) - removed + (len(self.overlay.items) if self.overlay else 0)
+
+    def _rank(self, prefix):
+        return lambda ref: (not self.items[ref]['normalized'].startswith(prefix), self.items[ref]['order'])
+
+    def _broad_prefix_candidates(self):
+        """
+        自底向上计算宽前缀的候选：子前缀也是宽前缀时只取它的候选，否则取子范围内的全部条目
+
+        条目在前缀 p 的前 N 名中，在它所在的任一子前缀中也一定在前 N 名（名称以子前缀
+        开头的条目都以 p 开头），所以合并子前缀的候选即可得到精确结果，每个键只扫描一次。
+        """
+        top = {}
+
+        def visit(prefix, start, end):
+            pool = []
+            position = start
+            while position < end:
+                key = self.keys[position]
+                if len(key) <= len(prefix):
+                    pool.append(self.refs[position])
+                    position += 1
+                    continue
+                child = key[:len(prefix) + 1]
+                child_end = bisect_left(self.keys, child + PREFIX_END, position, end)
+                if child_end - position > SCAN_LIMIT:
+                    pool.extend(visit(child, position, child_end))
+                elif prefix:
+                    pool.extend(self.refs[position:child_end])
+                position = child_end
+            if not prefix:
+                return []
+
+            by_type = defaultdict(set)
+            for ref in pool:
+                by_type[ref[0]].add(ref)
+            rank = self._rank(prefix)
+            candidates = {kind: heapq.nsmallest(MAX_LIMIT, refs, key=rank) for kind, refs in by_type.items()}
+            merged = [ref for refs in candidates.values() for ref in refs]
+            candidates[None] = heapq.nsmallest(MAX_LIMIT, merged, key=rank)
+            top[prefix] = candidates
+            return merged
+
+        visit('', 0, len(self.keys))
+        return top
+
+    def _base_prefix(self, prefix, types, limit):
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + PREFIX_END, start)
+        candidates = self.top.get(prefix) if end - start > SCAN_LIMIT else None
+        if candidates is not None:
+            if types is None:
+                return candidates[None]
+            return [ref for kind in types for ref in candidates.get(kind, ())]
+        refs = self.refs[start:min(end, start + limit)]
+        return refs if types is None else [ref for ref in refs if ref[0] in types]
+
+    def _prefix(self, prefix, types, limit):
+        refs = self._base_prefix(prefix, types, limit)
+        if self.changed:
+            refs = [ref for ref in refs if ref not in self.changed]
+            refs.extend(self.overlay._base_prefix(prefix, types, limit))
+        return refs
+
+    def item(self, ref):
+        return self.changed.get(ref) or self.items[ref]
+
+    def with_changes(self, refs, items):
+        """
+        返回应用变更后的新索引：refs 为变化的条目，items 为其中仍然存在的条目的最新数据
+
+        大索引的有序数组和候选在新旧索引间共用，只重建覆盖索引
+        """
+        index = copy.copy(self)
+        index.changed = {**self.changed, **dict.fromkeys(refs)}
+        index.changed.update(((item['type'], item['id']), item) for item in items)
+        index.overlay = SuggestIndex(item for item in index.changed.values() if item is not None)
+        return index
+
+    def search(self, query, limit=DEFAULT_LIMIT, types=None):
+        query = normalize(query)
+        if not query:
+            return []
+        matched = set(self._prefix(query, types, SCAN_LIMIT))
+        fuzzy = set()
+        if len(matched) < limit and FUZZY_MIN_LENGTH <= len(query) <= FUZZY_MAX_LENGTH:
+            for variant in fuzzy_variants(query):
+                fuzzy.update(self._prefix(variant, types, limit))
+            fuzzy -= matched
+
+        def rank(ref):
+            item = self.item(ref)
+            return (ref in fuzzy, not item['normalized'].startswith(query), item['order'])
+
+        return [self.item(ref) for ref in heapq.nsmallest(limit, matched | fuzzy, key=rank)]
+
+
+EMPTY_INDEX = SuggestIndex()
+
+
+def build_index():
+    started = time.monotonic()
+    index = SuggestIndex(item for loader in LOADERS.values() for item in loader())
+    logger.info(f'搜索联想索引已重建，共 {len(index)} 个条目，耗时 {time.monotonic() - started:.3f}s')
+    return index
+
+
+def apply_changes(index, refs):
+    """重新加载 refs 中的条目，返回更新后的索引"""
+    ids_by_type = defaultdict(set)
+    for kind, item_id in refs:
+        ids_by_type[kind].add(item_id)
+    items = [item for kind, ids in ids_by_type.items() for item in LOADERS[kind](ids)]
+    return index.with_changes(refs, items)
+
+
+def _current_seq():
+    return cache.get(SEQ_KEY) or 0
+
+
+def _spawn(target):
+    def run():
+        try:
+            target()
+        finally:
+            # 后台线程的数据库连接用完即关
+            connections.close_all()
+
+    threading.Thread(target=run, name='suggest-index-refresh', daemon=True).start()
+
+
+def _rebuild():
+    # 先取序号再读库，重建期间的变更会在下次同步时重复应用（幂等）
+    seq = _current_seq()
+    index = build_index()
+    with _lock:
+        _state.update(index=index, seq=seq, missing_since=None)
+
+
+def _sync(now):
+    current = _current_seq()
+    applied = _state['seq']
+    if current == applied:
+        _state['missing_since'] = None
+        return
+    if current < applied or current - applied > MAX_PENDING_CHANGES:
+        _rebuild()
+        return
+
+    keys = [CHANGE_KEY.format(seq) for seq in range(applied + 1, current + 1)]
+    changes = cache.get_many(keys)
+    refs = set()
+    for key in keys:
+        if key not in changes:
+            break
+        refs.update(tuple(ref) for ref in changes[key])
+        applied += 1
+
+    if applied < current:
+        if _state['missing_since'] is None:
+            _state['missing_since'] = now
+        elif now - _state['missing_since'] > MISSING_GRACE:
+            _rebuild()
+            return
+    else:
+        _state['missing_since'] = None
+
+    index = _state['index']
+    if len(refs) > MAX_INCREMENTAL_ITEMS or len(index.changed) + len(refs) > MAX_OVERLAY_ITEMS:
+        _rebuild()
+        return
+    if refs:
+        index = apply_changes(index, refs)
+    with _lock:
+        _state.update(index=index, seq=applied)
+
+
+def _refresh(done):
+    """后台线程：冷启动时构建索引，之后按变更日志增量更新"""
+    try:
+        if _state['index'] is None:
+            _rebuild()
+        else:
+            _sync(time.monotonic())
+    except Exception:
+        logger.exception('搜索联想索引刷新失败')
+    finally:
+        with _lock:
+            _state['building'] = None
+        done.set()
+
+
+def get_index():
+    now = time.monotonic()
+    index = _state['index']
+    if index is not None and now - _state['checked_at'] < SYNC_INTERVAL:
+        return index
+    # 其他请求正在检查时直接使用当前索引，不排队等锁；同一时间只有一个后台刷新
+    done = None
+    if _lock.acquire(blocking=False):
+        try:
+            _state['checked_at'] = now
+            if _state['building'] is None and (index is None or _current_seq() != _state['seq']):
+                done = _state['building'] = threading.Event()
+        finally:
+            _lock.release()
+    if done is not None:
+        _spawn(lambda: _refresh(done))
+    building = _state['building']
+    if _state['index'] is None and building is not None:
+        # 冷启动没有旧索引可用，等待构建完成，超时返回空结果
+        building.wait(COLD_START_WAIT)
+    index = _state['index']
+    return index if index is not None else EMPTY_INDEX
+
+
+def _publish(refs):
+    cache.add(SEQ_KEY, 0, None)
+    seq = cache.incr(SEQ_KEY)
+    cache.set(CHANGE_KEY.format(seq), refs, CHANGE_TIMEOUT)
+    # 本进程下次查询立即同步
+    _state['checked_at'] = 0.0
+
+
+def record_changes(refs):
+    """事务提交后记录变化的条目 [(type, id), ...]"""
+    refs = [(kind, str(item_id)) for kind, item_id in refs if item_id]
+    if refs:
+        transaction.on_commit(lambda: _publish(refs))
+
+
+def _reset():
+    _state.update(index=None, seq=0, checked_at=0.0, missing_since=None, building=None)
+
+
+def suggest(query, limit=DEFAULT_LIMIT, types=None):
+    limit = max(1, min(limit, MAX_LIMIT))
+    return [
+        {'type': item['type'], 'id': item['id'], 'name': item['name'], 'subtitle': item['subtitle']}
+        for item in get_index().search(query, limit, types)
+    ]
@@ -0,0 +1,130 @@
+from unittest import mock, skipIf
+
+from django.core.cache import cache
+
+from rest_framework.test import APITestCase
+
+from apps.competitions.models import Competition
+from apps.groups.models import Group
+from apps.search import suggest
+from apps.tags.models import Tag
+from apps.videos.models import Video
+
+
+class SuggestTests(APITestCase):
+    url = '/api/search/suggest/'
+
+    def setUp(self):
+        suggest._reset()
+        self.addCleanup(suggest._reset)
+        # 后台线程使用独立的数据库连接，看不到测试事务中的数据，这里在当前线程重建
+        spawn = mock.patch.object(suggest, '_spawn', lambda target: target())
+        spawn.start()
+        self.addCleanup(spawn.stop)
+        self.group = Group.objects.create(name='星海动漫社', city='杭州市')
+        Group.objects.create(name='星光剧社', video_count=2)
+        Group.objects.create(name='星尘社', is_active=False)
+        self.competition = Competition.objects.create(name='ChinaJoy Cosplay嘉年华')
+        Tag.objects.create(name='星穹铁道', category='IP', usage_count=30)
+        self.video = Video.objects.create(
+            bv_number='BV1xK4y1F7aB', title='【ChinaJoy】星海动漫社《原神》', url='https://example.com/1',
+            group=self.group, competition=self.competition,
+        )
+        suggest._reset()
+
+    def results(self, q, **params):
+        response = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(item['type'], item['name']) for item in response.data['results']]
+
+    def test_prefix_matches_across_types(self):
+        # 名称前缀命中优先，其次按视频数/使用次数
+        self.assertEqual(self.results('星'), [
+            ('tag', '星穹铁道'), ('group', '星光剧社'), ('group', '星海动漫社'),
+            ('video', '【ChinaJoy】星海动漫社《原神》'),
+        ])
+        self.assertEqual(self.results('原神'), [('video', '【ChinaJoy】星海动漫社《原神》')])
+        self.assertEqual(self.results('bv1xk4'), [('video', '【ChinaJoy】星海动漫社《原神》')])
+        self.assertEqual(self.results('星', types='tag,competition'), [('tag', '星穹铁道')])
+        self.assertEqual(self.results(''), [])
+
+        with self.assertNumQueries(0):
+            self.results('china')
+
+    def test_fuzzy_matches_rank_after_prefix_matches(self):
+        self.assertEqual(self.results('chnajoy'), [
+            ('competition', 'ChinaJoy Cosplay嘉年华'), ('video', '【ChinaJoy】星海动漫社《原神》'),
+        ])
+        self.assertEqual(self.results('cosplya'), [('competition', 'ChinaJoy Cosplay嘉年华')])
+
+    def test_unknown_type_is_rejected(self):
+        response = self.client.get(self.url, {'q': '星', 'types': 'video,user'})
+        self.assertEqual(response.status_code, 400)
+
+    @skipIf(suggest.lazy_pinyin is None, 'pypinyin 未安装')
+    def test_pinyin_and_initials(self):
+        self.assertEqual(self.results('xinghai'), [('group', '星海动漫社'), ('video', '【ChinaJoy】星海动漫社《原神》')])
+        self.assertEqual(self.results('xqtd'), [('tag', '星穹铁道')])
+
+    def test_writes_are_applied_incrementally(self):
+        self.results('星')
+        with mock.patch.object(suggest, 'build_index', wraps=suggest.build_index) as build:
+            with self.captureOnCommitCallbacks(execute=True):
+                Tag.objects.create(name='星空', category='其他', usage_count=100)
+                Group.objects.filter(pk=self.group.pk).update(is_active=False)
+                self.group.refresh_from_db()
+                self.group.save()
+            self.assertEqual(self.results('星'), [
+                ('tag', '星空'), ('tag', '星穹铁道'), ('group', '星光剧社'),
+                ('video', '【ChinaJoy】星海动漫社《原神》'),
+            ])
+            with self.captureOnCommitCallbacks(execute=True):
+                self.video.delete()
+            self.assertEqual(self.results('原神'), [])
+        build.assert_not_called()
+
+    def test_rebuild_runs_in_background_and_serves_old_index(self):
+        self.results('星')
+        builds = []
+        with mock.patch.object(suggest, '_spawn', builds.append):
+            # 变更日志落后太多，触发整体重建
+            cache.set(suggest.SEQ_KEY, suggest._state['seq'] + suggest.MAX_PENDING_CHANGES + 1, None)
+            Tag.objects.create(name='星空', category='其他', usage_count=100)
+            suggest._state['checked_at'] = 0.0
+            self.assertNotIn(('tag', '星空'), self.results('星'))
+            suggest._state['checked_at'] = 0.0
+            self.results('星')
+        self.assertEqual(len(builds), 1)
+        builds[0]()
+        self.assertEqual(self.results('星')[0], ('tag', '星空'))
+        self.assertIsNone(suggest._state['building'])
+
+    def test_broad_prefix_keeps_best_matches_beyond_scan_limit(self):
+        items = [suggest.make_item('tag', index, f'xa{index:04d}') for index in range(50)]
+        items.append(suggest.make_item('tag', 'heavy', 'xz热门', weight=100))
+        items.append(suggest.make_item('group', 'club', 'xy社', weight=1))
+        with mock.patch.object(suggest, 'SCAN_LIMIT', 10):
+            index = suggest.SuggestIndex(items)
+            self.assertIn('x', index.top)
+            self.assertEqual(index.search('x', limit=1)[0]['id'], 'heavy')
+            self.assertEqual([item['id'] for item in index.search('x', types={'group'})], ['club'])
+
+            # 增量变更放在覆盖索引中，大索引里的旧条目被屏蔽
+            changed = index.with_changes(
+                [('tag', 'heavy'), ('tag', 'heavier')],
+                [suggest.make_item('tag', 'heavier', 'xb更热门', weight=200)],
+            )
+            self.assertEqual([item['id'] for item in changed.search('x', limit=2)], ['heavier', 'club'])
+            self.assertEqual(len(changed), len(index))
+            self.assertEqual(index.search('x', limit=1)[0]['id'], 'heavy')
+
+    def test_moving_video_refreshes_both_competitions(self):
+        other = Competition.objects.create(name='ChinaJoy 漫展')
+        self.results('china')
+        self.video.competition = other
+        with self.captureOnCommitCallbacks(execute=True):
+            self.video.save()
+        self.results('china')
+        index = suggest.get_index()
+        self.assertEqual(index.item(('competition', str(self.competition.id)))['weight'], 0)
+        self.assertEqual(index.item(('competition', str(other.id)))['weight'], 1)
@@ -0,0 +1,35 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from .suggest import DEFAULT_LIMIT, SUGGEST_TYPES, suggest as suggest_items
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def suggest(request):
+    """
+    全站搜索联想：视频（标题/BV号）、社团、比赛、标签名称的前缀、拼音和模糊匹配
+
+    参数：q 输入内容；types 逗号分隔的类型（video,group,competition,tag），默认全部；limit 返回条数
+    """
+    query = request.query_params.get('q', '').strip()
+    types = None
+    if request.query_params.get('types'):
+        types = {kind.strip() for kind in request.query_params['types'].split(',') if kind.strip()}
+        unknown = types - set(SUGGEST_TYPES)
+        if unknown:
+            return Response(
+                {'error': f'不支持的类型: {", ".join(sorted(unknown))}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    try:
+        limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        limit = DEFAULT_LIMIT
+
+    return Response({
+        'query': query,
+        'results': suggest_items(query, limit, types) if query else [],
+    })
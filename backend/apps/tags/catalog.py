@@ -0,0 +1,96 @@
+"""
+按分类分组的标签目录
+
+启用的标签按分类分组（IP、风格、其他在前，其余分类按名称排在后面），组内按
+使用次数、名称排序，每个标签用 [id, name, color, usage_count, is_featured] 数组
+表示以减小响应体积。
+
+每个分类在缓存中有一个数据版本号，分类数据按 (分类, 版本号) 缓存；标签或视频标签
+写入时在事务提交后只删除受影响分类的版本号，其余分类的缓存继续可用。整个目录的
+ETag 由各分类版本号计算，客户端带 If-None-Match 命中时直接返回 304，不访问数据库。
+"""
+
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Tag
+
+CATEGORIES_KEY = 'tags:catalog_categories'
+CATALOG_VERSION_KEY = 'tags:catalog_version:{}'
+CATALOG_KEY = 'tags:catalog:{}:{}'
+CATALOG_TIMEOUT = 60 * 60
+CATALOG_FIELDS = ['id', 'name', 'color', 'usage_count', 'is_featured']
+CATEGORY_ORDER = [value for value, _ in Tag.CATEGORY_CHOICES]
+
+
+def catalog_categories():
+    """有启用标签的分类，按 CATEGORY_ORDER 排序"""
+    categories = cache.get(CATEGORIES_KEY)
+    if categories is None:
+        categories = set(
+            Tag.objects.filter(is_active=True).order_by().values_list('category', flat=True).distinct()
+        )
+        order = {category: index for index, category in enumerate(CATEGORY_ORDER)}
+        categories = sorted(categories, key=lambda category: (order.get(category, len(order)), category))
+        cache.set(CATEGORIES_KEY, categories, CATALOG_TIMEOUT)
+    return categories
+
+
+def get_catalog_versions(categories):
+    keys = {category: CATALOG_VERSION_KEY.format(category) for category in categories}
+    cached = cache.get_many(list(keys.values()))
+    versions = {}
+    for category, key in keys.items():
+        version = cached.get(key)
+        if version is None:
+            version = uuid.uuid4().hex
+            # 并发时以先写入的为准
+            if not cache.add(key, version, CATALOG_TIMEOUT):
+                version = cache.get(key) or version
+        versions[category] = version
+    return versions
+
+
+def catalog_etag(versions):
+    digest = hashlib.md5(
+        '|'.join(f'{category}:{version}' for category, version in versions.items()).encode()
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def invalidate_tag_catalog(categories):
+    """事务提交后作废这些分类的缓存，分类列表一并重新计算"""
+    keys = [CATALOG_VERSION_KEY.format(category) for category in {c for c in categories if c}]
+    transaction.on_commit(lambda: cache.delete_many([CATEGORIES_KEY, *keys]))
+
+
+def _category_rows(categories):
+    rows = {category: [] for category in categories}
+    tags = (
+        Tag.objects
+        .filter(is_active=True, category__in=categories)
+        .order_by('category', '-usage_count', 'name')
+        .values_list('category', *CATALOG_FIELDS)
+    )
+    for category, tag_id, *fields in tags:
+        rows[category].append([str(tag_id), *fields])
+    return rows
+
+
+def get_tag_catalog(versions):
+    """{fields, categories: [{category, tags}]}，只查询缓存中缺失的分类"""
+    keys = {category: CATALOG_KEY.format(category, version) for category, version in versions.items()}
+    cached = cache.get_many(list(keys.values()))
+    missing = [category for category, key in keys.items() if key not in cached]
+    if missing:
+        rows = _category_rows(missing)
+        fresh = {keys[category]: rows[category] for category in missing}
+        cache.set_many(fresh, CATALOG_TIMEOUT)
+        cached.update(fresh)
+    return {
+        'fields': CATALOG_FIELDS,
+        'categories': [{'category': category, 'tags': cached[key]} for category, key in keys.items()],
+    }
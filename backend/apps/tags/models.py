@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
 import uuid
 
 
@@ -60,4 +62,40 @@ class VideoTag(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.video.title} - {self.tag.name}"
\ No newline at end of file
+        return f"{self.video.title} - {self.tag.name}"
+
+
+@receiver(pre_save, sender=Tag)
+def tag_catalog_saving(sender, instance, **kwargs):
+    # 记录修改前的分类，分类变化时两个分类都要作废
+    if not instance._state.adding:
+        instance._catalog_category = sender.objects.filter(pk=instance.pk).values_list('category', flat=True).first()
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Tag)
+def tag_catalog_changed(sender, instance, **kwargs):
+    from .catalog import invalidate_tag_catalog
+    invalidate_tag_catalog([instance.category, getattr(instance, '_catalog_category', None)])
+
+
+@receiver(post_delete, sender=VideoTag)
+@receiver(post_save, sender=VideoTag)
+def video_tag_catalog_changed(sender, instance, **kwargs):
+    from .catalog import invalidate_tag_catalog
+    invalidate_tag_catalog(Tag.objects.filter(pk=instance.tag_id).values_list('category', flat=True))
+
+
+@receiver(m2m_changed, sender=VideoTag)
+def video_tags_catalog_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    from .catalog import invalidate_tag_catalog
+    if reverse:
+        invalidate_tag_catalog([instance.category])
+    elif pk_set:
+        invalidate_tag_catalog(Tag.objects.filter(pk__in=pk_set).values_list('category', flat=True))
+    else:
+        # clear 不带标签 id，作废全部分类
+        invalidate_tag_catalog(Tag.objects.order_by().values_list('category', flat=True).distinct())
+
@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from apps.tags.catalog import CATALOG_VERSION_KEY, CATEGORIES_KEY, get_catalog_versions
+from apps.tags.models import Tag, VideoTag
+from apps.videos.models import Video
+
+
+class TagCatalogTests(APITestCase):
+    url = '/api/tags/catalog/'
+
+    def setUp(self):
+        keys = [CATEGORIES_KEY, *(CATALOG_VERSION_KEY.format(c) for c in ('IP', '风格', '其他', '年份'))]
+        cache.delete_many(keys)
+        self.addCleanup(cache.delete_many, keys)
+        self.ip = Tag.objects.create(name='原神', category='IP', usage_count=5)
+        Tag.objects.create(name='崩坏', category='IP', usage_count=9)
+        Tag.objects.create(name='古风', category='风格', usage_count=1)
+        Tag.objects.create(name='2024', category='年份', usage_count=3)
+        Tag.objects.create(name='停用', category='其他', is_active=False)
+        self.video = Video.objects.create(bv_number='BV1TAG', title='视频', url='https://www.bilibili.com/video/BV1TAG')
+
+    def test_grouped_ranked_catalog_with_conditional_get(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['fields'], ['id', 'name', 'color', 'usage_count', 'is_featured'])
+        grouped = {group['category']: [tag[1] for tag in group['tags']] for group in response.data['categories']}
+        self.assertEqual(list(grouped), ['IP', '风格', '年份'])
+        self.assertEqual(grouped['IP'], ['崩坏', '原神'])
+
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(self.client.get(self.url).data, response.data)
+
+    def test_writes_invalidate_only_affected_categories(self):
+        etag = self.client.get(self.url)['ETag']
+        style_version = get_catalog_versions(['风格'])['风格']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            VideoTag.objects.create(video=self.video, tag=self.ip)
+        self.assertEqual(get_catalog_versions(['风格'])['风格'], style_version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.filter(pk=self.ip.pk).update(usage_count=20)
+            self.ip.refresh_from_db()
+            self.ip.category = '其他'
+            self.ip.save()
+
+        # 分类列表和受影响的 IP/其他 分类重新查询，风格、年份走缓存
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        grouped = {group['category']: [tag[1] for tag in group['tags']] for group in response.data['categories']}
+        self.assertEqual(grouped, {'IP': ['崩坏'], '风格': ['古风'], '其他': ['原神'], '年份': ['2024']})
@@ -1,6 +1,10 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.utils.http import parse_etags
 from .models import Tag
 from .serializers import TagSerializer
+from .catalog import catalog_categories, catalog_etag, get_catalog_versions, get_tag_catalog
 
 
 class TagViewSet(viewsets.ModelViewSet):
@@ -15,4 +19,17 @@ class TagViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated]
         else:
             permission_classes = [permissions.AllowAny]
-        return [permission() for permission in permission_classes] 
\ No newline at end of file
+        return [permission() for permission in permission_classes]
+
+    @action(detail=False, methods=['get'])
+    def catalog(self, request):
+        """
+        按分类分组、按使用次数排序的标签目录（紧凑格式，tags 中每项按 fields 顺序排列）
+        支持 If-None-Match 条件请求
+        """
+        versions = get_catalog_versions(catalog_categories())
+        etag = catalog_etag(versions)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(get_tag_catalog(versions), headers=headers)
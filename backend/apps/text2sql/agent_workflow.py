@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+import hashlib
 import logging
+import os
 import re
+import uuid
+import weakref
 from dataclasses import dataclass
-from typing import Any, Dict, List, Literal, Optional, TypedDict
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple, TypedDict
 
-from django.db import connection
+from django.db import DatabaseError, connection
 from pydantic import BaseModel, Field
 
+from apps.text2sql.intent_router import classify_query
 from apps.text2sql.llm_sql_generator import generate_sql_via_llm
+from apps.text2sql.query_index import find_reusable_sql, remember_successful_sql
 
 try:
     from langgraph.graph import END, START, StateGraph
@@ -52,11 +58,16 @@ class AgentState(TypedDict, total=False):
     intent_type: IntentType
     selected_schemas: List[str]
     generated_sql: str
+    sql_params: Optional[Dict[str, Any]]
     sql_error: str
     raw_data: List[Dict[str, Any]]
     final_response: Dict[str, Any]
     retry_count: int
     generated_by_llm: bool
+    sql_template: Optional[str]
+    award_keywords: List[str]
+    reused_query: str
+    reuse_score: float
 
 
 @dataclass
@@ -88,28 +99,28 @@ class AgentSearchResponseModel(RenderComponent):
 
 
 def _escape_like(value: str) -> str:
-    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_").replace("'", "''")
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
-def _looks_like_top_gold_query(query: str) -> bool:
-    return any(word in query for word in ["最多", "最高", "榜", "排行", "第一"]) and any(
-        word in query for word in ["金奖", "一等奖", "冠军"]
-    )
+def _contains_pattern(value: str) -> str:
+    """ILIKE 包含匹配的绑定参数"""
+    return f"%{_escape_like(value)}%"
+
 
+AWARD_SCHEMAS = [
+    "awards_award",
+    "awards_awardrecord",
+    "competitions_competition",
+    "competitions_competitionyear",
+    "groups_group",
+    "videos_video",
+]
 
-def _extract_award_keywords(query: str) -> List[str]:
-    keyword_groups = [
-        ("动作", ["动作", "武打", "打戏", "动作设计"]),
-        ("舞美", ["舞美", "舞台美术", "布景"]),
-        ("服装", ["服装", "造型", "服化"]),
-        ("人气", ["人气", "观众"]),
-        ("剧本", ["剧本", "编剧", "剧情"]),
-        ("表演", ["表演", "演技", "演员"]),
-    ]
-    for trigger, keywords in keyword_groups:
-        if trigger in query:
-            return keywords
-    return []
+INTENT_SCHEMAS: Dict[str, List[str]] = {
+    "top_gold_groups": AWARD_SCHEMAS,
+    "award_keyword": AWARD_SCHEMAS,
+    "generic": ["videos_video", "groups_group", "awards_award", "awards_awardrecord"],
+}
 
 
 def intent_schema_selector(state: AgentState) -> Dict[str, Any]:
@@ -119,62 +130,38 @@ def intent_schema_selector(state: AgentState) -> Dict[str, Any]:
         return {
             "intent_type": "generic",
             "selected_schemas": [],
+            "sql_template": None,
+            "award_keywords": [],
             "sql_error": "查询中包含不允许的数据库操作关键词。",
         }
 
-    if _looks_like_top_gold_query(query):
-        return {
-            "intent_type": "top_gold_groups",
-            "selected_schemas": [
-                "awards_award",
-                "awards_awardrecord",
-                "competitions_competition",
-                "competitions_competitionyear",
-                "groups_group",
-                "videos_video",
-            ],
-        }
-
-    award_keywords = _extract_award_keywords(query)
-    if award_keywords or "奖" in query or "获奖" in query:
-        return {
-            "intent_type": "award_keyword",
-            "selected_schemas": [
-                "awards_award",
-                "awards_awardrecord",
-                "competitions_competition",
-                "competitions_competitionyear",
-                "groups_group",
-                "videos_video",
-            ],
-        }
-
+    intent = classify_query(query)
     return {
-        "intent_type": "generic",
-        "selected_schemas": ["videos_video", "groups_group", "awards_award", "awards_awardrecord"],
+        "intent_type": intent.intent_type,
+        "selected_schemas": list(INTENT_SCHEMAS[intent.intent_type]),
+        "sql_template": intent.sql_template,
+        "award_keywords": intent.award_keywords,
     }
 
 
 def route_by_complexity(state: AgentState) -> str:
     """优先使用确定性模板，失败时回退到LLM"""
     query = state.get("query", "")
-    logger.info(f"Routing query: {query}")
 
-    # 导入并使用确定性模板
-    try:
-        from apps.text2sql.llm_sql_generator import _heuristic_sql
-        sql = _heuristic_sql(query)
-        if sql:
-            logger.info(f"Using deterministic template for: {query[:50]}...")
-            return "sql_generator"  # 使用确定性模板
-    except Exception as e:
-        logger.error(f"Error with heuristic SQL: {e}")
+    # 已被拒绝的查询不再消耗一次 LLM 调用
+    if state.get("sql_error"):
+        return "sql_generator"
+
+    if state.get("sql_template"):
+        logger.info(f"Using deterministic template {state['sql_template']} for: {query[:50]}...")
+        return "sql_generator"  # 使用确定性模板
 
     logger.info(f"Falling back to LLM for: {query[:50]}...")
     return "llm_sql_generator"  # 回退到LLM
 
 
-def _award_rows_sql(where_clause: str, limit: int = 80) -> str:
+def _award_rows_sql(where_clause: str) -> str:
+    """标准获奖记录行模板，where_clause 只能包含占位符，取值通过参数绑定"""
     return f"""
 SELECT
     ar.id::text AS award_record_id,
@@ -209,22 +196,11 @@ LEFT JOIN groups_group g ON g.id = ar.group_id
 LEFT JOIN videos_video v ON v.id = ar.video_id
 WHERE {where_clause}
 ORDER BY cy.year DESC, c.name ASC, a.name ASC, g.name ASC
-LIMIT {limit}
+LIMIT %(limit)s
 """.strip()
 
 
-def sql_generator(state: AgentState) -> Dict[str, Any]:
-    if state.get("sql_error") and not state.get("selected_schemas"):
-        return {}
-
-    query = state["query"].strip()
-    intent_type = state.get("intent_type", "generic")
-    retry_count = state.get("retry_count", 0)
-    previous_error = state.get("sql_error") or ""
-
-    if retry_count > 0 and previous_error and intent_type != "generic":
-        safe_query = _escape_like(query)
-        sql = f"""
+GENERIC_SEARCH_SQL = """
 SELECT
     v.id::text AS video_id,
     v.bv_number,
@@ -247,17 +223,16 @@ SELECT
 FROM videos_video v
 LEFT JOIN groups_group g ON g.id = v.group_id
 LEFT JOIN competitions_competition c ON c.id = v.competition_id
-WHERE v.title ILIKE '%{safe_query}%'
-   OR v.description ILIKE '%{safe_query}%'
-   OR g.name ILIKE '%{safe_query}%'
-   OR c.name ILIKE '%{safe_query}%'
+WHERE v.title ILIKE %(pattern)s
+   OR v.description ILIKE %(pattern)s
+   OR g.name ILIKE %(pattern)s
+   OR c.name ILIKE %(pattern)s
 ORDER BY v.year DESC NULLS LAST, v.created_at DESC
 LIMIT 60
 """.strip()
-        return {"generated_sql": sql, "intent_type": "generic", "sql_error": ""}
 
-    if intent_type == "top_gold_groups":
-        sql = """
+
+TOP_GOLD_GROUPS_SQL = """
 WITH gold_records AS (
     SELECT
         ar.id,
@@ -321,52 +296,59 @@ LEFT JOIN videos_video v ON v.id = ar.video_id
 ORDER BY gc.gold_award_count DESC, g.name ASC, cy.year DESC, c.name ASC
 LIMIT 120
 """.strip()
-        return {"generated_sql": sql}
+
+
+AWARD_KEYWORD_SQL = _award_rows_sql(
+    "a.name ILIKE ANY(%(patterns)s) AND (ar.group_id IS NOT NULL OR ar.video_id IS NOT NULL)"
+)
+
+AWARD_ROWS_BY_GROUP_SQL = _award_rows_sql("ar.group_id = ANY(%(group_ids)s::uuid[])")
+
+
+def sql_generator(state: AgentState) -> Dict[str, Any]:
+    if state.get("sql_error") and not state.get("selected_schemas"):
+        return {}
+
+    query = state["query"].strip()
+    intent_type = state.get("intent_type", "generic")
+    retry_count = state.get("retry_count", 0)
+    previous_error = state.get("sql_error") or ""
+
+    if retry_count > 0 and previous_error and intent_type != "generic":
+        return {
+            "generated_sql": GENERIC_SEARCH_SQL,
+            "sql_params": {"pattern": _contains_pattern(query)},
+            "intent_type": "generic",
+            "sql_error": "",
+        }
+
+    if intent_type == "top_gold_groups":
+        return {"generated_sql": TOP_GOLD_GROUPS_SQL, "sql_params": None}
 
     if intent_type == "award_keyword":
-        keywords = _extract_award_keywords(query) or [query.replace("获得", "").replace("获取", "").replace("团队", "").strip()]
-        escaped = [_escape_like(k) for k in keywords if k.strip()]
-        if not escaped:
-            escaped = ["奖"]
-        conditions = " OR ".join([f"a.name ILIKE '%{kw}%'" for kw in escaped])
-        return {"generated_sql": _award_rows_sql(f"({conditions}) AND (ar.group_id IS NOT NULL OR ar.video_id IS NOT NULL)")}
-
-    safe_query = _escape_like(query)
-    sql = f"""
-SELECT
-    v.id::text AS video_id,
-    v.bv_number,
-    v.title AS video_title,
-    v.description AS video_description,
-    v.url AS video_url,
-    v.thumbnail AS video_thumbnail,
-    v.year AS video_year,
-    g.id::text AS group_id,
-    g.name AS group_name,
-    g.description AS group_description,
-    g.logo AS group_logo,
-    g.province AS group_province,
-    g.city AS group_city,
-    g.location AS group_location,
-    g.video_count AS group_video_count,
-    g.award_count AS group_award_count,
-    c.id::text AS competition_id,
-    c.name AS competition_name
-FROM videos_video v
-LEFT JOIN groups_group g ON g.id = v.group_id
-LEFT JOIN competitions_competition c ON c.id = v.competition_id
-WHERE v.title ILIKE '%{safe_query}%'
-   OR v.description ILIKE '%{safe_query}%'
-   OR g.name ILIKE '%{safe_query}%'
-   OR c.name ILIKE '%{safe_query}%'
-ORDER BY v.year DESC NULLS LAST, v.created_at DESC
-LIMIT 60
-""".strip()
-    return {"generated_sql": sql}
+        keywords = state.get("award_keywords") or [query.replace("获得", "").replace("获取", "").replace("团队", "").strip()]
+        patterns = [_contains_pattern(k) for k in keywords if k.strip()] or [_contains_pattern("奖")]
+        return {"generated_sql": AWARD_KEYWORD_SQL, "sql_params": {"patterns": patterns, "limit": 80}}
+
+    return {"generated_sql": GENERIC_SEARCH_SQL, "sql_params": {"pattern": _contains_pattern(query)}}
 
 
 def llm_sql_generator(state: AgentState) -> Dict[str, Any]:
     query = state.get("query", "").strip()
+
+    # 近似问题直接复用已验证过的 LLM SQL
+    match = find_reusable_sql(query)
+    if match:
+        return {
+            "generated_sql": match.sql,
+            "sql_params": None,
+            "intent_type": state.get("intent_type", "generic"),
+            "sql_error": "",
+            "generated_by_llm": True,
+            "reused_query": match.query,
+            "reuse_score": match.score,
+        }
+
     sql = generate_sql_via_llm(query)
 
     if not sql:
@@ -375,6 +357,7 @@ def llm_sql_generator(state: AgentState) -> Dict[str, Any]:
 
     return {
         "generated_sql": sql,
+        "sql_params": None,
         "intent_type": state.get("intent_type", "generic"),
         "sql_error": "",
         "generated_by_llm": True,
@@ -392,6 +375,86 @@ def _validate_sql(sql: str) -> Optional[str]:
     return None
 
 
+def _is_uuid(value: Any) -> bool:
+    try:
+        uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _uuid_array(values: List[str]) -> str:
+    """以数组字面量绑定 UUID 列表：text[] 无法隐式转换为预编译语句中的 uuid[]"""
+    return "{" + ",".join(values) + "}"
+
+
+_PLACEHOLDER_RE = re.compile(r"%\((\w+)\)s")
+# 每个数据库连接上已 PREPARE 的语句名，连接回收后自动释放
+_prepared_statements: "weakref.WeakKeyDictionary[Any, set]" = weakref.WeakKeyDictionary()
+
+
+DUPLICATE_PREPARED_STATEMENT = "42P05"
+# 42P05 语句已存在（例如连接被连接池换过），26000 语句不存在（例如被 DISCARD ALL 清掉），
+# 42P18 参数类型无法推断（客户端插值执行时不受影响）
+PREPARE_ERROR_CODES = {DUPLICATE_PREPARED_STATEMENT, "26000", "42P18"}
+
+
+def _pgcode(exc: BaseException) -> Optional[str]:
+    return getattr(exc.__cause__, "pgcode", None) or getattr(exc, "pgcode", None)
+
+
+def _prepared_statements_enabled() -> bool:
+    return os.getenv("TEXT2SQL_PREPARED_STATEMENTS", "true").lower() not in ("0", "false", "no", "off")
+
+
+def _prepare_template(sql: str, params: Optional[Dict[str, Any]]) -> Tuple[str, str, List[Any]]:
+    """把 %(name)s 占位符改写为 $n，返回 (语句名, PREPARE 语句, EXECUTE 参数)"""
+    names: List[str] = []
+
+    def placeholder(match: "re.Match[str]") -> str:
+        name = match.group(1)
+        if name not in names:
+            names.append(name)
+        return f"${names.index(name) + 1}"
+
+    body = _PLACEHOLDER_RE.sub(placeholder, sql)
+    statement = "agent_" + hashlib.sha1(body.encode("utf-8")).hexdigest()[:16]
+    values = [(params or {})[name] for name in names]
+    return statement, f"PREPARE {statement} AS {body}", values
+
+
+def _execute_template(cursor, sql: str, params: Optional[Dict[str, Any]], prepare: bool = True) -> None:
+    """执行 SQL；确定性模板在每个连接上只 PREPARE 一次，之后复用服务端执行计划。
+
+    事务块内（PREPARE 失败会中止整个事务）或通过 TEXT2SQL_PREPARED_STATEMENTS=false
+    关闭时（例如经由 PgBouncer 事务池连接）直接以绑定参数执行。
+    """
+    if not (prepare and _prepared_statements_enabled()) or connection.in_atomic_block:
+        cursor.execute(sql, params)
+        return
+
+    statement, prepare_sql, values = _prepare_template(sql, params)
+    raw_connection = connection.connection
+    prepared = _prepared_statements.setdefault(raw_connection, set())
+    try:
+        if statement not in prepared:
+            cursor.execute(prepare_sql)
+            prepared.add(statement)
+        if values:
+            cursor.execute(f"EXECUTE {statement} ({', '.join(['%s'] * len(values))})", values)
+        else:
+            cursor.execute(f"EXECUTE {statement}")
+    except DatabaseError as exc:
+        # 只有预编译本身的问题才改为直接执行；超时等查询错误直接抛出，避免慢查询再跑一遍
+        if _pgcode(exc) not in PREPARE_ERROR_CODES:
+            raise
+        logger.warning("prepared statement %s failed, executing directly: %s", statement, exc)
+        prepared.discard(statement)
+        if _pgcode(exc) == DUPLICATE_PREPARED_STATEMENT:
+            cursor.execute(f"DEALLOCATE {statement}")
+        cursor.execute(sql, params)
+
+
 def sql_executor(state: AgentState) -> Dict[str, Any]:
     sql = state.get("generated_sql", "")
     validation_error = _validate_sql(sql)
@@ -406,7 +469,13 @@ def sql_executor(state: AgentState) -> Dict[str, Any]:
         with connection.cursor() as cursor:
             cursor.execute("SET statement_timeout TO 3000")
             try:
-                cursor.execute(sql)
+                # LLM 生成的 SQL 每次都不同，只有确定性模板值得预编译
+                _execute_template(
+                    cursor,
+                    sql,
+                    state.get("sql_params"),
+                    prepare=not state.get("generated_by_llm"),
+                )
                 columns = [col[0] for col in cursor.description]
                 raw_data = [dict(zip(columns, row)) for row in cursor.fetchall()]
             finally:
@@ -451,24 +520,29 @@ def llm_post_processor(state: AgentState) -> Dict[str, Any]:
     if not raw_data:
         return {}
 
+    # 只有真正由 LLM 生成、执行成功且有结果的 SQL 才进入复用索引
+    if not state.get("sql_error") and not state.get("reused_query"):
+        remember_successful_sql(state["query"], state.get("generated_sql", ""))
+
     # If the SQL already returned the standard row shape, keep it exact.
     # Re-querying by group_id alone can pull unrelated videos from the same team.
     if any(row.get("video_id") or row.get("award_record_id") for row in raw_data):
         return {}
 
-    group_ids = sorted({str(r["group_id"]) for r in raw_data if r.get("group_id")})
+    group_ids = sorted({str(r["group_id"]) for r in raw_data if _is_uuid(r.get("group_id"))})
     if not group_ids:
         return {}
 
-    ids_literal = ", ".join(f"'{gid}'" for gid in group_ids)
-    where = f"ar.group_id IN ({ids_literal})"
-    follow_up_sql = _award_rows_sql(where, limit=200)
 
     try:
         with connection.cursor() as cursor:
             cursor.execute("SET statement_timeout TO 5000")
             try:
-                cursor.execute(follow_up_sql)
+                _execute_template(
+                    cursor,
+                    AWARD_ROWS_BY_GROUP_SQL,
+                    {"group_ids": _uuid_array(group_ids), "limit": 200},
+                )
                 columns = [col[0] for col in cursor.description]
                 enriched = [dict(zip(columns, row)) for row in cursor.fetchall()]
             finally:
@@ -495,6 +569,15 @@ def _final_response(final: Dict[str, Any]) -> Dict[str, Any]:
         return final
 
 
+def _debug_info(state: AgentState) -> Dict[str, Any]:
+    return {
+        "selected_schemas": state.get("selected_schemas", []),
+        "generated_sql": state.get("generated_sql", ""),
+        "sql_params": state.get("sql_params"),
+        "reused_query": state.get("reused_query", ""),
+    }
+
+
 def _group_from_row(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     if not row.get("group_id"):
         return None
@@ -548,6 +631,19 @@ def _award_record_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def _result_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "award_record": _award_record_from_row(row) if row.get("award_record_id") else None,
+        "group": _group_from_row(row),
+        "video": _video_from_row(row),
+        "competition": {
+            "id": row.get("competition_id"),
+            "name": row.get("competition_name") or "",
+            "year": row.get("competition_year"),
+        },
+    }
+
+
 def response_formatter(state: AgentState) -> Dict[str, Any]:
     query = state["query"]
     raw_data = state.get("raw_data", [])
@@ -563,10 +659,7 @@ def response_formatter(state: AgentState) -> Dict[str, Any]:
             "summary": f"检索执行失败：{sql_error}",
             "data": [],
             "sections": [],
-            "debug": {
-                "selected_schemas": state.get("selected_schemas", []),
-                "generated_sql": state.get("generated_sql", ""),
-            },
+            "debug": _debug_info(state),
             "natural_language_overview": f"检索执行失败：{sql_error}",
             "video_id_list": [],
             "group_id_list": [],
@@ -585,10 +678,7 @@ def response_formatter(state: AgentState) -> Dict[str, Any]:
             "summary": "当前数据库中没有查到符合条件的获奖记录、视频或团队。",
             "data": [],
             "sections": [],
-            "debug": {
-                "selected_schemas": state.get("selected_schemas", []),
-                "generated_sql": state.get("generated_sql", ""),
-            },
+            "debug": _debug_info(state),
             "natural_language_overview": "当前数据库中没有查到符合条件的结果。",
             "video_id_list": [],
             "group_id_list": [],
@@ -629,30 +719,14 @@ def response_formatter(state: AgentState) -> Dict[str, Any]:
             "summary": summary,
             "data": items,
             "sections": [{"type": "leaderboard", "title": "金奖最多团队", "items": items}],
-            "debug": {
-                "selected_schemas": state.get("selected_schemas", []),
-                "generated_sql": state.get("generated_sql", ""),
-            },
+            "debug": _debug_info(state),
             "natural_language_overview": summary,
             "video_id_list": video_ids,
             "group_id_list": group_ids,
         }
         return {"final_response": _final_response(final)}
 
-    rows = []
-    for row in raw_data:
-        rows.append(
-            {
-                "award_record": _award_record_from_row(row) if row.get("award_record_id") else None,
-                "group": _group_from_row(row),
-                "video": _video_from_row(row),
-                "competition": {
-                    "id": row.get("competition_id"),
-                    "name": row.get("competition_name") or "",
-                    "year": row.get("competition_year"),
-                },
-            }
-        )
+    rows = [_result_row(row) for row in raw_data]
 
     if intent_type == "award_keyword":
         # Group by group — each entry has {group, videos[], award_records[]}
@@ -686,10 +760,7 @@ def response_formatter(state: AgentState) -> Dict[str, Any]:
         "summary": summary,
         "data": items if intent_type == "award_keyword" else rows,
         "sections": [{"type": ui_type, "title": title, "items": items if intent_type == "award_keyword" else rows}],
-        "debug": {
-            "selected_schemas": state.get("selected_schemas", []),
-            "generated_sql": state.get("generated_sql", ""),
-        },
+        "debug": _debug_info(state),
         "natural_language_overview": summary,
         "video_id_list": video_ids,
         "group_id_list": group_ids,
@@ -697,20 +768,39 @@ def response_formatter(state: AgentState) -> Dict[str, Any]:
     return {"final_response": _final_response(final)}
 
 
-def _run_without_langgraph(initial_state: AgentState) -> AgentState:
-    state: AgentState = dict(initial_state)
+STREAM_PREVIEW_ROWS = 20
+
+
+def _iter_agent_events(state: AgentState) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """逐步执行轻量工作流，每个阶段完成后产出 (事件名, 数据)，state 原地更新"""
     state.update(intent_schema_selector(state))
 
     route = route_by_complexity(state)
+    yield "intent", {
+        "intent_type": state.get("intent_type", "generic"),
+        "selected_schemas": state.get("selected_schemas", []),
+        "sql_template": state.get("sql_template"),
+        "route": route,
+    }
+
     while True:
         if route == "llm_sql_generator":
             state.update(llm_sql_generator(state))
             if state.get("sql_error"):
                 state["generated_by_llm"] = False
+                state["reused_query"] = ""
                 state.update(sql_generator(state))
         else:
             state.update(sql_generator(state))
 
+        yield "sql", {
+            "generated_sql": state.get("generated_sql", ""),
+            "sql_params": state.get("sql_params"),
+            "generated_by_llm": bool(state.get("generated_by_llm")),
+            "reused_query": state.get("reused_query", ""),
+            "retry_count": state.get("retry_count", 0),
+        }
+
         state.update(sql_executor(state))
 
         if not state.get("sql_error") or state.get("retry_count", 0) >= 3:
@@ -718,10 +808,26 @@ def _run_without_langgraph(initial_state: AgentState) -> AgentState:
 
         if state.get("generated_by_llm"):
             state["generated_by_llm"] = False
+            state["reused_query"] = ""
             route = "sql_generator"
 
+    raw_data = state.get("raw_data", [])
+    if raw_data:
+        # 补全查询之前先推送首批结果，前端可以立即渲染
+        yield "rows", {
+            "count": len(raw_data),
+            "rows": [_result_row(row) for row in raw_data[:STREAM_PREVIEW_ROWS]],
+        }
+
     for node in [llm_post_processor, response_formatter]:
         state.update(node(state))
+    yield "final", state["final_response"]
+
+
+def _run_without_langgraph(initial_state: AgentState) -> AgentState:
+    state: AgentState = dict(initial_state)
+    for _ in _iter_agent_events(state):
+        pass
     return state
 
 
@@ -759,14 +865,18 @@ def build_agent_graph():
     return graph.compile()
 
 
-def run_agent_search(query: str) -> Dict[str, Any]:
-    initial_state: AgentState = {
+def _initial_state(query: str) -> AgentState:
+    return {
         "query": query,
         "retry_count": 0,
         "raw_data": [],
         "selected_schemas": [],
     }
 
+
+def run_agent_search(query: str) -> Dict[str, Any]:
+    initial_state = _initial_state(query)
+
     graph = build_agent_graph()
     if graph is None:
         final_state = _run_without_langgraph(initial_state)
@@ -780,3 +890,13 @@ def run_agent_search(query: str) -> Dict[str, Any]:
             final_state = graph.invoke(initial_state)
 
     return final_state["final_response"]
+
+
+def run_agent_search_stream(query: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """流式版本：依次产出 intent / sql / rows / final 事件，出错时产出 error 事件"""
+    state = _initial_state(query)
+    try:
+        yield from _iter_agent_events(state)
+    except Exception as exc:
+        logger.exception("agent search stream failed")
+        yield "error", {"error": f"智能检索失败: {exc}"}
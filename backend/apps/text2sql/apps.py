@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class Text2SqlConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.text2sql'
+    verbose_name = '智能检索'
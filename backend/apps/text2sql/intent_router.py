@@ -0,0 +1,161 @@
+"""
+text2sql 意图路由
+
+把意图选择（top_gold_groups / award_keyword / generic）、奖项关键词提取和
+确定性模板匹配用到的全部触发词编译进一个 Aho-Corasick 自动机，
+每个查询只扫描一遍文本就得到全部结论，结果随 AgentState 传递，
+后续节点不再重复做子串判断。
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+class KeywordAutomaton:
+    """多模式串匹配自动机（Aho-Corasick）"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[str, ...]] = [()]
+
+        for keyword in set(keywords):
+            if keyword:
+                self._insert(keyword)
+        self._build_fail_links()
+
+    def _insert(self, keyword: str) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] += (keyword,)
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """依次产出 (结束位置, 关键词)，结束位置为开区间下标"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword in output[state]:
+                yield index + 1, keyword
+
+    def matches(self, text: str) -> Set[str]:
+        return {keyword for _, keyword in self.iter_matches(text)}
+
+
+TOP_RANK_WORDS = ["最多", "最高", "榜", "排行", "第一"]
+GOLD_WORDS = ["金奖", "一等奖", "冠军"]
+
+# (触发词, 奖项名称关键词)，按顺序取第一个命中的分组
+AWARD_KEYWORD_GROUPS: List[Tuple[str, List[str]]] = [
+    ("动作", ["动作", "武打", "打戏", "动作设计"]),
+    ("舞美", ["舞美", "舞台美术", "布景"]),
+    ("服装", ["服装", "造型", "服化"]),
+    ("人气", ["人气", "观众"]),
+    ("剧本", ["剧本", "编剧", "剧情"]),
+    ("表演", ["表演", "演技", "演员"]),
+]
+
+# 确定性 SQL 模板的触发条件，按优先级排列。
+# 每个条件是若干"任一命中"的词组，所有词组都命中才算匹配；
+# 标记为区分大小写的词必须按原样出现在查询中。
+TEMPLATE_RULES: List[Tuple[str, List[List[str]]]] = [
+    ("chinajoy", [["cj", "chinajoy", "china joy"]]),
+    ("most_awards", [["最多"], ["奖"]]),
+    ("gold_award", [["金奖", "一等奖", "冠军"]]),
+    ("both_golden_dragon_cj", [["同时获得", "都获得"], ["金龙"], ["CJ"]]),
+    ("action_design", [["动作设计", "最佳动作", "动作奖"]]),
+    ("gdc", [["GDC"]]),
+]
+CASE_SENSITIVE_WORDS = {"CJ", "GDC"}
+
+
+@dataclass(frozen=True)
+class QueryIntent:
+    intent_type: str
+    sql_template: Optional[str] = None
+    award_keywords: List[str] = field(default_factory=list)
+
+
+def _all_trigger_words() -> Set[str]:
+    words = set(TOP_RANK_WORDS) | set(GOLD_WORDS) | {"奖"}
+    for trigger, _ in AWARD_KEYWORD_GROUPS:
+        words.add(trigger)
+    for _, groups in TEMPLATE_RULES:
+        for group in groups:
+            words.update(group)
+    return {word.lower() for word in words}
+
+
+_AUTOMATON = KeywordAutomaton(_all_trigger_words())
+
+
+def _matched_words(query: str) -> Set[str]:
+    """一次扫描得到命中的触发词（小写）以及区分大小写的原样命中"""
+    lowered = query.lower()
+    same_length = len(lowered) == len(query)
+    matched: Set[str] = set()
+    for end, keyword in _AUTOMATON.iter_matches(lowered):
+        matched.add(keyword)
+        if same_length and query[end - len(keyword):end] in CASE_SENSITIVE_WORDS:
+            matched.add(query[end - len(keyword):end])
+    if not same_length:
+        matched.update(word for word in CASE_SENSITIVE_WORDS if word in query)
+    return matched
+
+
+def _rule_matches(groups: List[List[str]], matched: Set[str]) -> bool:
+    for group in groups:
+        if not any((word if word in CASE_SENSITIVE_WORDS else word.lower()) in matched for word in group):
+            return False
+    return True
+
+
+def classify_query(query: str) -> QueryIntent:
+    """对查询做一次性分类：意图类型、确定性模板和奖项关键词"""
+    matched = _matched_words(query)
+
+    sql_template = next(
+        (name for name, groups in TEMPLATE_RULES if _rule_matches(groups, matched)),
+        None,
+    )
+
+    if matched.intersection(TOP_RANK_WORDS) and matched.intersection(GOLD_WORDS):
+        return QueryIntent("top_gold_groups", sql_template)
+
+    award_keywords = next(
+        (list(keywords) for trigger, keywords in AWARD_KEYWORD_GROUPS if trigger in matched),
+        [],
+    )
+    if award_keywords or "奖" in matched:
+        return QueryIntent("award_keyword", sql_template, award_keywords)
+
+    return QueryIntent("generic", sql_template)
+
+
+def extract_award_keywords(query: str) -> List[str]:
+    return classify_query(query).award_keywords
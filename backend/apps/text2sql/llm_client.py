@@ -0,0 +1,317 @@
+"""
+共享 LLM 客户端（OpenAI 兼容 chat/completions 接口）
+
+text2sql 与 B 站爬虫共用这一个模块，不依赖 Django，爬虫把 backend 目录加入
+sys.path 后即可导入。每个配置在进程内只创建一个客户端：
+
+- 连接复用：requests.Session + 固定大小的连接池；
+- 截止时间：每次调用带一个 Deadline，排队等待和 HTTP 请求共用同一份预算；
+- 并发限制：同时在途的请求数有上限，满载时在预算内排队，超时立即失败，
+  不会让慢 LLM 占满所有 gunicorn worker；
+- 熔断：连续失败达到阈值后在冷却期内直接拒绝，冷却结束放行一个探测请求。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class LLMError(Exception):
+    """LLM 调用失败"""
+
+
+class LLMUnavailable(LLMError):
+    """未配置、熔断中或并发已满，本次没有发出请求"""
+
+
+class LLMTimeout(LLMError):
+    """超出截止时间"""
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class Deadline:
+    """单次调用的时间预算（单调时钟）"""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class CircuitBreaker:
+    """连续失败计数熔断器：closed -> open -> half-open -> closed"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probe_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+class LLMClient:
+    """带连接池、截止时间、并发上限和熔断的同步 LLM 客户端"""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str],
+        model: str,
+        *,
+        chat_url: Optional[str] = None,
+        api_key_header: str = "Authorization",
+        timeout: float = 20.0,
+        connect_timeout: float = 3.0,
+        max_concurrency: int = 4,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        session: Optional[requests.Session] = None,
+    ):
+        self.base_url = (base_url or "").rstrip("/")
+        self.chat_url = chat_url or f"{self.base_url}/chat/completions"
+        self.api_key = api_key
+        self.api_key_header = api_key_header
+        self.model = model
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_concurrency = max_concurrency
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key and self.chat_url)
+
+    def _headers(self) -> Dict[str, str]:
+        value = f"Bearer {self.api_key}" if self.api_key_header == "Authorization" else self.api_key
+        return {self.api_key_header: value, "Content-Type": "application/json"}
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        deadline: Optional[Deadline] = None,
+        temperature: float = 0,
+        max_tokens: int = 1200,
+        **extra: Any,
+    ) -> str:
+        """发送一次对话请求并返回回复文本，失败时抛出 LLMError 子类"""
+        if not self.configured:
+            raise LLMUnavailable("LLM API key 未配置")
+        deadline = deadline or Deadline(self.timeout)
+
+        # 熔断期间不必排队
+        if self.breaker.state == "open":
+            raise LLMUnavailable("LLM 熔断中，暂不发送请求")
+        if not self._slots.acquire(timeout=deadline.remaining()):
+            raise LLMUnavailable(f"LLM 并发已满（{self.max_concurrency}），等待超时")
+        try:
+            if not self.breaker.allow():
+                raise LLMUnavailable("LLM 熔断中，暂不发送请求")
+            try:
+                return self._send(messages, deadline, temperature, max_tokens, extra)
+            except LLMError:
+                raise
+            except Exception as exc:
+                self.breaker.record_failure()
+                raise LLMError(f"LLM 调用异常: {exc}") from exc
+        finally:
+            self._slots.release()
+
+    def _send(self, messages, deadline: Deadline, temperature, max_tokens, extra) -> str:
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            self.breaker.record_failure()
+            raise LLMTimeout("LLM 请求在发出前已超出截止时间")
+
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            **extra,
+        }
+        try:
+            response = self.session.post(
+                self.chat_url,
+                headers=self._headers(),
+                data=json.dumps(payload),
+                timeout=(min(self.connect_timeout, remaining), remaining),
+            )
+        except requests.exceptions.Timeout as exc:
+            self.breaker.record_failure()
+            raise LLMTimeout(f"LLM 请求超时: {exc}") from exc
+        except requests.exceptions.RequestException as exc:
+            self.breaker.record_failure()
+            raise LLMError(f"LLM 请求失败: {exc}") from exc
+
+        if response.status_code == 429 or response.status_code >= 500:
+            self.breaker.record_failure()
+            raise LLMError(f"LLM API 返回 {response.status_code}")
+        if response.status_code != 200:
+            # 4xx 是请求本身的问题，不计入熔断
+            self.breaker.record_success()
+            raise LLMError(f"LLM API 返回 {response.status_code}: {response.text[:200]}")
+
+        try:
+            content = response.json()["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError) as exc:
+            self.breaker.record_failure()
+            raise LLMError(f"LLM 响应格式异常: {exc}") from exc
+
+        self.breaker.record_success()
+        return content or ""
+
+    def chat_json(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        """要求模型输出 JSON 对象并解析，兼容带代码块的回复"""
+        kwargs.setdefault("response_format", {"type": "json_object"})
+        content = self.chat(messages, **kwargs).strip()
+        match = re.search(r"\{.*\}", content, re.DOTALL)
+        try:
+            return json.loads(match.group(0) if match else content)
+        except ValueError as exc:
+            raise LLMError(f"LLM 未返回合法 JSON: {content[:200]}") from exc
+
+
+def _text2sql_client() -> LLMClient:
+    return LLMClient(
+        base_url=os.getenv("SILICONFLOW_BASE_URL", "https://api.deepseek.com"),
+        api_key=os.getenv("SILICONFLOW_API_KEY"),
+        model=os.getenv("SILICONFLOW_MODEL", "deepseek-v4-flash"),
+        timeout=_env_float("TEXT2SQL_LLM_TIMEOUT", 12.0),
+        max_concurrency=_env_int("TEXT2SQL_LLM_CONCURRENCY", 4),
+        failure_threshold=_env_int("TEXT2SQL_LLM_FAILURE_THRESHOLD", 5),
+        reset_timeout=_env_float("TEXT2SQL_LLM_RESET_TIMEOUT", 30.0),
+    )
+
+
+def _crawler_client() -> LLMClient:
+    """爬虫沿用原有的密钥回退顺序：DeepSeek -> SiliconFlow -> Azure OpenAI"""
+    common = {
+        "timeout": _env_float("CRAWLER_LLM_TIMEOUT", 30.0),
+        "max_concurrency": _env_int("CRAWLER_LLM_CONCURRENCY", 2),
+    }
+    deepseek_key = os.getenv("DEEPSEEK_API_KEY")
+    if deepseek_key:
+        return LLMClient("https://api.deepseek.com/v1", deepseek_key, "deepseek-chat", **common)
+
+    openai_key = os.getenv("openai_api_key")
+    if openai_key:
+        return LLMClient(
+            "https://api.siliconflow.cn/v1", openai_key, "Qwen/Qwen3-Next-80B-A3B-Instruct", **common
+        )
+
+    azure_key = os.getenv("AZURE_OPENAI_API_KEY")
+    azure_endpoint = (os.getenv("AZURE_OPENAI_ENDPOINT") or "").rstrip("/")
+    azure_deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
+    if azure_key and azure_endpoint and azure_deployment:
+        return LLMClient(
+            azure_endpoint,
+            azure_key,
+            azure_deployment,
+            chat_url=(
+                f"{azure_endpoint}/openai/deployments/{azure_deployment}"
+                "/chat/completions?api-version=2024-02-01"
+            ),
+            api_key_header="api-key",
+            **common,
+        )
+
+    return LLMClient("", None, "", **common)
+
+
+CLIENT_FACTORIES: Dict[str, Callable[[], LLMClient]] = {
+    "text2sql": _text2sql_client,
+    "crawler": _crawler_client,
+}
+
+_clients: Dict[str, LLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(profile: str = "text2sql") -> LLMClient:
+    """按配置名获取进程内共享的客户端"""
+    with _clients_lock:
+        client = _clients.get(profile)
+        if client is None:
+            client = CLIENT_FACTORIES[profile]()
+            _clients[profile] = client
+        return client
+
+
+def reset_llm_clients() -> None:
+    """丢弃已创建的客户端（环境变量变更后或测试中使用）"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.session.close()
+        _clients.clear()
@@ -4,16 +4,16 @@
 使用现代化的create_agent和结构化输出功能
 """
 
-import os
-import json
 import re
-import requests
 import logging
 from typing import Dict, List, Any, Optional, Union
 from dotenv import load_dotenv
 
 from pydantic import BaseModel, Field
 
+from apps.text2sql.intent_router import classify_query
+from apps.text2sql.llm_client import Deadline, LLMError, get_llm_client
+
 # 加载环境变量
 load_dotenv()
 
@@ -39,13 +39,10 @@ FORBIDDEN_SQL_RE = re.compile(
 )
 
 
-def _heuristic_sql(query: str) -> Optional[str]:
-    """确定性SQL模板"""
-    normalized = query.lower()
-
-    # 模式1: ChinaJoy相关查询
-    if ("cj" in normalized or "chinajoy" in normalized or "china joy" in normalized):
-        return """
+# 确定性SQL模板，键名与 intent_router.TEMPLATE_RULES 一致
+HEURISTIC_SQL_TEMPLATES: Dict[str, str] = {
+    # ChinaJoy 金奖相关查询
+    "chinajoy": """
 WITH cj_awards AS (
     SELECT DISTINCT ar.group_id, COUNT(*) as award_count
     FROM awards_awardrecord ar
@@ -95,11 +92,10 @@ WHERE ar.group_id IS NOT NULL
   AND (a.name ILIKE '%金奖%' OR a.name ILIKE '%一等奖%' OR a.name ILIKE '%冠军%')
 ORDER BY cy.year DESC, c.name ASC, a.name ASC, g.name ASC, ca.award_count DESC
 LIMIT 80
-""".strip()
+""".strip(),
 
-    # 模式2: "最多"和"获奖"相关查询
-    if ("最多" in normalized and ("获奖" in normalized or "奖" in normalized)):
-        return """
+    # "最多"和"获奖"相关查询
+    "most_awards": """
 SELECT DISTINCT
     ar.id::text AS award_record_id,
     a.id::text AS award_id,
@@ -134,11 +130,10 @@ LEFT JOIN videos_video v ON v.id = ar.video_id
 WHERE ar.group_id IS NOT NULL
 ORDER BY cy.year DESC, c.name ASC, a.name ASC, g.award_count DESC, g.name ASC
 LIMIT 80
-""".strip()
+""".strip(),
 
-    # 模式3: 查询特定奖项
-    if ("金奖" in normalized or ("一等奖" in normalized) or ("冠军" in normalized)):
-        return """
+    # 查询特定奖项（金奖/一等奖/冠军）
+    "gold_award": """
 SELECT DISTINCT
     ar.id::text AS award_record_id,
     a.id::text AS award_id,
@@ -174,12 +169,10 @@ WHERE ar.group_id IS NOT NULL
   AND (a.name ILIKE '%金奖%' OR a.name ILIKE '%一等奖%' OR a.name ILIKE '%冠军%')
 ORDER BY cy.year DESC, c.name ASC, a.name ASC, g.name ASC
 LIMIT 80
-""".strip()
+""".strip(),
 
-    # 模式4: 同时获得金龙和CJ金奖的查询
-    if ("同时获得" in query or "都获得" in query) and ("金龙" in query and "CJ" in query):
-        logger.info(f"Matched pattern 4 for query: {query}")
-        return """
+    # 同时获得金龙和CJ金奖的团队
+    "both_golden_dragon_cj": """
 WITH teams_both_awards AS (
     SELECT DISTINCT g.id as group_id
     FROM groups_group g
@@ -230,11 +223,10 @@ LEFT JOIN competitions_competition c ON c.id = cy.competition_id
 LEFT JOIN videos_video v ON v.id = ar.video_id
 ORDER BY cy.year DESC, c.name ASC, a.name ASC, g.name ASC
 LIMIT 80
-""".strip()
+""".strip(),
 
-    # 模式5: 动作设计奖项
-    if "动作设计" in query or "最佳动作" in query or "动作奖" in query:
-        return """
+    # 动作设计奖项
+    "action_design": """
 SELECT DISTINCT
     ar.id::text AS award_record_id,
     a.id::text AS award_id,
@@ -270,11 +262,10 @@ WHERE ar.group_id IS NOT NULL
   AND (a.name ILIKE '%动作设计%' OR a.name ILIKE '%最佳动作%' OR a.name ILIKE '%动作奖%')
 ORDER BY cy.year DESC, c.name ASC, a.name ASC, g.name ASC
 LIMIT 80
-""".strip()
+""".strip(),
 
-    # 模式6: GDC/GDCoser相关查询
-    if "GDC" in query or "GDCoser" in query:
-        return """
+    # GDC/GDCoser 相关查询
+    "gdc": """
 SELECT DISTINCT
     v.id::text AS video_id,
     v.bv_number,
@@ -311,22 +302,23 @@ WHERE v.group_id IS NOT NULL
        OR c.name ILIKE '%GDCoser%' OR c.description ILIKE '%GDCoser%')
 ORDER BY v.year DESC, v.title ASC
 LIMIT 80
-""".strip()
+""".strip(),
+}
 
-    return None
+
+def _heuristic_sql(query: str) -> Optional[str]:
+    """确定性SQL模板"""
+    return HEURISTIC_SQL_TEMPLATES.get(classify_query(query).sql_template)
 
 
-def generate_sql_via_llm(query: str) -> Optional[str]:
+def generate_sql_via_llm(query: str, deadline: Optional[Deadline] = None) -> Optional[str]:
     """Generate read-only SQL through DeepSeek API."""
 
-    api_key = os.getenv("SILICONFLOW_API_KEY")
-    if not api_key:
+    client = get_llm_client("text2sql")
+    if not client.configured:
         logger.warning("SILICONFLOW_API_KEY not found")
         return None
 
-    base_url = os.getenv("SILICONFLOW_BASE_URL", "https://api.deepseek.com").rstrip("/")
-    model = os.getenv("SILICONFLOW_MODEL", "deepseek-v4-flash")
-
     SCHEMA_HINT = """
     Available PostgreSQL tables:
     - awards_award(id, name, competition_id)
@@ -352,52 +344,35 @@ def generate_sql_via_llm(query: str) -> Optional[str]:
     )
 
     try:
-        response = requests.post(
-            f"{base_url}/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            data=json.dumps({
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": "Return SQL only."},
-                    {"role": "user", "content": prompt},
-                ],
-                "temperature": 0,
-                "max_tokens": 1200,
-                "enable_thinking": False,
-            }),
-            timeout=25,
+        content = client.chat(
+            [
+                {"role": "system", "content": "Return SQL only."},
+                {"role": "user", "content": prompt},
+            ],
+            deadline=deadline,
+            temperature=0,
+            max_tokens=1200,
+            enable_thinking=False,
         )
+    except LLMError as exc:
+        logger.warning("LLM SQL generation failed, falling back to rule generator: %s", exc)
+        return None
 
-        if response.status_code == 200:
-            payload = response.json()
-            content = payload["choices"][0]["message"]["content"]
-            sql = _strip_code_fence(content)
-
-            logger.info("LLM raw response: %s", repr(content))
-            logger.info("LLM stripped SQL: %s", repr(sql))
-
-            if _is_safe_select(sql):
-                logger.info("LLM generated SQL: %s", sql.replace("\n", " ")[:500])
-                return sql
-            else:
-                # 详细记录为什么SQL不安全
-                if not sql.strip():
-                    logger.warning("LLM generated empty SQL")
-                elif not sql.lower().startswith(("select", "with")):
-                    logger.warning("LLM generated non-SELECT SQL: starts with %s", sql[:10].lower())
-                elif FORBIDDEN_SQL_RE.search(sql):
-                    logger.warning("LLM SQL contains forbidden keywords: %s", FORBIDDEN_SQL_RE.findall(sql))
+    sql = _strip_code_fence(content)
+    logger.info("LLM raw response: %s", repr(content))
+    logger.info("LLM stripped SQL: %s", repr(sql))
 
-                logger.warning("LLM generated unsafe or invalid SQL: %s", sql[:300])
-        else:
-            logger.warning("LLM API request failed: %s", response.status_code)
+    if _is_safe_select(sql):
+        logger.info("LLM generated SQL: %s", sql.replace("\n", " ")[:500])
+        return sql
 
-    except requests.exceptions.RequestException as e:
-        logger.warning("LLM request failed: %s", e)
-    except Exception as exc:
-        logger.warning("LLM SQL generation failed, falling back to rule generator: %s", exc)
+    # 详细记录为什么SQL不安全
+    if not sql.strip():
+        logger.warning("LLM generated empty SQL")
+    elif not sql.lower().startswith(("select", "with")):
+        logger.warning("LLM generated non-SELECT SQL: starts with %s", sql[:10].lower())
+    elif FORBIDDEN_SQL_RE.search(sql):
+        logger.warning("LLM SQL contains forbidden keywords: %s", FORBIDDEN_SQL_RE.findall(sql))
 
-    return None
\ No newline at end of file
+    logger.warning("LLM generated unsafe or invalid SQL: %s", sql[:300])
+    return None
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+本地 LLM 桩服务（OpenAI 兼容 /chat/completions）
+
+用于测试与本地联调，可配置固定回复、延迟和错误码，不消耗真实额度：
+    python -m apps.text2sql.llm_stub_server --port 8765 --reply "SELECT 1" --delay 0.5
+然后设置 SILICONFLOW_BASE_URL=http://127.0.0.1:8765 和任意 SILICONFLOW_API_KEY。
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+class LLMStubServer:
+    """在后台线程中运行的桩服务，属性可在测试中随时修改"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, reply: str = "SELECT 1",
+                 delay: float = 0.0, status: int = 200):
+        self.reply = reply
+        self.delay = delay
+        self.status = status
+        self.requests: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self) -> int:
+        with self._lock:
+            return len(self.requests)
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    payload = {}
+                with stub._lock:
+                    stub.requests.append({"path": self.path, "headers": dict(self.headers), "json": payload})
+
+                if stub.delay:
+                    time.sleep(stub.delay)
+
+                if stub.status != 200:
+                    body = json.dumps({"error": {"message": "stub error"}}).encode()
+                else:
+                    body = json.dumps({
+                        "id": "stub",
+                        "object": "chat.completion",
+                        "model": payload.get("model", "stub"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": stub.reply},
+                            "finish_reason": "stop",
+                        }],
+                    }, ensure_ascii=False).encode()
+
+                try:
+                    self.send_response(stub.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "LLMStubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "LLMStubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 LLM 桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--reply", default="SELECT 1")
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--status", type=int, default=200)
+    args = parser.parse_args()
+
+    stub = LLMStubServer(args.host, args.port, args.reply, args.delay, args.status)
+    print(f"LLM stub listening on {stub.base_url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
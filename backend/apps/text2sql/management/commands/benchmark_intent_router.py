@@ -0,0 +1,62 @@
+"""
+意图路由性能基准
+
+用法:
+    python manage.py benchmark_intent_router [--queries 20000] [--repeat 5]
+"""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.text2sql.intent_router import classify_query
+
+
+SAMPLE_QUERIES = [
+    "哪个团队获得的金奖最多",
+    "CJ金奖团队有哪些",
+    "同时获得金龙金奖和CJ金奖的团队有哪些",
+    "最佳动作设计奖的获奖团队",
+    "2023年最佳舞美是哪个团队",
+    "GDCoser 舞台剧视频",
+    "上海有哪些cos团队",
+    "原神相关的舞台剧视频",
+    "人气奖排行榜第一的社团",
+    "有没有崩坏星穹铁道的剧本获奖作品",
+]
+
+
+def build_queries(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    filler = "的团队社团视频作品舞台剧有哪些是哪个请问一下"
+    queries = []
+    for _ in range(count):
+        base = rng.choice(SAMPLE_QUERIES)
+        prefix = "".join(rng.choice(filler) for _ in range(rng.randint(0, 12)))
+        suffix = "".join(rng.choice(filler) for _ in range(rng.randint(0, 12)))
+        queries.append(prefix + base + suffix)
+    return queries
+
+
+class Command(BaseCommand):
+    help = '测量 text2sql 意图路由（classify_query）的吞吐'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=int, default=20000, help="合成查询数")
+        parser.add_argument("--repeat", type=int, default=5, help="重复轮数")
+
+    def handle(self, *args, **options):
+        queries = build_queries(options["queries"])
+        rates = []
+        for _ in range(options["repeat"]):
+            started = time.perf_counter()
+            for query in queries:
+                classify_query(query)
+            elapsed = time.perf_counter() - started
+            rates.append(len(queries) / elapsed)
+
+        self.stdout.write(f"查询数: {len(queries)} x {options['repeat']}")
+        self.stdout.write(f"吞吐: 中位 {statistics.median(rates):,.0f} q/s, 最低 {min(rates):,.0f} q/s")
+        self.stdout.write(f"单次: {1e6 / statistics.median(rates):.1f} µs")
@@ -0,0 +1,87 @@
+"""
+确定性 SQL 模板延迟基准
+
+对比两种执行方式：
+- inline:   参数直接拼进 SQL 文本（旧实现），每次都要重新解析和规划；
+- prepared: 服务端 PREPARE 一次，之后 EXECUTE 复用执行计划。
+
+用法:
+    python manage.py benchmark_sql_templates [--runs 200]
+"""
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.text2sql.agent_workflow import (
+    AWARD_KEYWORD_SQL,
+    AWARD_ROWS_BY_GROUP_SQL,
+    GENERIC_SEARCH_SQL,
+    TOP_GOLD_GROUPS_SQL,
+    _contains_pattern,
+    _execute_template,
+    _uuid_array,
+)
+
+
+def _sample_group_ids():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT id::text FROM groups_group ORDER BY award_count DESC LIMIT 5")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _templates():
+    return [
+        ("top_gold_groups", TOP_GOLD_GROUPS_SQL, None),
+        ("award_keyword", AWARD_KEYWORD_SQL, {
+            "patterns": [_contains_pattern(k) for k in ["舞美", "舞台美术", "布景"]],
+            "limit": 80,
+        }),
+        ("generic", GENERIC_SEARCH_SQL, {"pattern": _contains_pattern("原神")}),
+        ("award_rows_by_group", AWARD_ROWS_BY_GROUP_SQL, {
+            "group_ids": _uuid_array(_sample_group_ids()),
+            "limit": 200,
+        }),
+    ]
+
+
+def _timed(runs, func):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+class Command(BaseCommand):
+    help = '对比确定性 SQL 模板内联执行与服务端预编译执行的延迟'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=200, help="每个模板每种方式的执行次数")
+
+    def handle(self, *args, **options):
+        runs = options["runs"]
+        self.stdout.write(f"{'template':<22} {'inline p50':>11} {'p95':>8} {'prepared p50':>13} {'p95':>8}  (ms)")
+        with connection.cursor() as cursor:
+            for name, sql, params in _templates():
+                inline_sql = cursor.cursor.mogrify(sql, params).decode() if params else sql
+
+                def run_inline():
+                    cursor.execute(inline_sql)
+                    cursor.fetchall()
+
+                def run_prepared():
+                    _execute_template(cursor, sql, params)
+                    cursor.fetchall()
+
+                run_prepared()  # 预热：首次调用包含 PREPARE
+                inline = _timed(runs, run_inline)
+                prepared = _timed(runs, run_prepared)
+                self.stdout.write(
+                    f"{name:<22} {inline[0]:>11.2f} {inline[1]:>8.2f} "
+                    f"{prepared[0]:>13.2f} {prepared[1]:>8.2f}"
+                )
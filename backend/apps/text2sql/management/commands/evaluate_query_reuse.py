@@ -0,0 +1,101 @@
+"""
+离线评估近似查询 SQL 复用的阈值
+
+数据集为 JSONL，每行 {"query": "...", "sql": "..."}，可以直接从线上成功的
+agent_search 日志导出。采用留一法：每条查询在其余样本构成的索引中检索，
+命中且复用的 SQL 与自身 SQL 一致记为正确复用，不一致记为误复用。
+
+用法:
+    python manage.py evaluate_query_reuse [dataset.jsonl] [--thresholds 0.7,0.8,0.9]
+不指定数据集时使用内置的小样本。
+"""
+
+import json
+import re
+from typing import Dict, List
+
+from django.core.management.base import BaseCommand
+
+from apps.text2sql.query_index import QueryIndex
+
+
+SAMPLE_DATASET: List[Dict[str, str]] = [
+    {"query": "哪个团队获得的金奖最多", "sql": "SQL_TOP_GOLD"},
+    {"query": "金奖最多的团队是哪个", "sql": "SQL_TOP_GOLD"},
+    {"query": "获得金奖数量最多的社团", "sql": "SQL_TOP_GOLD"},
+    {"query": "拿过最多金奖的团队有哪些", "sql": "SQL_TOP_GOLD"},
+    {"query": "2023年获得最佳舞美的团队", "sql": "SQL_STAGE WHERE year = 2023"},
+    {"query": "2023年最佳舞美奖是哪个团队", "sql": "SQL_STAGE WHERE year = 2023"},
+    {"query": "2024年获得最佳舞美的团队", "sql": "SQL_STAGE WHERE year = 2024"},
+    {"query": "幻想乡社团得过哪些奖", "sql": "SQL_GROUP_AWARDS WHERE g.name ILIKE '%幻想乡%'"},
+    {"query": "幻想乡社团获得过什么奖项", "sql": "SQL_GROUP_AWARDS WHERE g.name ILIKE '%幻想乡%'"},
+    {"query": "星辰社团得过哪些奖", "sql": "SQL_GROUP_AWARDS WHERE g.name ILIKE '%星辰%'"},
+    {"query": "上海有哪些cos团队", "sql": "SQL_GROUPS WHERE g.city ILIKE '%上海%'"},
+    {"query": "上海的cosplay社团有哪些", "sql": "SQL_GROUPS WHERE g.city ILIKE '%上海%'"},
+    {"query": "广州有哪些cos团队", "sql": "SQL_GROUPS WHERE g.city ILIKE '%广州%'"},
+    {"query": "原神相关的舞台剧视频", "sql": "SQL_VIDEOS WHERE v.title ILIKE '%原神%'"},
+    {"query": "有没有原神的舞台剧", "sql": "SQL_VIDEOS WHERE v.title ILIKE '%原神%'"},
+    {"query": "崩坏星穹铁道的舞台剧视频", "sql": "SQL_VIDEOS WHERE v.title ILIKE '%星穹铁道%'"},
+]
+
+
+def _canonical_sql(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql.strip().rstrip(";")).lower()
+
+
+def load_dataset(path: str) -> List[Dict[str, str]]:
+    rows = []
+    with open(path, encoding="utf-8") as fp:
+        for line in fp:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            if row.get("query") and row.get("sql"):
+                rows.append({"query": row["query"], "sql": row["sql"]})
+    return rows
+
+
+def evaluate(rows: List[Dict[str, str]], thresholds: List[float]) -> List[Dict[str, float]]:
+    results = []
+    for threshold in thresholds:
+        hits = correct = 0
+        for i, row in enumerate(rows):
+            index = QueryIndex(rows[:i] + rows[i + 1:])
+            match = index.match(row["query"], threshold=threshold)
+            if not match:
+                continue
+            hits += 1
+            if _canonical_sql(match.sql) == _canonical_sql(row["sql"]):
+                correct += 1
+        results.append({
+            "threshold": threshold,
+            "reuse_rate": hits / len(rows) if rows else 0.0,
+            "precision": correct / hits if hits else 1.0,
+            "false_reuse": hits - correct,
+        })
+    return results
+
+
+class Command(BaseCommand):
+    help = '评估 text2sql 近似查询 SQL 复用阈值（留一法）'
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", nargs="?", help="JSONL 数据集路径，不指定时使用内置小样本")
+        parser.add_argument(
+            "--thresholds",
+            default="0.5,0.6,0.7,0.75,0.8,0.85,0.9,0.95",
+            help="逗号分隔的相似度阈值",
+        )
+
+    def handle(self, *args, **options):
+        rows = load_dataset(options["dataset"]) if options["dataset"] else SAMPLE_DATASET
+        thresholds = [float(value) for value in options["thresholds"].split(",") if value.strip()]
+
+        self.stdout.write(f"样本数: {len(rows)}")
+        self.stdout.write(f"{'threshold':>10} {'reuse_rate':>11} {'precision':>10} {'false_reuse':>12}")
+        for result in evaluate(rows, thresholds):
+            self.stdout.write(
+                f"{result['threshold']:>10.2f} {result['reuse_rate']:>11.2%} "
+                f"{result['precision']:>10.2%} {result['false_reuse']:>12d}"
+            )
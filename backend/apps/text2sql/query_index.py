@@ -0,0 +1,209 @@
+"""
+text2sql 近似查询 SQL 复用索引
+
+agent_search 的大量查询只是同一问题的不同说法。这里把执行成功的
+"查询 -> LLM SQL" 记录下来，用字符 n-gram 哈希向量 + NumPy 余弦相似度
+做最近邻检索，相似度达到阈值时直接复用已验证的 SQL，省去一次 LLM 调用。
+
+- 向量化完全在 CPU 上完成，不依赖任何模型文件；
+- 样本通过 Django 缓存在各进程间共享，进程内只缓存向量矩阵；
+- SQL 中来自原查询的字面量（团队名、年份等）必须同样出现在新查询里，
+  避免"A 团队获奖情况"误复用"B 团队获奖情况"的 SQL。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+EMBEDDING_DIM = 512
+NGRAM_WEIGHTS = {1: 1.0, 2: 0.7}
+DEFAULT_THRESHOLD = 0.8
+
+CACHE_ENTRIES_KEY = "text2sql:query_index:entries"
+CACHE_VERSION_KEY = "text2sql:query_index:version"
+CACHE_LOCK_KEY = "text2sql:query_index:lock"
+CACHE_LOCK_TIMEOUT = 10
+CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+_NORMALIZE_RE = re.compile(r"[\W_]+", re.UNICODE)
+# 疑问句中的虚词对语义几乎没有贡献，却会稀释短查询的相似度
+_FILLER_RE = re.compile("请问|有没有|有哪些|是哪个|是什么|哪个|哪些|什么|一下|相关|的|是|吗|呢|了")
+_SQL_LITERAL_RE = re.compile(r"'%?([^'%]+?)%?'")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def reuse_threshold() -> float:
+    try:
+        return float(os.getenv("TEXT2SQL_REUSE_THRESHOLD", DEFAULT_THRESHOLD))
+    except ValueError:
+        return DEFAULT_THRESHOLD
+
+
+def max_entries() -> int:
+    try:
+        return int(os.getenv("TEXT2SQL_REUSE_MAX_ENTRIES", "500"))
+    except ValueError:
+        return 500
+
+
+def normalize_query(query: str) -> str:
+    """全角转半角、转小写并去掉空白和标点"""
+    text = unicodedata.normalize("NFKC", query or "").lower()
+    return _NORMALIZE_RE.sub("", text)
+
+
+def embed_query(query: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """字符 1~2-gram 的有符号哈希向量（L2 归一化）"""
+    text = _FILLER_RE.sub("", normalize_query(query))
+    vector = np.zeros(dim, dtype=np.float32)
+    for n, weight in NGRAM_WEIGHTS.items():
+        for i in range(len(text) - n + 1):
+            # crc32 结果跨进程稳定，内置 hash() 对字符串带随机盐
+            h = zlib.crc32(f"{n}:{text[i:i + n]}".encode("utf-8"))
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            vector[h % dim] += sign * weight
+    norm = float(np.linalg.norm(vector))
+    if norm:
+        vector /= norm
+    return vector
+
+
+def literals_compatible(source_query: str, sql: str, query: str) -> bool:
+    """SQL 中取自原查询的字面量和数字必须也出现在新查询中"""
+    source = normalize_query(source_query)
+    target = normalize_query(query)
+
+    if set(_DIGITS_RE.findall(source)) != set(_DIGITS_RE.findall(target)):
+        return False
+
+    for literal in _SQL_LITERAL_RE.findall(sql):
+        value = normalize_query(literal)
+        if value and value in source and value not in target:
+            return False
+    return True
+
+
+@dataclass
+class ReuseMatch:
+    query: str
+    sql: str
+    score: float
+
+
+class QueryIndex:
+    """内存中的查询向量索引，按行存放归一化向量，检索即一次矩阵乘法"""
+
+    def __init__(self, entries: Iterable[Dict[str, str]] = (), dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.entries: List[Dict[str, str]] = []
+        self._keys: Dict[str, int] = {}
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        for entry in entries:
+            self.add(entry["query"], entry["sql"])
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, query: str, sql: str) -> None:
+        key = normalize_query(query)
+        if not key:
+            return
+        if key in self._keys:
+            self.entries[self._keys[key]] = {"query": query, "sql": sql}
+            return
+        self._keys[key] = len(self.entries)
+        self.entries.append({"query": query, "sql": sql})
+        self._matrix = np.vstack([self._matrix, embed_query(query, self.dim)])
+
+    def search(self, query: str, k: int = 1) -> List[Tuple[Dict[str, str], float]]:
+        if not self.entries:
+            return []
+        scores = self._matrix @ embed_query(query, self.dim)
+        k = min(k, len(self.entries))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.entries[i], float(scores[i])) for i in top]
+
+    def match(self, query: str, threshold: Optional[float] = None) -> Optional[ReuseMatch]:
+        threshold = reuse_threshold() if threshold is None else threshold
+        key = normalize_query(query)
+        for entry, score in self.search(query, k=3):
+            if score < threshold:
+                break
+            if normalize_query(entry["query"]) == key or literals_compatible(entry["query"], entry["sql"], query):
+                return ReuseMatch(query=entry["query"], sql=entry["sql"], score=score)
+        return None
+
+
+_local_lock = threading.Lock()
+_local_index: Optional[QueryIndex] = None
+_local_version: Optional[int] = None
+
+
+def _shared_index() -> Optional[QueryIndex]:
+    """按缓存版本号懒加载进程内索引，版本未变时不重复读取样本"""
+    global _local_index, _local_version
+    try:
+        version = cache.get(CACHE_VERSION_KEY)
+    except Exception as exc:
+        logger.warning("读取 SQL 复用索引版本失败: %s", exc)
+        return _local_index
+
+    with _local_lock:
+        if _local_index is None or version != _local_version:
+            try:
+                entries = cache.get(CACHE_ENTRIES_KEY) or []
+            except Exception as exc:
+                logger.warning("读取 SQL 复用索引失败: %s", exc)
+                return _local_index
+            _local_index = QueryIndex(entries)
+            _local_version = version
+        return _local_index
+
+
+def find_reusable_sql(query: str) -> Optional[ReuseMatch]:
+    """查找可直接复用的已验证 SQL，未命中返回 None"""
+    index = _shared_index()
+    if not index:
+        return None
+    match = index.match(query)
+    if match:
+        logger.info("Reusing SQL of %r for %r (score=%.3f)", match.query, query, match.score)
+    return match
+
+
+def remember_successful_sql(query: str, sql: str) -> None:
+    """记录一条执行成功且有结果的 LLM SQL，超出容量时淘汰最早的样本
+
+    样本列表是各进程共享的读-改-写，必须持有 Redis 锁，否则并发写入会互相覆盖。
+    """
+    key = normalize_query(query)
+    if not key or not sql:
+        return
+    try:
+        with cache.lock(CACHE_LOCK_KEY, timeout=CACHE_LOCK_TIMEOUT, blocking_timeout=CACHE_LOCK_TIMEOUT):
+            entries = [
+                entry for entry in (cache.get(CACHE_ENTRIES_KEY) or [])
+                if normalize_query(entry["query"]) != key
+            ]
+            entries.append({"query": query, "sql": sql})
+            cache.set(CACHE_ENTRIES_KEY, entries[-max_entries():], CACHE_TIMEOUT)
+            try:
+                cache.incr(CACHE_VERSION_KEY)
+            except ValueError:
+                cache.set(CACHE_VERSION_KEY, 1, CACHE_TIMEOUT)
+    except Exception as exc:
+        logger.warning("写入 SQL 复用索引失败: %s", exc)
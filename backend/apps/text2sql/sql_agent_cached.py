@@ -83,6 +83,9 @@ class AgentOutput(BaseModel):
     )
 
 
+_LLM_CACHE: Dict[tuple, ChatSiliconFlow] = {}
+
+
 class SQLAgent:
     """现代化的SQL查询代理
     
@@ -122,14 +125,17 @@ class SQLAgent:
         base_url = os.getenv('SILICONFLOW_BASE_URL', 'https://api.siliconflow.cn/v1')
         model = os.getenv('SILICONFLOW_MODEL', 'Qwen/Qwen3-Next-80B-A3B-Instruct')
         
-        self.llm = ChatSiliconFlow(
-            model=model,
-            api_key=api_key,
-            base_url=base_url,
-            temperature=0,
-        )
-        
-        print("🤖 SiliconFlow LLM 初始化成功")
+        # 同一配置在进程内只创建一次客户端，复用底层 HTTP 连接池
+        cache_key = (model, api_key, base_url)
+        if cache_key not in _LLM_CACHE:
+            _LLM_CACHE[cache_key] = ChatSiliconFlow(
+                model=model,
+                api_key=api_key,
+                base_url=base_url,
+                temperature=0,
+            )
+            print("🤖 SiliconFlow LLM 初始化成功")
+        self.llm = _LLM_CACHE[cache_key]
         return self.llm
     
     def connect_database(self) -> SQLDatabase:
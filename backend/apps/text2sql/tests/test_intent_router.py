@@ -0,0 +1,94 @@
+import random
+
+from django.test import SimpleTestCase
+
+from apps.text2sql.intent_router import classify_query, extract_award_keywords
+
+
+def legacy_template(query):
+    """原 _heuristic_sql 的判断顺序"""
+    normalized = query.lower()
+    if 'cj' in normalized or 'chinajoy' in normalized or 'china joy' in normalized:
+        return 'chinajoy'
+    if '最多' in normalized and ('获奖' in normalized or '奖' in normalized):
+        return 'most_awards'
+    if '金奖' in normalized or '一等奖' in normalized or '冠军' in normalized:
+        return 'gold_award'
+    if ('同时获得' in query or '都获得' in query) and ('金龙' in query and 'CJ' in query):
+        return 'both_golden_dragon_cj'
+    if '动作设计' in query or '最佳动作' in query or '动作奖' in query:
+        return 'action_design'
+    if 'GDC' in query or 'GDCoser' in query:
+        return 'gdc'
+    return None
+
+
+LEGACY_KEYWORD_GROUPS = [
+    ('动作', ['动作', '武打', '打戏', '动作设计']),
+    ('舞美', ['舞美', '舞台美术', '布景']),
+    ('服装', ['服装', '造型', '服化']),
+    ('人气', ['人气', '观众']),
+    ('剧本', ['剧本', '编剧', '剧情']),
+    ('表演', ['表演', '演技', '演员']),
+]
+
+
+def legacy_keywords(query):
+    for trigger, keywords in LEGACY_KEYWORD_GROUPS:
+        if trigger in query:
+            return keywords
+    return []
+
+
+def legacy_intent(query):
+    """原 intent_schema_selector 的判断顺序"""
+    if any(w in query for w in ['最多', '最高', '榜', '排行', '第一']) and any(
+        w in query for w in ['金奖', '一等奖', '冠军']
+    ):
+        return 'top_gold_groups'
+    if legacy_keywords(query) or '奖' in query or '获奖' in query:
+        return 'award_keyword'
+    return 'generic'
+
+
+FRAGMENTS = [
+    'CJ', 'cj', 'Cj', 'ChinaJoy', 'china joy', 'GDC', 'gdc', 'GDCoser', '金龙', '同时获得', '都获得',
+    '最多', '最高', '榜', '排行', '第一', '金奖', '一等奖', '冠军', '奖', '获奖', '动作设计', '最佳动作',
+    '动作奖', '动作', '舞美', '服装', '人气', '剧本', '表演', '团队', '社团', '视频', '2023年', '哪些', 'İ',
+]
+
+
+class IntentRouterTests(SimpleTestCase):
+    def assert_legacy(self, query):
+        intent = classify_query(query)
+        self.assertEqual((intent.intent_type, intent.sql_template), (legacy_intent(query), legacy_template(query)), query)
+        # 原流程只在 award_keyword 意图下提取奖项关键词
+        if intent.intent_type == 'award_keyword':
+            self.assertEqual(intent.award_keywords, legacy_keywords(query), query)
+
+    def test_case_sensitive_triggers(self):
+        self.assertEqual(classify_query('GDC 舞台剧视频').sql_template, 'gdc')
+        self.assertIsNone(classify_query('gdc 舞台剧视频').sql_template)
+        self.assertEqual(classify_query('同时获得金龙和CJ金奖的团队').sql_template, 'chinajoy')
+        # 小写 cj 只命中 chinajoy 模板，不满足"金龙+CJ"
+        self.assertEqual(classify_query('同时获得金龙的团队 cj').sql_template, 'chinajoy')
+        self.assertEqual(classify_query('同时获得金龙的团队').sql_template, None)
+
+    def test_template_priority(self):
+        self.assertEqual(classify_query('CJ 获奖最多的团队').sql_template, 'chinajoy')
+        self.assertEqual(classify_query('金奖最多的团队').sql_template, 'most_awards')
+        self.assertEqual(classify_query('冠军动作设计').sql_template, 'gold_award')
+        self.assertEqual(classify_query('最佳动作 GDC').sql_template, 'action_design')
+
+    def test_intent_and_award_keywords(self):
+        self.assertEqual(classify_query('金奖排行第一的社团').intent_type, 'top_gold_groups')
+        self.assertEqual(classify_query('人气奖的获奖团队').intent_type, 'award_keyword')
+        self.assertEqual(extract_award_keywords('舞美和服装'), ['舞美', '舞台美术', '布景'])
+        self.assertEqual(extract_award_keywords('剧本表演'), ['剧本', '编剧', '剧情'])
+        self.assertEqual(classify_query('服装').intent_type, 'award_keyword')
+        self.assertEqual(classify_query('上海的团队').intent_type, 'generic')
+
+    def test_matches_legacy_cascade_on_fuzzed_queries(self):
+        rng = random.Random(0)
+        for _ in range(5000):
+            self.assert_legacy(''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 5))))
@@ -0,0 +1,97 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from apps.text2sql import llm_client
+from apps.text2sql.llm_client import (
+    Deadline,
+    LLMClient,
+    LLMError,
+    LLMTimeout,
+    LLMUnavailable,
+)
+from apps.text2sql.llm_sql_generator import generate_sql_via_llm
+from apps.text2sql.llm_stub_server import LLMStubServer
+
+
+class LLMClientTests(SimpleTestCase):
+    def setUp(self):
+        self.stub = LLMStubServer(reply='SELECT 1').start()
+        self.addCleanup(self.stub.stop)
+
+    def make_client(self, **kwargs):
+        client = LLMClient(self.stub.base_url, 'test-key', 'stub-model', **kwargs)
+        self.addCleanup(client.session.close)
+        return client
+
+    def test_chat_returns_reply_and_sends_auth(self):
+        client = self.make_client()
+
+        self.assertEqual(client.chat([{'role': 'user', 'content': 'hi'}]), 'SELECT 1')
+        self.assertEqual(client.chat([{'role': 'user', 'content': 'hi'}]), 'SELECT 1')
+
+        self.assertEqual(self.stub.request_count, 2)
+        request = self.stub.requests[0]
+        self.assertEqual(request['path'], '/chat/completions')
+        self.assertEqual(request['headers']['Authorization'], 'Bearer test-key')
+        self.assertEqual(request['json']['model'], 'stub-model')
+
+    def test_deadline_bounds_slow_responses(self):
+        self.stub.delay = 1.0
+        client = self.make_client()
+
+        started = time.monotonic()
+        with self.assertRaises(LLMTimeout):
+            client.chat([{'role': 'user', 'content': 'hi'}], deadline=Deadline(0.2))
+        self.assertLess(time.monotonic() - started, 0.8)
+
+    def test_circuit_opens_after_repeated_failures(self):
+        self.stub.status = 500
+        client = self.make_client(failure_threshold=2, reset_timeout=0.3)
+
+        for _ in range(2):
+            with self.assertRaises(LLMError):
+                client.chat([{'role': 'user', 'content': 'hi'}])
+        with self.assertRaises(LLMUnavailable):
+            client.chat([{'role': 'user', 'content': 'hi'}])
+        self.assertEqual(self.stub.request_count, 2)
+
+        # 冷却结束后放行一个探测请求，成功即恢复
+        self.stub.status = 200
+        time.sleep(0.35)
+        self.assertEqual(client.chat([{'role': 'user', 'content': 'hi'}]), 'SELECT 1')
+        self.assertEqual(client.breaker.state, 'closed')
+
+    def test_concurrency_limit_fails_fast_when_saturated(self):
+        self.stub.delay = 0.5
+        client = self.make_client(max_concurrency=1)
+        results = []
+
+        worker = threading.Thread(
+            target=lambda: results.append(client.chat([{'role': 'user', 'content': 'slow'}]))
+        )
+        worker.start()
+        time.sleep(0.1)
+
+        started = time.monotonic()
+        with self.assertRaises(LLMUnavailable):
+            client.chat([{'role': 'user', 'content': 'hi'}], deadline=Deadline(0.1))
+        self.assertLess(time.monotonic() - started, 0.4)
+
+        worker.join()
+        self.assertEqual(results, ['SELECT 1'])
+
+    def test_generate_sql_via_llm_uses_shared_client(self):
+        self.stub.reply = '```sql\nSELECT g.id::text AS group_id FROM groups_group g;\n```'
+        env = {'SILICONFLOW_API_KEY': 'test-key', 'SILICONFLOW_BASE_URL': self.stub.base_url}
+        with mock.patch.dict('os.environ', env):
+            llm_client.reset_llm_clients()
+            self.addCleanup(llm_client.reset_llm_clients)
+
+            sql = generate_sql_via_llm('上海的团队')
+
+            self.assertEqual(sql, 'SELECT g.id::text AS group_id FROM groups_group g')
+            self.stub.reply = 'DROP TABLE groups_group'
+            self.assertIsNone(generate_sql_via_llm('上海的团队'))
@@ -0,0 +1,58 @@
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.text2sql import agent_workflow
+from apps.text2sql.agent_workflow import _execute_template, _prepare_template
+
+SQL = 'SELECT %(value)s::int + 1 AS result'
+
+
+class PreparedTemplateTests(TransactionTestCase):
+    def setUp(self):
+        connection.ensure_connection()
+        agent_workflow._prepared_statements.pop(connection.connection, None)
+        self.addCleanup(self.deallocate_all)
+
+    def deallocate_all(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DEALLOCATE ALL')
+
+    def run_template(self, sql=SQL, params=None):
+        with connection.cursor() as cursor:
+            _execute_template(cursor, sql, params or {'value': 1})
+            return cursor.fetchall()
+
+    def server_statements(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT name FROM pg_prepared_statements')
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_template_is_prepared_once_per_connection(self):
+        statement = _prepare_template(SQL, {'value': 1})[0]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.run_template(), [(2,)])
+            self.assertEqual(self.run_template(params={'value': 5}), [(6,)])
+        executed = [query['sql'] for query in queries]
+        self.assertEqual(sum(sql.startswith('PREPARE') for sql in executed), 1)
+        self.assertEqual(sum(sql.startswith('EXECUTE') for sql in executed), 2)
+        self.assertIn(statement, self.server_statements())
+
+    def test_missing_statement_falls_back_to_direct_execution(self):
+        self.run_template()
+        # 模拟连接池执行 DISCARD ALL 后服务端语句丢失
+        self.deallocate_all()
+        self.assertEqual(self.run_template(params={'value': 2}), [(3,)])
+        # 下次调用重新 PREPARE
+        self.assertEqual(self.run_template(params={'value': 3}), [(4,)])
+        self.assertIn(_prepare_template(SQL, {'value': 1})[0], self.server_statements())
+
+    def test_query_errors_are_not_retried(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET statement_timeout TO 50')
+        self.addCleanup(lambda: connection.cursor().execute('RESET statement_timeout'))
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertRaises(OperationalError):
+                self.run_template('SELECT pg_sleep(%(seconds)s::float) IS NULL AS slept', {'seconds': 1})
+        executed = [query['sql'] for query in queries]
+        self.assertEqual([sql.split()[0] for sql in executed], ['PREPARE', 'EXECUTE'])
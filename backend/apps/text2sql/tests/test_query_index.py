@@ -0,0 +1,62 @@
+import threading
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.text2sql.query_index import (
+    CACHE_ENTRIES_KEY,
+    CACHE_VERSION_KEY,
+    QueryIndex,
+    literals_compatible,
+    remember_successful_sql,
+)
+
+SOURCE = '星海动漫社2023年获得了哪些奖项'
+SQL = (
+    "SELECT a.name FROM awards_awardrecord r JOIN awards_award a ON a.id = r.award_id "
+    "JOIN groups_group g ON g.id = r.group_id JOIN competitions_competitionyear y ON y.id = r.competition_year_id "
+    "WHERE g.name LIKE '%星海动漫社%' AND y.year = 2023"
+)
+
+
+class LiteralsCompatibleTests(SimpleTestCase):
+    def test_same_team_and_year(self):
+        self.assertTrue(literals_compatible(SOURCE, SQL, '星海动漫社 2023年 获得哪些奖项？'))
+
+    def test_other_team_or_year_is_incompatible(self):
+        self.assertFalse(literals_compatible(SOURCE, SQL, '晨光社2023年获得了哪些奖项'))
+        self.assertFalse(literals_compatible(SOURCE, SQL, '星海动漫社2024年获得了哪些奖项'))
+        self.assertFalse(literals_compatible(SOURCE, SQL, '星海动漫社获得了哪些奖项'))
+
+
+class QueryIndexMatchTests(SimpleTestCase):
+    def setUp(self):
+        self.index = QueryIndex([{'query': SOURCE, 'sql': SQL}])
+
+    def test_rephrased_query_reuses_sql(self):
+        match = self.index.match('星海动漫社2023年获得哪些奖项', threshold=0.8)
+        self.assertIsNotNone(match)
+        self.assertEqual(match.sql, SQL)
+
+    def test_other_team_or_year_does_not_reuse_sql(self):
+        for query in ('晨光动漫社2023年获得了哪些奖项', '星海动漫社2022年获得了哪些奖项'):
+            with self.subTest(query=query):
+                # 向量足够相似，确保是字面量校验拒绝了复用
+                self.assertGreaterEqual(self.index.search(query)[0][1], 0.8)
+                self.assertIsNone(self.index.match(query, threshold=0.8))
+
+
+class RememberSuccessfulSqlTests(SimpleTestCase):
+    def setUp(self):
+        cache.delete_many([CACHE_ENTRIES_KEY, CACHE_VERSION_KEY])
+        self.addCleanup(cache.delete_many, [CACHE_ENTRIES_KEY, CACHE_VERSION_KEY])
+
+    def test_concurrent_writes_keep_every_entry(self):
+        queries = [f'第{i}届比赛有哪些社团参赛' for i in range(8)]
+        threads = [threading.Thread(target=remember_successful_sql, args=(query, SQL)) for query in queries]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertCountEqual([entry['query'] for entry in cache.get(CACHE_ENTRIES_KEY)], queries)
+        self.assertEqual(cache.get(CACHE_VERSION_KEY), len(queries))
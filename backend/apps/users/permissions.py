@@ -0,0 +1,64 @@
+"""
+请求级权限上下文
+
+同一个请求里角色判断和"管理的社团"只计算一次，缓存在请求对象上，由权限类、
+视图和序列化器共享；逐行的权限判断变成集合查找，不再产生额外查询。
+"""
+
+from functools import cached_property
+
+DATA_MANAGER_ROLES = {'admin', 'editor'}
+
+_CACHE_ATTR = '_permission_context'
+
+
+class PermissionContext:
+    def __init__(self, user):
+        authenticated = bool(user and user.is_authenticated)
+        self.user = user if authenticated else None
+        self.user_id = user.id if authenticated else None
+        self.role = getattr(user, 'role', None) if authenticated else None
+        self.is_staff = authenticated and (user.is_staff or user.is_superuser)
+
+    @property
+    def is_authenticated(self):
+        return self.user_id is not None
+
+    def has_role(self, roles):
+        return self.role in roles
+
+    @cached_property
+    def can_manage_data(self):
+        """与 User.can_manage_data 一致：编辑及以上"""
+        return self.has_role(DATA_MANAGER_ROLES) or self.is_staff
+
+    @cached_property
+    def managed_group_ids(self):
+        """可管理的社团 id 集合，只有社团管理员（contributor）需要查询一次"""
+        if self.role != 'contributor':
+            return frozenset()
+        return frozenset(self.user.managed_groups.values_list('id', flat=True))
+
+    def can_manage_group(self, group):
+        """与 User.can_manage_group 一致，接受社团对象或 id"""
+        if not group:
+            return False
+        if self.can_manage_data:
+            return True
+        group_id = getattr(group, 'pk', group)
+        return group_id in self.managed_group_ids
+
+
+def permission_context(request):
+    """返回当前请求的权限上下文，首次调用时创建并缓存"""
+    if request is None:
+        return PermissionContext(None)
+    # DRF Request 与底层 HttpRequest 共享同一份缓存
+    target = getattr(request, '_request', request)
+    user = getattr(request, 'user', None)
+    context = getattr(target, _CACHE_ATTR, None)
+    # 认证前后（或测试中切换用户）user 可能变化，此时重新计算
+    if context is None or context.user_id != (user.id if user and user.is_authenticated else None):
+        context = PermissionContext(user)
+        setattr(target, _CACHE_ATTR, context)
+    return context
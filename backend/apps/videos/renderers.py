@@ -0,0 +1,22 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    text/event-stream 渲染器
+
+    让 Accept: text/event-stream（EventSource 默认发送）的请求通过内容协商；
+    流式响应本身不经过渲染器，这里只负责把错误等普通响应渲染成一条 error 事件
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        payload = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+        return f'event: error\ndata: {payload}\n\n'.encode(self.charset)
@@ -0,0 +1,32 @@
+from unittest import mock
+
+from rest_framework.test import APITestCase
+
+
+def fake_stream(query):
+    yield 'intent', {'intent_type': 'generic', 'query': query}
+    yield 'final', {'results': [], 'count': 0}
+
+
+class AgentSearchStreamTests(APITestCase):
+    url = '/api/videos/agent-search-stream/'
+
+    @mock.patch('apps.videos.views.run_agent_search_stream', fake_stream)
+    def test_event_source_request_receives_stream(self):
+        response = self.client.get(self.url, {'query': '金奖'}, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/event-stream'))
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body, (
+            'event: intent\ndata: {"intent_type": "generic", "query": "金奖"}\n\n'
+            'event: final\ndata: {"results": [], "count": 0}\n\n'
+        ))
+
+    def test_errors_are_rendered_as_events(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content.decode(), 'event: error\ndata: {"error": "搜索查询不能为空"}\n\n')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': '搜索查询不能为空'})
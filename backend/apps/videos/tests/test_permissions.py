@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from rest_framework.test import APITestCase
+
+from apps.groups.models import Group
+from apps.users.permissions import permission_context
+from apps.videos.models import Video
+
+User = get_user_model()
+
+
+class VideoManagePermissionTests(APITestCase):
+    def setUp(self):
+        self.group_a = Group.objects.create(name='社团 A')
+        self.group_b = Group.objects.create(name='社团 B')
+        self.manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='pass', role='contributor'
+        )
+        self.manager.managed_groups.add(self.group_a)
+        self.own = self.create_video('BV1OWN', self.group_a)
+        self.other = self.create_video('BV1OTHER', self.group_b)
+        self.client.force_authenticate(self.manager)
+
+    @staticmethod
+    def create_video(bv_number, group):
+        return Video.objects.create(
+            bv_number=bv_number,
+            title=bv_number,
+            url=f'https://www.bilibili.com/video/{bv_number}',
+            group=group,
+        )
+
+    def test_context_loads_managed_groups_once(self):
+        request = RequestFactory().get('/')
+        request.user = self.manager
+        with self.assertNumQueries(1):
+            perms = permission_context(request)
+            self.assertTrue(perms.can_manage_group(self.group_a))
+            self.assertFalse(perms.can_manage_group(self.group_b.id))
+            self.assertIs(permission_context(request), perms)
+            self.assertFalse(permission_context(request).can_manage_group(None))
+
+    def test_contributor_limited_to_managed_groups(self):
+        response = self.client.patch(f'/api/videos/{self.own.id}/', {'title': '新标题'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(f'/api/videos/{self.own.id}/', {'group': str(self.group_b.id)}, format='json')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.delete(f'/api/videos/{self.other.id}/')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.delete(f'/api/videos/{self.own.id}/')
+        self.assertEqual(response.status_code, 204)
+
+    def test_data_manager_can_delete_video_without_group(self):
+        orphan = self.create_video('BV1NOGROUP', None)
+        response = self.client.delete(f'/api/videos/{orphan.id}/')
+        self.assertEqual(response.status_code, 403)
+
+        editor = User.objects.create_user(username='editor', email='editor@example.com', password='pass', role='editor')
+        self.client.force_authenticate(editor)
+        response = self.client.delete(f'/api/videos/{orphan.id}/')
+        self.assertEqual(response.status_code, 204)
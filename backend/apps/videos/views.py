@@ -5,9 +5,10 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Count, Q
+from django.db.models import Count
 import pandas as pd
 import io
 
@@ -19,7 +20,8 @@ import uuid
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.conf import settings
-from django.http import JsonResponse, HttpResponse, FileResponse
+from django.http import JsonResponse, HttpResponse, FileResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
@@ -314,10 +316,12 @@ from .serializers import (
     ImportResultSerializer
 )
 from .filters import VideoFilter
+from .renderers import EventStreamRenderer
 from .bulk_import import process_bulk_import, get_import_template
 from .pagination import OptimizedVideoPagination, LargeResultsSetPagination
-from apps.groups.models import Group
+from apps.groups.autocomplete import autocomplete_groups
 from apps.groups.serializers import GroupSerializer
+from apps.users.permissions import permission_context
 import logging
 
 # 导入SQL Agent相关模块
@@ -342,13 +346,15 @@ for path in possible_paths:
 
 SQLAgent = None
 run_agent_search = None
+run_agent_search_stream = None
 logger = logging.getLogger(__name__)
 
 try:
-    from apps.text2sql.agent_workflow import run_agent_search
+    from apps.text2sql.agent_workflow import run_agent_search, run_agent_search_stream
     logger.info("LangGraph agent workflow imported successfully")
 except Exception as e:
     run_agent_search = None
+    run_agent_search_stream = None
     logger.error(f"Failed to import LangGraph agent workflow: {e}")
 
 if run_agent_search is None:
@@ -428,37 +434,37 @@ class VideoViewSet(viewsets.ModelViewSet):
 
     def ensure_can_manage_video(self, video):
         """确认当前用户可以管理该视频。"""
-        if self.request.user.can_manage_data():
-            return
-        if not video.group or not self.request.user.can_manage_group(video.group):
+        perms = permission_context(self.request)
+        if not perms.can_manage_data and not perms.can_manage_group(video.group_id):
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied('只能管理自己管理社团的视频')
     
     def perform_create(self, serializer):
         group = serializer.validated_data.get('group')
-        if not self.request.user.can_manage_data():
-            if not group or not self.request.user.can_manage_group(group):
-                from rest_framework.exceptions import PermissionDenied
-                raise PermissionDenied('只能为自己管理的社团上传视频')
+        perms = permission_context(self.request)
+        if not perms.can_manage_data and not perms.can_manage_group(group):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('只能为自己管理的社团上传视频')
         serializer.save(uploaded_by=self.request.user)
 
     def perform_update(self, serializer):
-        instance = self.get_object()
+        instance = serializer.instance
         target_group = serializer.validated_data.get('group', instance.group)
-        if not self.request.user.can_manage_data():
-            if not instance.group or not self.request.user.can_manage_group(instance.group):
+        perms = permission_context(self.request)
+        if not perms.can_manage_data:
+            if not perms.can_manage_group(instance.group_id):
                 from rest_framework.exceptions import PermissionDenied
                 raise PermissionDenied('只能编辑自己管理社团的视频')
-            if target_group and not self.request.user.can_manage_group(target_group):
+            if target_group and not perms.can_manage_group(target_group):
                 from rest_framework.exceptions import PermissionDenied
                 raise PermissionDenied('不能把视频转移到未管理的社团')
         serializer.save()
 
     def perform_destroy(self, instance):
-        if not self.request.user.can_manage_data():
-            if not instance.group or not self.request.user.can_manage_group(instance.group):
-                from rest_framework.exceptions import PermissionDenied
-                raise PermissionDenied('只能删除自己管理社团的视频')
+        perms = permission_context(self.request)
+        if not perms.can_manage_data and not perms.can_manage_group(instance.group_id):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('只能删除自己管理社团的视频')
         instance.delete()
 
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated], url_path='bilibili-metadata')
@@ -772,36 +778,25 @@ class VideoViewSet(viewsets.ModelViewSet):
         搜索社团（用于视频创建时选择社团）
         """
         search_query = request.query_params.get('search', '').strip()
-        page_size = min(int(request.query_params.get('page_size', 20)), 50)  # 限制最大返回数量
-        
-        # 构建查询条件
-        queryset = Group.objects.filter(is_active=True)
-        
-        if search_query:
-            # 支持按社团名称、省份、城市、地区搜索
-            queryset = queryset.filter(
-                Q(name__icontains=search_query) |
-                Q(province__icontains=search_query) |
-                Q(city__icontains=search_query) |
-                Q(location__icontains=search_query)
-            )
-        
-        # 按名称排序，限制返回数量
-        groups = queryset.order_by('name')[:page_size]
-        
-        # 序列化数据，只返回必要字段
-        groups_data = []
-        for group in groups:
-            groups_data.append({
-                'id': group.id,
-                'name': group.name,
-                'location': group.location or f"{group.province or ''}{group.city or ''}".strip(),
-                'province': group.province,
-                'city': group.city,
-                'video_count': group.video_count,
-                'is_active': group.is_active
-            })
-        
+        try:
+            page_size = int(request.query_params.get('page_size', 20))
+        except ValueError:
+            page_size = 20
+
+        # 走内存中的补全索引（名称中间匹配、拼音/首字母、省市地址前缀），按视频数排序
+        groups_data = [
+            {
+                'id': group['id'],
+                'name': group['name'],
+                'location': group['display_location'],
+                'province': group['province'],
+                'city': group['city'],
+                'video_count': group['video_count'],
+                'is_active': group['is_active'],
+            }
+            for group in autocomplete_groups(search_query, page_size)
+        ]
+
         return Response({
             'results': groups_data,
             'count': len(groups_data),
@@ -870,4 +865,38 @@ class VideoViewSet(viewsets.ModelViewSet):
             logger.exception("agent_search failed: %s", e)
             error_msg = f"Agent搜索失败: {str(e)}"
             return Response({'error': error_msg}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(
+        detail=False,
+        methods=['get', 'post'],
+        permission_classes=[permissions.AllowAny],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer],
+        url_path='agent-search-stream'
+    )
+    def agent_search_stream(self, request):
+        """
+        Agent智能搜索（SSE流式版本）
+        依次推送 intent（意图）、sql（选定SQL）、rows（首批结果）、final（完整结果）事件，
+        GET 方式便于浏览器直接使用 EventSource
+        """
+        source = request.query_params if request.method == 'GET' else request.data
+        search_query = (source.get('query') or '').strip()
+        if not search_query:
+            return Response({'error': '搜索查询不能为空'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if run_agent_search_stream is None:
+            return Response({'error': 'SQL Agent服务暂不可用'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        logger.info("agent_search stream start query_len=%d query=%r", len(search_query), search_query[:200])
+
+        def event_stream():
+            for event, payload in run_agent_search_stream(search_query):
+                data = json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False)
+                yield f"event: {event}\ndata: {data}\n\n"
+
+        response = StreamingHttpResponse(event_stream(), content_type='text/event-stream; charset=utf-8')
+        response['Cache-Control'] = 'no-cache'
+        # 关闭 Nginx 缓冲，保证事件即时送达
+        response['X-Accel-Buffering'] = 'no'
+        return response
     
@@ -71,6 +71,8 @@ LOCAL_APPS = [
     'apps.users',
     'apps.map',
     'apps.forum',
+    'apps.search',
+    'apps.text2sql',
     'storages',
 ]
 
@@ -353,6 +355,14 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Asia/Shanghai'
 
+# 论坛浏览数缓冲：同一用户/IP 的去重窗口（0 表示不去重）与落库间隔
+FORUM_VIEW_DEDUP_SECONDS = config('FORUM_VIEW_DEDUP_SECONDS', default=0, cast=int)
+FORUM_VIEW_FLUSH_SECONDS = config('FORUM_VIEW_FLUSH_SECONDS', default=60, cast=int)
+
+# 论坛孤儿附件：上传后多久未被正文引用视为孤儿，以及标记后保留多久再删除文件
+FORUM_ATTACHMENT_ORPHAN_TTL_HOURS = config('FORUM_ATTACHMENT_ORPHAN_TTL_HOURS', default=24, cast=int)
+FORUM_ATTACHMENT_ORPHAN_GRACE_HOURS = config('FORUM_ATTACHMENT_ORPHAN_GRACE_HOURS', default=72, cast=int)
+
 # Celery Beat 调度器配置
 from celery.schedules import crontab
 
@@ -364,6 +374,34 @@ CELERY_BEAT_SCHEDULE = {
             'expires': 3600,  # 任务1小时后过期
         }
     },
+    'flush-forum-post-views': {
+        'task': 'apps.forum.tasks.flush_post_views',
+        'schedule': FORUM_VIEW_FLUSH_SECONDS,
+        'options': {
+            'expires': FORUM_VIEW_FLUSH_SECONDS,
+        }
+    },
+    'process-pending-forum-attachments': {
+        'task': 'apps.forum.tasks.process_pending_attachments',
+        'schedule': crontab(minute='*/10'),
+        'options': {
+            'expires': 600,
+        }
+    },
+    'sweep-forum-attachments-daily': {
+        'task': 'apps.forum.tasks.sweep_forum_attachments',
+        'schedule': crontab(hour=5, minute=0),  # 每天凌晨5点清理孤儿附件
+        'options': {
+            'expires': 3600,
+        }
+    },
+    'reconcile-forum-counters-daily': {
+        'task': 'apps.forum.tasks.reconcile_forum_counters',
+        'schedule': crontab(hour=4, minute=30),  # 每天凌晨4点半校正论坛计数
+        'options': {
+            'expires': 3600,
+        }
+    },
 }
 
 # 使用默认调度器以读取 CELERY_BEAT_SCHEDULE 配置
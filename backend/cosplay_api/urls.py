@@ -55,6 +55,7 @@ urlpatterns = [
     path('api/users/', include('apps.users.urls')),
     path('api/forum/', include('apps.forum.urls')),
     path('api/map/', include('apps.map.urls')),
+    path('api/search/', include('apps.search.urls')),
 ]
 
 # Serve static and media files in development
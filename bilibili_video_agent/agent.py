@@ -1,8 +1,10 @@
 import os
+import sys
 import uuid
 import logging
 import operator
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Annotated, Optional
 from typing_extensions import TypedDict
 
@@ -11,16 +13,16 @@ from dotenv import load_dotenv
 # LangGraph
 from langgraph.graph import StateGraph, START, END
 
-# LLM
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
-from langchain_openai import AzureChatOpenAI
-from langchain_community.chat_models import ChatOpenAI as CommunityChatOpenAI
 
 # Project modules
 from .bilibili_api import search_videos_by_date, get_video_info
 from .database import get_db
 
+# 共享 LLM 客户端位于 backend/apps/text2sql/llm_client.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from apps.text2sql.llm_client import get_llm_client  # noqa: E402
+
 load_dotenv(dotenv_path='.env')
 
 logger = logging.getLogger("bilibili-video-agent.workflow")
@@ -49,56 +51,15 @@ class StageDramaMeta(BaseModel):
     drama_name: Optional[str] = Field(default=None, description="舞台剧名称。如无法判断可为空")
 
 
-# 统一在下方的 _get_llm 中处理多种 API Key 的回退逻辑
+# 与 backend 的 text2sql 共用同一个 LLM 客户端模块（连接复用、超时预算、并发限制、熔断），
+# 多种 API Key 的回退顺序在 llm_client 的 crawler 配置中处理
 
 def _get_llm():
-    """获取LLM客户端，支持多种模型服务"""
-    # 优先尝试DeepSeek
-    deepseek_key = os.getenv("DEEPSEEK_API_KEY")
-    if deepseek_key:
-        try:
-            from langchain_openai import ChatOpenAI as OpenAI
-            return OpenAI(
-                model="deepseek-chat",
-                temperature=0,
-                api_key=deepseek_key,
-                base_url="https://api.deepseek.com/v1"
-            )
-        except Exception as e:
-            logger.warning(f"DeepSeek初始化失败: {e}")
-
-    # 回退到OpenAI/SiliconFlow
-    openai_key = os.getenv("openai_api_key")
-    if openai_key:
-        try:
-            from langchain_openai import ChatOpenAI
-            return ChatOpenAI(
-                model="Qwen/Qwen3-Next-80B-A3B-Instruct",
-                temperature=0,
-                api_key=openai_key,
-                base_url="https://api.siliconflow.cn/v1"
-            )
-        except Exception as e:
-            logger.warning(f"OpenAI初始化失败: {e}")
-
-    # 最后尝试Azure OpenAI
-    azure_key = os.getenv("AZURE_OPENAI_API_KEY")
-    azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-    azure_deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
-    if azure_key and azure_endpoint and azure_deployment:
-        try:
-            from langchain_openai import AzureChatOpenAI
-            return AzureChatOpenAI(
-                azure_deployment=azure_deployment,
-                azure_endpoint=azure_endpoint,
-                api_key=azure_key,
-                api_version="2024-02-01",
-                temperature=0
-            )
-        except Exception as e:
-            logger.warning(f"Azure OpenAI初始化失败: {e}")
-
-    raise RuntimeError("未找到可用的LLM API密钥。请配置 DEEPSEEK_API_KEY 或 openai_api_key。")
+    """获取共享的LLM客户端，支持多种模型服务"""
+    client = get_llm_client("crawler")
+    if not client.configured:
+        raise RuntimeError("未找到可用的LLM API密钥。请配置 DEEPSEEK_API_KEY 或 openai_api_key。")
+    return client
 
 
 # -----------------------------
@@ -195,17 +156,18 @@ def llm_extract(state: State) -> dict:
 
     try:
         llm = _get_llm()
-        structured = llm.with_structured_output(StageDramaMeta)
         prompt = (
             "请从以下视频信息中提取舞台剧相关元数据，尽量从标题和描述推断：\n"
             "- competition: 关联的比赛或活动名称（例如 Chinajoy、BW、BML 等），无法判断则留空\n"
             "- group: 关联的社团/团队名称（例如 某某社团），无法判断则留空\n"
             "- drama_name: 舞台剧/作品名称（例如 龙族3勇气与命运），无法判断则留空\n"
-            "请仅根据内容进行提取，不要臆造。\n\n"
+            "请仅根据内容进行提取，不要臆造。\n"
+            '以 JSON 对象输出，键为 "competition"、"group"、"drama_name"，无法判断的值为 null。\n\n'
             f"标题: {title}\n"
             f"描述: {desc}\n"
         )
-        result: StageDramaMeta = structured.invoke(prompt)
+        data = llm.chat_json([{"role": "user", "content": prompt}])
+        result = StageDramaMeta.model_validate(data)
         meta = result.model_dump()
         return {"meta": meta, "logs": [f"LLM extracted meta for '{title}': {meta}"]}
     except Exception as e:
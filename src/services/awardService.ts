@@ -1,5 +1,5 @@
 import { api } from './api'
-import { Award, AwardRecord, PaginatedResponse } from '../types'
+import { Award, AwardLeaderboardResponse, AwardRecord, GroupedAwardRecordsResponse, PaginatedResponse } from '../types'
 
 interface AwardQueryParams {
   page?: number
@@ -68,6 +68,21 @@ class AwardService {
     return api.get<AwardRecord[]>(`/awards/records/by_competition/${queryString}`)
   }
 
+  // 按年份分页、按年份和奖项分组获取比赛的获奖记录（page_size 为每页年份数）
+  async getCompetitionAwardRecordsGrouped(
+    competitionId: string,
+    params: { year?: number; page?: number; page_size?: number } = {}
+  ): Promise<GroupedAwardRecordsResponse> {
+    const queryString = api.buildQueryParams({ ...params, competition: competitionId })
+    return api.get<GroupedAwardRecordsResponse>(`/awards/records/by_competition/grouped/${queryString}`)
+  }
+
+  // 获取社团获奖排行榜（不传比赛为全部比赛，year 需与比赛一起使用）
+  async getLeaderboard(params: { competition?: string; year?: number; page?: number; page_size?: number } = {}): Promise<AwardLeaderboardResponse> {
+    const queryString = api.buildQueryParams(params)
+    return api.get<AwardLeaderboardResponse>(`/awards/records/leaderboard/${queryString}`)
+  }
+
   // 获取视频的获奖记录
   async getVideoAwardRecords(videoId: string): Promise<AwardRecord[]> {
     const response = await this.getAwardRecords({
@@ -1,5 +1,5 @@
 import { api } from './api'
-import { Event } from '../types'
+import { Event, EventVideoLinkResult, EventVideoPair } from '../types'
 
 export const eventService = {
   // 获取所有赛事（所有页面）
@@ -79,4 +79,9 @@ export const eventService = {
   unlinkVideo: async (eventId: string, videoId: string): Promise<Event> => {
     return await api.post<Event>(`/competitions/events/${eventId}/unlink_video/`, { video_id: videoId })
   },
+
+  // 批量关联/取消关联赛事与视频
+  bulkLinkVideos: async (link: EventVideoPair[], unlink: EventVideoPair[] = []): Promise<EventVideoLinkResult> => {
+    return await api.post<EventVideoLinkResult>('/competitions/events/bulk-links/', { link, unlink })
+  },
 }
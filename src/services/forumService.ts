@@ -1,6 +1,7 @@
 import { api } from './api'
 import {
   Comment,
+  CursorPage,
   ForumCategory,
   ForumReportPayload,
   ForumTag,
@@ -8,6 +9,8 @@ import {
   Post,
   PostDetail,
   PostFilters,
+  ReactionResult,
+  ReactionStates,
 } from '../types/forum'
 import { PaginatedResponse } from '../types'
 
@@ -57,8 +60,12 @@ class ForumService {
     return api.post<PostDetail>(`/forum/posts/${id}/moderate/`, data)
   }
 
-  async reactToPost(id: number, reaction = 'like'): Promise<{ active: boolean; like_count: number }> {
-    return api.post<{ active: boolean; like_count: number }>(`/forum/posts/${id}/react/`, { reaction })
+  async reactToPost(id: number, reaction = 'like', active?: boolean): Promise<ReactionResult> {
+    return api.post<ReactionResult>(`/forum/posts/${id}/react/`, { reaction, active })
+  }
+
+  async getPostReactions(ids: number[]): Promise<ReactionStates> {
+    return api.get<ReactionStates>(`/forum/posts/reactions/?ids=${ids.join(',')}`)
   }
 
   async createComment(data: Partial<Comment>): Promise<Comment> {
@@ -70,6 +77,16 @@ class ForumService {
     return api.get<PaginatedResponse<Comment>>(`/forum/comments/${queryString}`)
   }
 
+  async getPostComments(postId: number, cursor?: string | null, limit?: number): Promise<CursorPage<Comment>> {
+    const queryString = api.buildQueryParams({ cursor, limit })
+    return api.get<CursorPage<Comment>>(`/forum/posts/${postId}/comments/${queryString}`)
+  }
+
+  async getCommentReplies(commentId: number, cursor?: string | null): Promise<CursorPage<Comment>> {
+    const queryString = api.buildQueryParams({ cursor })
+    return api.get<CursorPage<Comment>>(`/forum/comments/${commentId}/replies/${queryString}`)
+  }
+
   async updateComment(id: number, data: Partial<Comment>): Promise<Comment> {
     return api.patch<Comment>(`/forum/comments/${id}/`, data)
   }
@@ -78,8 +95,12 @@ class ForumService {
     return api.delete(`/forum/comments/${id}/`)
   }
 
-  async reactToComment(id: number, reaction = 'like'): Promise<{ active: boolean; like_count: number }> {
-    return api.post<{ active: boolean; like_count: number }>(`/forum/comments/${id}/react/`, { reaction })
+  async reactToComment(id: number, reaction = 'like', active?: boolean): Promise<ReactionResult> {
+    return api.post<ReactionResult>(`/forum/comments/${id}/react/`, { reaction, active })
+  }
+
+  async getCommentReactions(ids: number[]): Promise<ReactionStates> {
+    return api.get<ReactionStates>(`/forum/comments/reactions/?ids=${ids.join(',')}`)
   }
 
   async hideComment(id: number, reason = ''): Promise<Comment> {
@@ -1,5 +1,5 @@
 import { api } from './api'
-import { Group, GroupManager, PaginatedResponse, ProvinceStats, CityStats } from '../types'
+import { Group, GroupManager, GroupProfile, PaginatedResponse, ProvinceStats, CityStats } from '../types'
 
 interface GroupQueryParams {
   page?: number
@@ -34,6 +34,11 @@ class GroupService {
     return api.get<Group>(`/groups/${id}/`)
   }
 
+  // 社团主页聚合数据（社团信息、计数、最新视频和获奖记录、管理员）
+  async getGroupProfile(id: string): Promise<GroupProfile> {
+    return api.get<GroupProfile>(`/groups/${id}/profile/`)
+  }
+
   async getManagedGroups(): Promise<PaginatedResponse<Group>> {
     return api.get<PaginatedResponse<Group>>('/groups/managed/?page_size=1000')
   }
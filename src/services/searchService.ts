@@ -0,0 +1,20 @@
+import { api } from './api'
+import { SuggestResponse, SuggestType } from '../types'
+
+class SearchService {
+  // 全站搜索联想（视频、社团、比赛、标签）
+  async suggest(
+    q: string,
+    options?: { types?: SuggestType[]; limit?: number },
+    signal?: AbortSignal,
+  ): Promise<SuggestResponse> {
+    const queryString = api.buildQueryParams({
+      q,
+      types: options?.types?.join(','),
+      limit: options?.limit,
+    })
+    return api.get<SuggestResponse>(`/search/suggest/${queryString}`, { signal })
+  }
+}
+
+export const searchService = new SearchService()
@@ -1,5 +1,5 @@
 import { api } from './api'
-import { Tag, PaginatedResponse } from '../types'
+import { Tag, TagCatalog, PaginatedResponse } from '../types'
 
 interface TagQueryParams {
   page?: number
@@ -23,6 +23,11 @@ class TagService {
     return api.get<PaginatedResponse<Tag>>(`/tags/${queryString}`)
   }
 
+  // 按分类分组、按使用次数排序的标签目录（紧凑格式，tags 中每项按 fields 顺序排列）
+  async getCatalog(): Promise<TagCatalog> {
+    return api.get<TagCatalog>('/tags/catalog/')
+  }
+
   // 获取标签详情
   async getTagById(id: string): Promise<Tag> {
     return api.get<Tag>(`/tags/${id}/`)
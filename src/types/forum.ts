@@ -33,6 +33,7 @@ export interface Comment {
   updated_at: string
   edited_at: string | null
   replies: Comment[]
+  replies_cursor: string | null
   can_edit: boolean
   can_moderate: boolean
 }
@@ -69,8 +70,22 @@ export interface PostDetail extends Post {
   edited_at: string | null
   updated_at: string
   comments: Comment[]
+  comments_cursor: string | null
 }
 
+export interface CursorPage<T> {
+  results: T[]
+  next_cursor: string | null
+}
+
+export interface ReactionResult {
+  active: boolean
+  like_count: number
+}
+
+// 目标 id -> 当前用户的表态列表
+export type ReactionStates = Record<string, string[]>
+
 export interface PostFilters {
   category?: number
   author?: string | number
@@ -55,6 +55,14 @@ export interface GroupManager {
   role: string
 }
 
+export interface GroupProfile {
+  group: Group
+  counts: { videos: number; awards: number; managers: number }
+  recent_videos: Video[]
+  recent_awards: AwardRecord[]
+  managers: Pick<GroupManager, 'id' | 'username' | 'nickname'>[]
+}
+
 export interface UserSearchResult extends GroupManager {
   managed_groups?: Array<{ id: string; name: string }>
 }
@@ -211,6 +219,28 @@ export interface PaginatedResponse<T> {
   results: T[]
 }
 
+export interface AwardRecordYearGroup {
+  year: number
+  awards: { award: string; award_name: string; records: AwardRecord[] }[]
+}
+
+export interface GroupedAwardRecordsResponse extends PaginatedResponse<AwardRecordYearGroup> {
+  years: number[]
+}
+
+export interface AwardLeaderboardEntry {
+  rank: number
+  group: string
+  group_name: string
+  group_logo?: string | null
+  tier_counts: number[]
+  award_count: number
+}
+
+export interface AwardLeaderboardResponse extends PaginatedResponse<AwardLeaderboardEntry> {
+  tiers: string[]
+}
+
 export interface EventVideo {
   id: string
   bv_number: string
@@ -248,7 +278,42 @@ export interface Event {
   region: string
   stage: 'preliminary' | 'advancing' | 'final' | ''
   stage_display: string
-  videos: EventVideo[]
+  videos?: EventVideo[]
   created_at: string
   updated_at: string
 }
+
+export interface EventVideoPair {
+  event: string
+  video: string
+}
+
+export interface EventVideoLinkResult {
+  linked: number
+  unlinked: number
+  unchanged: number
+  errors: (EventVideoPair & { error: string })[]
+}
+
+export type SuggestType = 'video' | 'group' | 'competition' | 'tag'
+
+export interface SuggestItem {
+  type: SuggestType
+  id: string
+  name: string
+  // 视频为 BV 号，社团为城市/省份，标签为分类
+  subtitle: string
+}
+
+export interface SuggestResponse {
+  query: string
+  results: SuggestItem[]
+}
+
+// [id, name, color, usage_count, is_featured]
+export type TagCatalogEntry = [string, string, string, number, boolean]
+
+export interface TagCatalog {
+  fields: ['id', 'name', 'color', 'usage_count', 'is_featured']
+  categories: { category: string; tags: TagCatalogEntry[] }[]
+}